@@ -3,10 +3,11 @@ DataBoard - Lightweight Python BI Dashboard
 Main application entry point
 """
 import os
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, send_from_directory
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from functools import wraps
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 import json
 import pandas as pd
 from datetime import datetime, timedelta
@@ -15,7 +16,12 @@ import secrets
 from core.data_processor import DataProcessor
 from core.chart_builder import ChartBuilder
 from core.auth_manager import AuthManager
-from core.pchi_analyzer import PCHIAnalyzer
+from core.login_guard import login_pool, ip_limiter, user_limiter
+from core.pchi_loader import PCHILoader
+from core.dataset_cache import dataset_cache
+from core.query_cache import query_cache
+from core.claims_export import EXPORT_FORMATS, available_formats
+from config import Config
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -30,21 +36,42 @@ os.makedirs('data/dashboards', exist_ok=True)
 os.makedirs('data/datasets', exist_ok=True)
 
 # Initialize managers
-auth_manager = AuthManager()
+auth_manager = AuthManager(Config.USERS_FILE)
 data_processor = DataProcessor()
 chart_builder = ChartBuilder()
 
-# Initialize PCHI analyzer (lazy loading)
-pchi_analyzer = None
+# PCHI analyzer, loaded in the background so no request waits for the CSV parse
+pchi_loader = PCHILoader(
+    Config.PCHI_CSV_PATH,
+    watch_dir=Config.PCHI_WATCH_DIR,
+    pattern=Config.PCHI_FILE_PATTERN,
+    settle_seconds=Config.PCHI_RELOAD_SETTLE,
+    delta_dir=Config.PCHI_DELTA_DIR,
+    delta_pattern=Config.PCHI_DELTA_PATTERN
+)
+
+# Warm up at startup and poll for new extracts. Skipped in the debug reloader's watcher
+# process and in spawned groupby workers, which re-import `python app.py` as __mp_main__
+if __name__ != '__mp_main__' and (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    pchi_loader.start()
+    pchi_loader.watch(Config.PCHI_RELOAD_INTERVAL)
+
 
 def get_pchi_analyzer():
-    """Get or create PCHI analyzer instance"""
-    global pchi_analyzer
-    if pchi_analyzer is None:
-        csv_path = 'data/uploads/20251024 PCHI Claim summary 2020 - now.csv'
-        if os.path.exists(csv_path):
-            pchi_analyzer = PCHIAnalyzer(csv_path)
-    return pchi_analyzer
+    """Get the PCHI analyzer instance, or None while it is not loaded"""
+    return pchi_loader.get()
+
+
+def cached_pchi_response(analyzer, method, filters, **params):
+    """Answer a PCHI query from the result cache, reporting hits in X-Cache"""
+    result, hit = query_cache.get(
+        method, filters, (analyzer.csv_path, analyzer.version, analyzer.deltas),
+        lambda: getattr(analyzer, method)(filters, **params),
+        **params
+    )
+    response = jsonify(result)
+    response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
 
 
 def login_required(f):
@@ -57,6 +84,24 @@ def login_required(f):
     return decorated_function
 
 
+def pchi_required(f):
+    """Decorator for routes that need the PCHI analyzer; passes it as the first argument"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        analyzer = get_pchi_analyzer()
+        if analyzer is None:
+            status = pchi_loader.status()
+            if status['status'] == 'loading':
+                response = jsonify({'error': 'PCHI data is loading', **status})
+                response.headers['Retry-After'] = '5'
+                return response, 503
+            if status['status'] == 'failed':
+                return jsonify({'error': f"PCHI data failed to load: {status['error']}"}), 500
+            return jsonify({'error': 'PCHI data not available'}), 404
+        return f(analyzer, *args, **kwargs)
+    return decorated_function
+
+
 # ==================== Authentication Routes ====================
 
 @app.route('/')
@@ -73,6 +118,30 @@ def login():
     return render_template('login.html')
 
 
+def run_in_login_pool(fn, *args):
+    """Run password hashing work on the login pool
+
+    Returns ``(result, None)``, or ``(None, error_response)`` when the pool is
+    saturated or the work does not finish in time.
+    """
+    future = login_pool.submit(fn, *args)
+    if future is not None:
+        try:
+            return future.result(timeout=Config.LOGIN_TIMEOUT), None
+        except FuturesTimeoutError:
+            pass
+    response = jsonify({'error': 'Server busy, please try again'})
+    response.headers['Retry-After'] = '2'
+    return None, (response, 503)
+
+
+def rate_limited(retry_after):
+    """Build the 429 response for a rate-limited login"""
+    response = jsonify({'error': 'Too many login attempts, please try again later'})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+
 @app.route('/api/auth/login', methods=['POST'])
 def api_login():
     """Handle login request"""
@@ -80,16 +149,40 @@ def api_login():
     username = data.get('username')
     password = data.get('password')
     
-    user = auth_manager.authenticate(username, password)
+    if not username or not password:
+        return jsonify({'error': 'Invalid credentials'}), 401
+    
+    # Every attempt counts against the client IP, failures against the username
+    client_ip = request.remote_addr
+    retry_after = ip_limiter.retry_after(client_ip) or user_limiter.retry_after(username)
+    if retry_after:
+        return rate_limited(retry_after)
+    ip_limiter.add(client_ip)
+    
+    user, error = run_in_login_pool(auth_manager.authenticate, username, password)
+    if error:
+        return error
     if user:
+        user_limiter.reset(username)
         session.permanent = True
         session['user_id'] = user['id']
         session['username'] = user['username']
+        session['role'] = user['role']
         return jsonify({'success': True, 'user': {'username': user['username']}})
     
+    user_limiter.add(username)
     return jsonify({'error': 'Invalid credentials'}), 401
 
 
+@app.route('/api/auth/stats', methods=['GET'])
+@login_required
+def api_auth_stats():
+    """Login pool queue depth and throughput (admins only)"""
+    if session.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    return jsonify(login_pool.stats())
+
+
 @app.route('/api/auth/register', methods=['POST'])
 def api_register():
     """Handle registration request"""
@@ -101,7 +194,10 @@ def api_register():
     if len(password) < 6:
         return jsonify({'error': 'Password must be at least 6 characters'}), 400
     
-    success, message = auth_manager.register(username, password, email)
+    result, error = run_in_login_pool(auth_manager.register, username, password, email)
+    if error:
+        return error
+    success, message = result
     if success:
         return jsonify({'success': True, 'message': message})
     
@@ -142,6 +238,13 @@ def get_dataset_info(dataset_id):
     return jsonify({'error': 'Dataset not found'}), 404
 
 
+@app.route('/api/cache/stats', methods=['GET'])
+@login_required
+def get_cache_stats():
+    """Get dataset cache hit/miss/eviction counters"""
+    return jsonify(dataset_cache.stats())
+
+
 @app.route('/api/upload', methods=['POST'])
 @login_required
 def upload_file():
@@ -249,6 +352,41 @@ def load_dashboard(dashboard_id):
     return jsonify({'error': 'Dashboard not found'}), 404
 
 
+@app.route('/api/dashboard/<dashboard_id>/render', methods=['GET'])
+@login_required
+def render_dashboard(dashboard_id):
+    """Compute every chart of a saved dashboard in one request
+
+    Widgets saved with a ``chart`` spec (dataset_id, chart_type, config) are
+    built from one load per dataset; the response carries each widget's
+    chart or error and its timing.
+    """
+    dashboard_file = os.path.join('data/dashboards', f"{session['user_id']}_{dashboard_id}.json")
+    
+    if not os.path.exists(dashboard_file):
+        return jsonify({'error': 'Dashboard not found'}), 404
+    
+    with open(dashboard_file, 'r') as f:
+        dashboard_data = json.load(f)
+    
+    widgets = [
+        {**item['chart'], 'id': item.get('id')}
+        for item in dashboard_data.get('layout', [])
+        if isinstance(item, dict) and item.get('chart')
+    ]
+    
+    start = datetime.now()
+    rendered = chart_builder.render_widgets(session['user_id'], widgets)
+    rendered['total_ms'] = round((datetime.now() - start).total_seconds() * 1000, 1)
+    
+    return jsonify({
+        'id': dashboard_data['id'],
+        'name': dashboard_data['name'],
+        'layout': dashboard_data.get('layout', []),
+        **rendered
+    })
+
+
 @app.route('/api/dashboards', methods=['GET'])
 @login_required
 def list_dashboards():
@@ -276,21 +414,18 @@ def list_dashboards():
 @login_required
 def pchi_dashboard():
     """PCHI Claims Dashboard page"""
-    return render_template('pchi_dashboard.html', username=session.get('username'))
+    return render_template('pchi_dashboard.html', username=session.get('username'),
+                           export_formats=available_formats())
 
 
 @app.route('/api/pchi/kpis', methods=['POST'])
 @login_required
-def get_pchi_kpis():
+@pchi_required
+def get_pchi_kpis(analyzer):
     """Get PCHI KPIs"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        kpis = analyzer.get_kpi_summary(filters)
-        return jsonify(kpis)
+        return cached_pchi_response(analyzer, 'get_kpi_summary', filters)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -298,16 +433,12 @@ def get_pchi_kpis():
 
 @app.route('/api/pchi/trends', methods=['POST'])
 @login_required
-def get_pchi_trends():
+@pchi_required
+def get_pchi_trends(analyzer):
     """Get claims trends"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        trends = analyzer.get_claims_trend(filters)
-        return jsonify(trends)
+        return cached_pchi_response(analyzer, 'get_claims_trend', filters)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -315,16 +446,12 @@ def get_pchi_trends():
 
 @app.route('/api/pchi/status', methods=['POST'])
 @login_required
-def get_pchi_status():
+@pchi_required
+def get_pchi_status(analyzer):
     """Get claim status distribution"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        status = analyzer.get_status_distribution(filters)
-        return jsonify(status)
+        return cached_pchi_response(analyzer, 'get_status_distribution', filters)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -332,16 +459,12 @@ def get_pchi_status():
 
 @app.route('/api/pchi/providers', methods=['POST'])
 @login_required
-def get_pchi_providers():
+@pchi_required
+def get_pchi_providers(analyzer):
     """Get top providers"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        providers = analyzer.get_top_providers(filters, limit=10)
-        return jsonify(providers)
+        return cached_pchi_response(analyzer, 'get_top_providers', filters, limit=10)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -349,16 +472,12 @@ def get_pchi_providers():
 
 @app.route('/api/pchi/business-units', methods=['POST'])
 @login_required
-def get_pchi_business_units():
+@pchi_required
+def get_pchi_business_units(analyzer):
     """Get business unit analysis"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        bu_data = analyzer.get_bu_analysis(filters)
-        return jsonify(bu_data)
+        return cached_pchi_response(analyzer, 'get_bu_analysis', filters)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -366,16 +485,12 @@ def get_pchi_business_units():
 
 @app.route('/api/pchi/age-distribution', methods=['POST'])
 @login_required
-def get_pchi_age():
+@pchi_required
+def get_pchi_age(analyzer):
     """Get age distribution"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        age_data = analyzer.get_age_distribution(filters)
-        return jsonify(age_data)
+        return cached_pchi_response(analyzer, 'get_age_distribution', filters)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -383,16 +498,12 @@ def get_pchi_age():
 
 @app.route('/api/pchi/gender-distribution', methods=['POST'])
 @login_required
-def get_pchi_gender():
+@pchi_required
+def get_pchi_gender(analyzer):
     """Get gender distribution"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        gender_data = analyzer.get_gender_distribution(filters)
-        return jsonify(gender_data)
+        return cached_pchi_response(analyzer, 'get_gender_distribution', filters)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -400,16 +511,12 @@ def get_pchi_gender():
 
 @app.route('/api/pchi/benefit-types', methods=['POST'])
 @login_required
-def get_pchi_benefits():
+@pchi_required
+def get_pchi_benefits(analyzer):
     """Get benefit type analysis"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        benefit_data = analyzer.get_benefit_type_analysis(filters, limit=10)
-        return jsonify(benefit_data)
+        return cached_pchi_response(analyzer, 'get_benefit_type_analysis', filters, limit=10)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -417,16 +524,12 @@ def get_pchi_benefits():
 
 @app.route('/api/pchi/distribution-channels', methods=['POST'])
 @login_required
-def get_pchi_channels():
+@pchi_required
+def get_pchi_channels(analyzer):
     """Get distribution channel analysis"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        channel_data = analyzer.get_distribution_channel_analysis(filters)
-        return jsonify(channel_data)
+        return cached_pchi_response(analyzer, 'get_distribution_channel_analysis', filters)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -434,16 +537,12 @@ def get_pchi_channels():
 
 @app.route('/api/pchi/products', methods=['POST'])
 @login_required
-def get_pchi_products():
+@pchi_required
+def get_pchi_products(analyzer):
     """Get product analysis"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        product_data = analyzer.get_product_analysis(filters, limit=10)
-        return jsonify(product_data)
+        return cached_pchi_response(analyzer, 'get_product_analysis', filters, limit=10)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -451,16 +550,32 @@ def get_pchi_products():
 
 @app.route('/api/pchi/yearly-comparison', methods=['POST'])
 @login_required
-def get_pchi_yearly():
+@pchi_required
+def get_pchi_yearly(analyzer):
     """Get yearly comparison"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         filters = request.json.get('filters', {}) if request.json else {}
-        yearly_data = analyzer.get_yearly_comparison(filters)
-        return jsonify(yearly_data)
+        return cached_pchi_response(analyzer, 'get_yearly_comparison', filters)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/pchi/ratios', methods=['POST'])
+@login_required
+@pchi_required
+def get_pchi_ratios(analyzer):
+    """Get ratio metrics (accept/reject rates, approved/claimed) per value of a dimension"""
+    try:
+        data = request.json if request.json else {}
+        filters = data.get('filters', {})
+        dimension = data.get('dimension', 'DISTRIBUTION')
+        metrics = data.get('metrics')
+
+        return cached_pchi_response(analyzer, 'get_ratio_metrics', filters, dimension=dimension, metrics=metrics)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -468,20 +583,74 @@ def get_pchi_yearly():
 
 @app.route('/api/pchi/table', methods=['POST'])
 @login_required
-def get_pchi_table():
+@pchi_required
+def get_pchi_table(analyzer):
     """Get claims data table"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
+        data = request.json if request.json else {}
+        filters = data.get('filters', {})
+        page = data.get('page', 1)
+        page_size = data.get('page_size', 100)
+        sort_by = data.get('sort_by')
+        ascending = data.get('ascending', True)
+
+        return cached_pchi_response(analyzer, 'get_claims_data_table', filters, page=page, page_size=page_size,
+                                    sort_by=sort_by, ascending=ascending)
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/pchi/bundle', methods=['POST'])
+@login_required
+@pchi_required
+def get_pchi_bundle(analyzer):
+    """Get several dashboard panels from one filter pass"""
+    try:
         data = request.json if request.json else {}
         filters = data.get('filters', {})
+        panels = data.get('panels')
         page = data.get('page', 1)
         page_size = data.get('page_size', 100)
+        sort_by = data.get('sort_by')
+        ascending = data.get('ascending', True)
+
+        return cached_pchi_response(analyzer, 'get_dashboard_bundle', filters, panels=panels, page=page,
+                                    page_size=page_size, sort_by=sort_by, ascending=ascending)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        table_data = analyzer.get_claims_data_table(filters, page, page_size)
-        return jsonify(table_data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/pchi/export', methods=['POST'])
+@login_required
+@pchi_required
+def export_pchi_claims(analyzer):
+    """Stream the filtered claims as a CSV, gzip-compressed CSV or Parquet download
+
+    Takes the /api/pchi/table body (filters, sort_by, ascending) plus
+    ``format`` and ``columns``, as JSON or as a ``payload`` form field so a
+    plain form submit can start a browser download.
+    """
+    try:
+        data = request.get_json(silent=True) or json.loads(request.form.get('payload') or '{}')
+        fmt = data.get('format', 'csv')
+        stream = analyzer.export_claims(data.get('filters', {}), fmt, columns=data.get('columns'),
+                                        sort_by=data.get('sort_by'), ascending=data.get('ascending', True))
+
+        mimetype, extension = EXPORT_FORMATS[fmt]
+        filename = f"pchi_claims_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        return Response(stream, mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -489,13 +658,10 @@ def get_pchi_table():
 
 @app.route('/api/pchi/filter-options', methods=['GET'])
 @login_required
-def get_pchi_filter_options():
+@pchi_required
+def get_pchi_filter_options(analyzer):
     """Get available filter options"""
     try:
-        analyzer = get_pchi_analyzer()
-        if not analyzer:
-            return jsonify({'error': 'PCHI data not available'}), 404
-
         options = analyzer.get_filter_options()
         return jsonify(options)
 
@@ -503,6 +669,14 @@ def get_pchi_filter_options():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/pchi/health', methods=['GET'])
+def get_pchi_health():
+    """Get PCHI data readiness, load duration and row count"""
+    get_pchi_analyzer()
+    status = pchi_loader.status()
+    return jsonify(status), 200 if status['status'] == 'ready' else 503
+
+
 if __name__ == '__main__':
     print("\n" + "="*60)
     print("🚀 DataBoard - Lightweight BI Dashboard")
@@ -0,0 +1,103 @@
+"""
+Benchmark grouped aggregation
+Compares the per-measure if/elif groupby ladders ChartBuilder and DataProcessor
+used with the shared single-pass aggregation engine.
+
+Usage: python benchmark_aggregation.py [rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.aggregation import aggregate
+
+
+def legacy_aggregate(df, group_by, value_column, agg_func):
+    """One measure, the way aggregate_data and _create_categorical_chart computed it"""
+    if agg_func == 'sum':
+        return df.groupby(group_by)[value_column].sum()
+    elif agg_func == 'mean':
+        return df.groupby(group_by)[value_column].mean()
+    elif agg_func == 'count':
+        return df.groupby(group_by)[value_column].count()
+    elif agg_func == 'min':
+        return df.groupby(group_by)[value_column].min()
+    elif agg_func == 'max':
+        return df.groupby(group_by)[value_column].max()
+
+
+def legacy_top_with_other(df, group_by, value_column, limit):
+    """Top-N sums plus an "Other" total, done by hand with a second pass over the rows"""
+    totals = legacy_aggregate(df, group_by, value_column, 'sum').sort_values(ascending=False)
+    top = totals.head(limit)
+    rest = df[~df[group_by].isin(top.index)]
+    return pd.concat([top, pd.Series({'Other': rest[value_column].sum()})])
+
+
+def make_frame(rows, groups, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'PROVIDER': pd.Series(rng.integers(0, groups, rows)).map(lambda i: f"Provider {i:05d}"),
+        'APPROVED': rng.gamma(2.0, 500.0, rows),
+        'INCURRED': rng.gamma(2.0, 600.0, rows),
+        'CLAIMED': rng.gamma(2.0, 700.0, rows),
+    })
+
+
+def timed(fn, repeat=5):
+    """Best of ``repeat`` runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def benchmark(rows):
+    print("=" * 60)
+    print("Aggregation Benchmark")
+    print("=" * 60)
+
+    measures = [('APPROVED', 'sum'), ('*', 'count'), ('INCURRED', 'mean'), ('CLAIMED', 'max')]
+    print(f"\n{'rows':>10} {'groups':>7} {'case':>22} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8}")
+
+    for groups in [50, 5000]:
+        df = make_frame(rows, groups)
+        cases = {
+            'one measure': (
+                lambda: legacy_aggregate(df, 'PROVIDER', 'APPROVED', 'sum'),
+                lambda: aggregate(df, 'PROVIDER', [('APPROVED', 'sum')])
+            ),
+            '4 measures': (
+                lambda: [legacy_aggregate(df, 'PROVIDER', col, agg) if col != '*' else df.groupby('PROVIDER').size()
+                         for col, agg in measures],
+                lambda: aggregate(df, 'PROVIDER', measures)
+            ),
+            'top 10 + Other': (
+                lambda: legacy_top_with_other(df, 'PROVIDER', 'APPROVED', 10),
+                lambda: aggregate(df, 'PROVIDER', [('APPROVED', 'sum')], sort_by='sum(APPROVED)', limit=10, other='Other')
+            ),
+        }
+
+        for case, (legacy, engine) in cases.items():
+            legacy_ms, expected = timed(legacy)
+            engine_ms, result = timed(engine)
+
+            # Same numbers either way
+            if case == 'top 10 + Other':
+                assert np.allclose(result.iloc[:, 0].to_numpy(), expected.to_numpy())
+            elif case == '4 measures':
+                for (col, agg), values in zip(measures, expected):
+                    assert np.allclose(result.iloc[:, measures.index((col, agg))].to_numpy(), values.to_numpy())
+            else:
+                assert np.allclose(result.iloc[:, 0].to_numpy(), expected.to_numpy())
+
+            print(f"{rows:>10,} {groups:>7,} {case:>22} {legacy_ms:>10.1f} {engine_ms:>10.1f} "
+                  f"{legacy_ms / engine_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,84 @@
+"""
+Benchmark parallel groupby scaling
+Times the PCHI provider breakdown (every claim measure summed per provider)
+and a count/sum/min/max aggregation with 1 to N workers, against the serial
+pandas groupby the panels used before.
+
+Usage: python benchmark_parallel_groupby.py [rows] [max_workers] [backend]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.parallel_groupby import GroupAggregator, default_workers
+from core.pchi_cube import claim_measures, group_totals
+
+
+def make_claims(rows, providers=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'CL_NO': np.arange(rows),
+        'PROVIDER': pd.Categorical.from_codes(rng.integers(0, providers, rows),
+                                              [f"Provider {i:05d}" for i in range(providers)]),
+        'APPROVED': rng.gamma(2.0, 500.0, rows),
+        'INCURRED': rng.gamma(2.0, 600.0, rows),
+        'CLAIMED': rng.gamma(2.0, 700.0, rows),
+        'OUTSTANDING': rng.gamma(1.0, 100.0, rows),
+        'CLAIM_STATUS': np.where(rng.random(rows) < 0.8, 'Accept', 'Reject'),
+    })
+
+
+def timed(fn, repeat=3):
+    """Best of ``repeat`` runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def benchmark(rows, max_workers, backend):
+    print("=" * 60)
+    print("Parallel Groupby Benchmark")
+    print("=" * 60)
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    print(f"\n{rows:,} claims, {backend} backend, {cores} core(s) available")
+
+    df = make_claims(rows)
+    measures = claim_measures(df)
+    codes, uniques = pd.factorize(df['PROVIDER'], sort=True)
+    values = df[['APPROVED', 'INCURRED', 'CLAIMED', 'OUTSTANDING']].to_numpy()
+    ops = ['sum', 'count', 'min', 'max']
+
+    expected = measures.groupby(df['PROVIDER'], observed=True).sum()
+
+    # One worker is the serial path: pandas groupby for the panel, one bincount pass for the 4 aggregations
+    print(f"\n{'workers':>8} {'panel ms':>10} {'speedup':>8} {'4 aggs ms':>10} {'speedup':>8}")
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        aggregator = GroupAggregator(workers, backend)
+        try:
+            # Start the pool outside the timings
+            aggregator.aggregate(np.zeros(workers, dtype=np.int64), 1, values[:workers], ops)
+
+            panel_ms, result = timed(lambda: group_totals(measures, df['PROVIDER'], aggregator))
+            aggs_ms, _ = timed(lambda: aggregator.aggregate(codes, len(uniques), values, ops))
+        finally:
+            aggregator.shutdown()
+
+        # Same totals as the serial groupby
+        assert np.allclose(result.to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64))
+
+        baseline = baseline or (panel_ms, aggs_ms)
+        print(f"{workers:>8} {panel_ms:>10.1f} {baseline[0] / panel_ms:>7.2f}x "
+              f"{aggs_ms:>10.1f} {baseline[1] / aggs_ms:>7.2f}x")
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000000,
+              int(sys.argv[2]) if len(sys.argv) > 2 else max(default_workers(), os.cpu_count() or 1),
+              sys.argv[3] if len(sys.argv) > 3 else 'process')
@@ -0,0 +1,120 @@
+"""
+Benchmark PCHI claims loading
+Compares the untyped full-file load with the typed, column-pruned schema load.
+Each loader runs in its own process so resident memory is measured cleanly.
+
+Usage: python benchmark_pchi_load.py [csv_path | rows]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+
+def legacy_load(csv_path):
+    """Load the extract the way PCHIAnalyzer did before the schema was declared"""
+    df = pd.read_csv(csv_path)
+
+    date_columns = ['POLICY EFF DATE', 'POLICY EXP DATE', 'SICK/FROM', 'SICK/TO',
+                    'RECEIPT/DT', 'PAYDATE', 'CHQDATE', 'CREATE_DATE', 'UPDATE_DATE']
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    numeric_columns = ['INCURRED', 'APPROVED', 'CLAIMED', 'OUTSTANDING',
+                       'DED_AMT', 'COPAY_AMT', 'MANUAL_REJECTED_AMT', 'AGE']
+    for col in numeric_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    if 'PAYDATE' in df.columns:
+        df['YEAR'] = df['PAYDATE'].dt.year
+        df['MONTH'] = df['PAYDATE'].dt.month
+        df['QUARTER'] = df['PAYDATE'].dt.quarter
+        df['YEAR_MONTH'] = df['PAYDATE'].dt.to_period('M').astype(str)
+
+    return df
+
+
+def resident_mb():
+    """Get the current and peak resident memory of this process in MB"""
+    current = peak = 0
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    current = int(line.split()[1]) / 1024
+                elif line.startswith('VmHWM:'):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        current = peak
+    return current, peak
+
+
+def run_loader(mode, csv_path):
+    """Load the file once and report timings as JSON (runs in a child process)"""
+    from core.pchi_analyzer import load_claims
+
+    baseline, _ = resident_mb()
+    start = time.perf_counter()
+    df = legacy_load(csv_path) if mode == 'legacy' else load_claims(csv_path)
+    elapsed = time.perf_counter() - start
+    current, peak = resident_mb()
+
+    print(json.dumps({
+        'seconds': elapsed,
+        'columns': len(df.columns),
+        'frame_mb': df.memory_usage(index=False, deep=True).sum() / (1024 * 1024),
+        'rss_mb': current - baseline,
+        'peak_rss_mb': peak - baseline
+    }))
+
+
+def benchmark(csv_path):
+    print("=" * 60)
+    print("PCHI Load Benchmark")
+    print("=" * 60)
+    print(f"\n📂 {csv_path} ({os.path.getsize(csv_path) / (1024 * 1024):.1f} MB)")
+
+    results = {}
+    for mode in ['legacy', 'typed']:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', mode, csv_path],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"\n{'':>8} {'load (s)':>10} {'columns':>8} {'frame MB':>10} {'RSS MB':>8} {'peak MB':>8}")
+    for mode, r in results.items():
+        print(f"{mode:>8} {r['seconds']:>10.2f} {r['columns']:>8} {r['frame_mb']:>10.1f} "
+              f"{r['rss_mb']:>8.1f} {r['peak_rss_mb']:>8.1f}")
+
+    legacy, typed = results['legacy'], results['typed']
+    print(f"\n⚡ {legacy['seconds'] / typed['seconds']:.1f}x faster, "
+          f"{legacy['frame_mb'] / typed['frame_mb']:.1f}x smaller frame")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_loader(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
+        benchmark(sys.argv[1])
+    else:
+        from sample_pchi_data import generate_sample
+
+        rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            print(f"Generating {rows:,} synthetic claims...")
+            generate_sample(path, rows=rows)
+            benchmark(path)
+        finally:
+            os.remove(path)
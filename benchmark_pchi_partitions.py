@@ -0,0 +1,113 @@
+"""
+Benchmark PCHI pay-month partitions
+Loads the claims without the cube, so panels scan the filtered rows, and times
+year-filtered queries with rows in file order and in pay-month partitions.
+Each layout runs in its own process over its own snapshot, so the mapped
+claims pages each one reads in are measured cleanly (file-backed RSS from
+/proc/self/smaps_rollup; Linux only).
+
+Usage: python benchmark_pchi_partitions.py [csv_path | rows]
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Dashboard queries timed per layout
+QUERIES = {
+    'one year': {'years': [2023]},
+    'two years': {'years': [2022, 2023]},
+    'year + status': {'years': [2023], 'statuses': ['Accept']},
+}
+
+
+def mapped_mb():
+    """Get the file-backed resident memory of this process (mapped snapshot pages) in MB"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return values['Rss'] - values['Anonymous']
+
+
+def run_layout(layout, csv_path, snapshot_dir):
+    """Load the claims and time the queries, reporting JSON (runs in a child process)"""
+    from config import Config
+    import core.pchi_analyzer as pchi_analyzer
+
+    Config.PCHI_SNAPSHOT_DIR = snapshot_dir
+    if layout == 'file order':
+        pchi_analyzer.PARTITION_COLUMN = None
+
+    # The first load writes the snapshot; time a start that maps it
+    pchi_analyzer.PCHIAnalyzer(csv_path, build_cube=False)
+    baseline = mapped_mb()
+    start = time.perf_counter()
+    analyzer = pchi_analyzer.PCHIAnalyzer(csv_path, build_cube=False)
+    result = {'load': time.perf_counter() - start, 'mapped_loaded': mapped_mb() - baseline, 'queries': {}}
+
+    for name, filters in QUERIES.items():
+        timings = []
+        for _ in range(10):
+            start = time.perf_counter()
+            analyzer.get_dashboard_bundle(filters, panels=['kpis', 'trends', 'providers', 'business-units'])
+            timings.append(time.perf_counter() - start)
+        result['queries'][name] = min(timings)
+    result['mapped_queried'] = mapped_mb() - baseline
+    result['partitions'] = analyzer.partitions.stats()
+    print(json.dumps(result))
+
+
+def benchmark(csv_path):
+    print("=" * 60)
+    print("PCHI Partition Benchmark")
+    print("=" * 60)
+    print(f"\n📂 {csv_path} ({os.path.getsize(csv_path) / (1024 * 1024):.1f} MB)")
+
+    results = {}
+    for layout in ['file order', 'partitioned']:
+        snapshot_dir = tempfile.mkdtemp()
+        try:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', layout, csv_path, snapshot_dir],
+                capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            ).stdout
+        finally:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+        results[layout] = json.loads(output.strip().splitlines()[-1])
+
+    names = list(QUERIES)
+    print(f"\n{'':>12} {'load (s)':>9} " + ' '.join(f"{name + ' (ms)':>18}" for name in names)
+          + f" {'mapped loaded':>14} {'mapped queried':>15}")
+    for layout, r in results.items():
+        print(f"{layout:>12} {r['load']:>9.2f} " + ' '.join(f"{r['queries'][name] * 1000:>18.1f}" for name in names)
+              + f" {r['mapped_loaded']:>13.1f}M {r['mapped_queried']:>14.1f}M")
+
+    stats = results['partitioned']['partitions']
+    print(f"\n📦 {stats['partitions']} partitions, {stats['resident']} resident "
+          f"({stats['resident_mb']} MB of a {stats['max_mb']} MB budget) after the queries")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_layout(sys.argv[2], sys.argv[3], sys.argv[4])
+    elif len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
+        benchmark(sys.argv[1])
+    else:
+        from sample_pchi_data import generate_sample
+
+        rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            print(f"Generating {rows:,} synthetic claims...")
+            generate_sample(path, rows=rows)
+            benchmark(path)
+        finally:
+            os.remove(path)
@@ -0,0 +1,123 @@
+"""
+Benchmark PCHI memory per web worker
+Starts N worker processes that each load a PCHIAnalyzer, as N Gunicorn workers
+would, and reads their memory from /proc/<pid>/smaps_rollup once all are loaded.
+"private" parses the CSV in every worker; "shared" maps one snapshot.
+PSS (proportional set size) splits shared pages between the processes mapping
+them, so the PSS total is what the workers really cost together. Linux only.
+
+Usage: python benchmark_pchi_workers.py [csv_path | rows] [workers]
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def smaps_mb(pid):
+    """Get RSS, PSS, shared and private memory of a process in MB"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss': values['Rss'],
+        'pss': values['Pss'],
+        'shared': values['Shared_Clean'] + values['Shared_Dirty'],
+        'private': values['Private_Clean'] + values['Private_Dirty']
+    }
+
+
+def run_worker(csv_path, snapshot_dir):
+    """Load the analyzer, serve a few requests, then wait to be measured (runs in a child process)"""
+    from config import Config
+    from core.pchi_analyzer import PCHIAnalyzer
+
+    Config.PCHI_SNAPSHOT_DIR = snapshot_dir
+    start = time.perf_counter()
+    analyzer = PCHIAnalyzer(csv_path)
+    elapsed = time.perf_counter() - start
+
+    # Touch what requests touch: filters, the cube, a sorted table page
+    analyzer.get_kpi_summary({'years': [2022]})
+    analyzer.get_claims_trend()
+    analyzer.get_claims_data_table({'years': [2022]}, page=1, page_size=100, sort_by='APPROVED')
+
+    print(json.dumps({'seconds': elapsed}), flush=True)
+    sys.stdin.read()
+
+
+def measure(csv_path, workers, snapshot_dir):
+    """Start the workers together and measure each once all have loaded"""
+    children = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child', csv_path, snapshot_dir],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=REPO)
+        for _ in range(workers)
+    ]
+    try:
+        loads = [json.loads(child.stdout.readline())['seconds'] for child in children]
+        memory = [smaps_mb(child.pid) for child in children]
+    finally:
+        for child in children:
+            child.stdin.close()
+            child.wait()
+    return loads, memory
+
+
+def benchmark(csv_path, workers):
+    print("=" * 60)
+    print("PCHI Worker Memory Benchmark")
+    print("=" * 60)
+    print(f"\n📂 {csv_path} ({os.path.getsize(csv_path) / (1024 * 1024):.1f} MB), {workers} workers")
+
+    snapshot_dir = tempfile.mkdtemp()
+    try:
+        # Build the snapshot once, as the first start after a new extract would
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import sys; from core.pchi_analyzer import load_claims_snapshot; '
+                        'load_claims_snapshot(sys.argv[1], sys.argv[2])', csv_path, snapshot_dir],
+                       check=True, cwd=REPO)
+        print(f"\n📸 Snapshot built in {time.perf_counter() - start:.2f}s")
+
+        results = {mode: measure(csv_path, workers, directory)
+                   for mode, directory in [('private', ''), ('shared', snapshot_dir)]}
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    print(f"\n{'':>8} {'load (s)':>9} {'RSS MB':>8} {'PSS MB':>8} {'shared':>8} {'private':>8} {'PSS total':>10}")
+    for mode, (loads, memory) in results.items():
+        average = {key: sum(m[key] for m in memory) / len(memory) for key in memory[0]}
+        print(f"{mode:>8} {sum(loads) / len(loads):>9.2f} {average['rss']:>8.1f} {average['pss']:>8.1f} "
+              f"{average['shared']:>8.1f} {average['private']:>8.1f} {sum(m['pss'] for m in memory):>10.1f}")
+
+    private = sum(m['pss'] for m in results['private'][1])
+    shared = sum(m['pss'] for m in results['shared'][1])
+    print(f"\n💾 {workers} workers use {private - shared:,.0f} MB less together ({private / shared:.1f}x)")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_worker(sys.argv[2], sys.argv[3])
+    else:
+        workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+        if len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
+            benchmark(sys.argv[1], workers)
+        else:
+            from sample_pchi_data import generate_sample
+
+            rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+            fd, path = tempfile.mkstemp(suffix='.csv')
+            os.close(fd)
+            try:
+                print(f"Generating {rows:,} synthetic claims...")
+                generate_sample(path, rows=rows)
+                benchmark(path, workers)
+            finally:
+                os.remove(path)
@@ -15,6 +15,14 @@ class Config:
     
     # Security
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
+    LOGIN_WORKERS = 4  # Threads verifying password hashes
+    LOGIN_QUEUE_SIZE = 64  # Logins allowed to wait for a worker before new ones get 503
+    LOGIN_TIMEOUT = 10  # Seconds a login request waits for its verification
+    LOGIN_RATE_LIMIT_IP = (30, 60)  # Login attempts per client IP per window (seconds)
+    LOGIN_RATE_LIMIT_USER = (5, 300)  # Failed logins per username per window (seconds)
+    CREDENTIAL_CACHE_SIZE = 1024  # Recently verified logins remembered
+    CREDENTIAL_CACHE_TTL = 900  # Seconds a verified login can skip hashing
+    PASSWORD_UPGRADE_INTERVAL = 2  # Seconds between batched password hash upgrades
     
     # Session Configuration
     PERMANENT_SESSION_LIFETIME = timedelta(hours=8)
@@ -31,15 +39,40 @@ class Config:
     DATA_FOLDER = 'data'
     DATASETS_FOLDER = 'data/datasets'
     DASHBOARDS_FOLDER = 'data/dashboards'
-    USERS_FILE = 'data/users.json'
+    USERS_FILE = os.environ.get('USERS_FILE') or 'data/users.json'  # A .db/.sqlite path selects the SQLite store
     
+    # PCHI Claims Data
+    PCHI_CSV_PATH = os.environ.get('PCHI_CSV_PATH') or 'data/uploads/20251024 PCHI Claim summary 2020 - now.csv'
+    PCHI_WATCH_DIR = os.environ.get('PCHI_WATCH_DIR')  # Load the newest matching extract from here instead
+    PCHI_FILE_PATTERN = '*PCHI Claim summary*.csv'
+    PCHI_RELOAD_INTERVAL = 60  # Seconds between checks for a new extract
+    PCHI_RELOAD_SETTLE = 10  # Seconds a new extract must stay unchanged before loading
+    PCHI_DELTA_DIR = os.environ.get('PCHI_DELTA_DIR')  # Merge new/updated claims from delta files found here
+    PCHI_DELTA_PATTERN = '*PCHI Claim delta*.csv'  # Delta files in PCHI_DELTA_DIR, merged in name order
+    PCHI_SNAPSHOT_DIR = os.environ.get('PCHI_SNAPSHOT_DIR', 'data/snapshots')  # Preprocessed, memory-mapped copies of the extract; '' disables
+    PCHI_SNAPSHOT_KEEP = 2  # Snapshots kept on disk (an extract and its Streamlit extra columns are two)
+    PCHI_CATEGORICAL_TEXT = True  # Repeated text columns stay categorical so workers share their codes
+    PCHI_PARTITION_CACHE_MB = 256  # Mapped pay-month partitions kept resident per process; colder ones are paged out
+
     # Chart Configuration
     DEFAULT_CHART_LIMIT = 20
     MAX_CHART_LIMIT = 100
+    SCATTER_MAX_POINTS = 20000  # Points sent for a scatter chart before sampling
+    SCATTER_SEED = 42  # Sampling seed, so a scatter chart shows the same points each time
+    LINE_MAX_POINTS = 1000  # Points kept when a line/area chart is downsampled
+    DASHBOARD_RENDER_WORKERS = 4  # Datasets processed in parallel when rendering a dashboard
     
     # Performance
     CSV_CHUNK_SIZE = 10000  # Rows to process at a time
     PREVIEW_ROWS = 100  # Default rows for preview
+    DATASET_CACHE_MAX_MB = 512  # Memory budget for cached dataset frames
+    PCHI_QUERY_CACHE_SIZE = 256  # Cached PCHI query results
+    PCHI_QUERY_CACHE_TTL = 300  # Seconds a cached PCHI result stays valid
+    PCHI_TABLE_CACHE_SIZE = 32  # Filter/sort combinations whose matching table row ids are kept
+    PCHI_EXPORT_CHUNK_ROWS = 50000  # Rows encoded and sent at a time by the claims export
+    PCHI_PARALLEL_WORKERS = int(os.environ.get('PCHI_PARALLEL_WORKERS', 1))  # Groupby workers; 1 = serial, 0 = one per core
+    PCHI_PARALLEL_BACKEND = 'process'  # 'process' (shared memory, scales with cores) or 'thread'
+    PCHI_PARALLEL_MIN_ROWS = 1000000  # Smaller groupbys stay serial; pool overhead would dominate
     
     # UI Configuration
     APP_NAME = 'DataBoard'
@@ -0,0 +1,103 @@
+"""
+Aggregation Module
+One grouped aggregation path for charts and data APIs: several measures per pass and top-N with an "Other" bucket
+"""
+import numpy as np
+import pandas as pd
+
+
+# Mergeable per-group partials each aggregation is computed from
+PARTIALS = {
+    'sum': ['sum'],
+    'count': ['count'],
+    'size': ['size'],
+    'mean': ['sum', 'count'],
+    'min': ['min'],
+    'max': ['max'],
+}
+
+# How partials of several groups combine into one
+MERGE = {'sum': 'sum', 'count': 'sum', 'size': 'sum', 'min': 'min', 'max': 'max'}
+
+AGGREGATIONS = list(PARTIALS)
+
+
+def measure(column, agg='sum', name=None):
+    """Describe one measure; ``column`` None or '*' with 'count' means count(*)"""
+    if agg not in PARTIALS:
+        raise ValueError(f"Unsupported aggregation: {agg}")
+    if column in (None, '*'):
+        if agg not in ('count', 'size'):
+            raise ValueError(f"{agg}(*) needs a column")
+        column, agg = None, 'size'
+    return {'column': column, 'agg': agg, 'name': name or (f"{agg}({column})" if column else 'count(*)')}
+
+
+def normalize_measures(measures):
+    """Normalize (column, agg[, name]) tuples, dicts or measure() results"""
+    result = []
+    for spec in measures:
+        if isinstance(spec, dict):
+            result.append(measure(spec.get('column'), spec.get('agg', 'sum'), spec.get('name')))
+        else:
+            result.append(measure(*spec))
+    return result
+
+
+def aggregate(df, group_by, measures, sort_by=None, ascending=False, limit=None, other=None):
+    """Aggregate ``measures`` of ``df`` grouped by ``group_by`` in one groupby pass
+
+    Returns a DataFrame indexed by group with one column per measure name.
+    ``sort_by`` is a measure name, or 'index' for group order (the default).
+    With ``limit``, only the first ``limit`` groups after sorting are kept;
+    if ``other`` is a label, the remaining groups are combined into one more
+    row under that label, computed from the same partials so means stay exact.
+    """
+    measures = normalize_measures(measures)
+
+    # Every partial needed by any measure, computed once per group
+    partials = {}
+    for m in measures:
+        for partial in PARTIALS[m['agg']]:
+            partials[(m['column'], partial)] = None
+
+    grouped = df.groupby(group_by, sort=True, observed=True)
+    named = {f"{column}\0{partial}": (column, partial)
+             for column, partial in partials if partial != 'size'}
+    table = grouped.agg(**named) if named else pd.DataFrame(index=grouped.size().index)
+    if (None, 'size') in partials:
+        table["None\0size"] = grouped.size()
+
+    result = _finalize(table, measures)
+
+    if sort_by is not None and sort_by != 'index':
+        # Missing values sort last either way; ties keep group order
+        values = result[sort_by].to_numpy(dtype='float64', na_value=np.nan)
+        order = np.lexsort((np.arange(len(values)), values if ascending else -values))
+        result = result.iloc[order]
+        table = table.iloc[order]
+
+    if limit is not None and len(result) > limit:
+        rest = table.iloc[limit:]
+        result = result.iloc[:limit]
+        if other is not None:
+            merged = pd.DataFrame(
+                {name: [getattr(rest[name], MERGE[name.rsplit('\0', 1)[1]])()] for name in rest.columns},
+                index=pd.Index([other], name=result.index.name)
+            )
+            result = pd.concat([result, _finalize(merged, measures)])
+
+    return result
+
+
+def _finalize(table, measures):
+    """Turn per-group partials into the requested measures"""
+    result = pd.DataFrame(index=table.index)
+    for m in measures:
+        column = m['column']
+        if m['agg'] == 'mean':
+            counts = table[f"{column}\0count"]
+            result[m['name']] = table[f"{column}\0sum"].where(counts > 0) / counts.where(counts > 0)
+        else:
+            result[m['name']] = table[f"{column}\0{m['agg']}"]
+    return result
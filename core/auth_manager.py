@@ -1,26 +1,39 @@
 """
 Authentication Manager
-Handles user authentication with JSON file storage
+Handles user authentication with JSON file or SQLite storage
 """
-import json
+import hmac
 import os
+import threading
+import time
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import hashlib
 
+from core.login_guard import CredentialCache
+from core.user_store import open_user_store
+from config import Config
+
 
 class AuthManager:
     """Manages user authentication and registration"""
     
-    def __init__(self, users_file='data/users.json'):
+    def __init__(self, users_file='data/users.json', upgrade_interval=Config.PASSWORD_UPGRADE_INTERVAL):
+        """Store users in ``users_file``: SQLite for a .db/.sqlite path, JSON otherwise"""
         self.users_file = users_file
+        self.upgrade_interval = upgrade_interval
+        self.credentials = CredentialCache(Config.CREDENTIAL_CACHE_SIZE, Config.CREDENTIAL_CACHE_TTL)
+        self._upgrades = {}
+        self._upgrade_lock = threading.Lock()
+        self._upgrader = None
         self._ensure_file_exists()
     
     def _ensure_file_exists(self):
         """Ensure users file exists"""
-        os.makedirs(os.path.dirname(self.users_file), exist_ok=True)
+        os.makedirs(os.path.dirname(self.users_file) or '.', exist_ok=True)
+        self.store = open_user_store(self.users_file)
 
-        if not os.path.exists(self.users_file):
+        if not self.store.exists():
             # Create with default admin user using simple hash for compatibility
             default_users = {
                 'admin': {
@@ -32,81 +45,88 @@ class AuthManager:
                     'role': 'admin'
                 }
             }
-            self._save_users(default_users)
-    
-    def _load_users(self):
-        """Load users from JSON file"""
-        try:
-            with open(self.users_file, 'r') as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    
-    def _save_users(self, users):
-        """Save users to JSON file"""
-        with open(self.users_file, 'w') as f:
-            json.dump(users, f, indent=2)
+            self.store.add(default_users['admin'])
     
     def authenticate(self, username, password):
-        """Authenticate user with username and password"""
-        users = self._load_users()
+        """Authenticate user with username and password
 
-        user = users.get(username)
+        Legacy plaintext and SHA256 passwords are accepted and queued for an
+        upgrade to pbkdf2, which is written in batches by a background
+        thread rather than during the login.
+        """
+        user = self.store.get(username)
         if user:
             stored_password = user['password']
+            account = {
+                'id': user['id'],
+                'username': user['username'],
+                'email': user.get('email', ''),
+                'role': user.get('role', 'user')
+            }
 
-            # Check 1: Direct plaintext match (for initial admin account)
-            if stored_password == password:
-                # Upgrade to hashed password
-                try:
-                    users[username]['password'] = generate_password_hash(password, method='pbkdf2:sha256')
-                    self._save_users(users)
-                except:
-                    pass
-                return {
-                    'id': user['id'],
-                    'username': user['username'],
-                    'email': user.get('email', ''),
-                    'role': user.get('role', 'user')
-                }
+            # Repeat login with a password verified against this same hash
+            if self.credentials.check(username, password, stored_password):
+                return account
 
+            # Check 1: Direct plaintext match (for initial admin account)
             # Check 2: SHA256 hash match
-            hashed = hashlib.sha256(password.encode()).hexdigest()
-            if stored_password == hashed:
-                # Upgrade to better hash
-                try:
-                    users[username]['password'] = generate_password_hash(password, method='pbkdf2:sha256')
-                    self._save_users(users)
-                except:
-                    pass
-                return {
-                    'id': user['id'],
-                    'username': user['username'],
-                    'email': user.get('email', ''),
-                    'role': user.get('role', 'user')
-                }
+            # (compared as bytes: compare_digest rejects non-ASCII str)
+            stored = stored_password.encode('utf-8')
+            if hmac.compare_digest(stored, password.encode('utf-8')) or \
+                    hmac.compare_digest(stored, hashlib.sha256(password.encode('utf-8')).hexdigest().encode('utf-8')):
+                self._queue_upgrade(username, stored_password, password)
+                self.credentials.remember(username, password, stored_password)
+                return account
 
             # Check 3: Werkzeug password hash
             try:
                 if check_password_hash(stored_password, password):
-                    return {
-                        'id': user['id'],
-                        'username': user['username'],
-                        'email': user.get('email', ''),
-                        'role': user.get('role', 'user')
-                    }
+                    self.credentials.remember(username, password, stored_password)
+                    return account
             except (ValueError, Exception):
                 # Hash format not compatible
                 pass
 
         return None
     
+    def _queue_upgrade(self, username, stored_password, password):
+        """Schedule a legacy password to be rehashed with pbkdf2"""
+        with self._upgrade_lock:
+            self._upgrades[username] = (stored_password, password)
+            if self._upgrader is None:
+                self._upgrader = threading.Thread(target=self._upgrade_loop, name='password-upgrader', daemon=True)
+                self._upgrader.start()
+    
+    def _upgrade_loop(self):
+        """Write queued upgrades every few seconds (runs in the upgrader thread)"""
+        while True:
+            time.sleep(self.upgrade_interval)
+            try:
+                self.flush_upgrades()
+            except Exception:
+                pass
+    
+    def flush_upgrades(self):
+        """Rehash and store every queued legacy password in one batch
+
+        An upgrade is skipped when the stored password changed after it was
+        queued. Returns the number of passwords upgraded.
+        """
+        with self._upgrade_lock:
+            upgrades, self._upgrades = self._upgrades, {}
+        if not upgrades:
+            return 0
+
+        changes = [
+            (username, stored_password, generate_password_hash(password, method='pbkdf2:sha256'))
+            for username, (stored_password, password) in upgrades.items()
+        ]
+        return self.store.update_passwords(changes)
+    
     def register(self, username, password, email=''):
         """Register a new user"""
-        users = self._load_users()
-
         # Check if username already exists
-        if username in users:
+        if self.store.get(username) is not None:
             return False, 'Username already exists'
 
         # Validate username
@@ -126,23 +146,24 @@ class AuthManager:
             # Fallback to simple hash
             hashed_password = hashlib.sha256(password.encode()).hexdigest()
 
-        users[username] = {
+        added = self.store.add({
             'id': user_id,
             'username': username,
             'password': hashed_password,
             'email': email,
             'created_at': datetime.now().isoformat(),
             'role': 'user'
-        }
+        })
 
-        self._save_users(users)
+        # Another worker may have taken the name since the check above
+        if not added:
+            return False, 'Username already exists'
 
         return True, 'User registered successfully'
     
     def get_user(self, username):
         """Get user information (without password)"""
-        users = self._load_users()
-        user = users.get(username)
+        user = self.store.get(username)
         
         if user:
             return {
@@ -157,9 +178,7 @@ class AuthManager:
     
     def update_password(self, username, new_password):
         """Update user password"""
-        users = self._load_users()
-
-        if username not in users:
+        if self.store.get(username) is None:
             return False, 'User not found'
 
         # Use compatible password hashing
@@ -169,7 +188,8 @@ class AuthManager:
             # Fallback to simple hash
             hashed_password = hashlib.sha256(new_password.encode()).hexdigest()
 
-        users[username]['password'] = hashed_password
-        self._save_users(users)
+        if not self.store.update(username, password=hashed_password):
+            return False, 'User not found'
+        self.credentials.forget(username)
 
         return True, 'Password updated successfully'
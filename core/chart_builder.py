@@ -2,8 +2,15 @@
 Chart Builder Module
 Generates chart configurations and data for various visualization types
 """
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 from core.data_processor import DataProcessor
+from core.aggregation import aggregate
+from core.downsample import METHODS as DOWNSAMPLE_METHODS
+from config import Config
 
 
 class ChartBuilder:
@@ -27,8 +34,93 @@ class ChartBuilder:
         if not meta:
             raise ValueError("Dataset not found")
         
-        # Load data
-        df = pd.read_csv(meta['filepath'])
+        # Load only the columns (and for tables, the rows) the chart needs
+        if chart_type == 'table':
+            df = self._load_table(meta, config)
+        else:
+            df = self.data_processor.load_dataframe(meta, columns=self._chart_columns(config))
+        
+        return self._build_chart(df, chart_type, config)
+    
+    def render_widgets(self, user_id, widgets):
+        """Build the charts of several widgets, loading each dataset once
+
+        ``widgets`` are dicts with ``id``, ``dataset_id``, ``chart_type`` and
+        ``config``. Widgets are grouped by dataset; each dataset's columns
+        for all its charts are loaded in one read and datasets are processed
+        in parallel. A failing widget reports its error without affecting
+        the others. Returns per-widget charts and timings in input order,
+        plus each dataset's load time.
+        """
+        # Results are matched to widgets by position, so missing or repeated ids never collide
+        by_dataset = {}
+        for index, widget in enumerate(widgets):
+            by_dataset.setdefault(widget.get('dataset_id'), []).append(index)
+        
+        rendered = [None] * len(widgets)
+        datasets = {}
+        if by_dataset:
+            workers = min(Config.DASHBOARD_RENDER_WORKERS, len(by_dataset))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render') as pool:
+                for dataset_id, load_ms, results in pool.map(
+                        lambda item: self._render_dataset(user_id, item[0], [widgets[i] for i in item[1]]),
+                        by_dataset.items()):
+                    datasets[dataset_id] = {'load_ms': load_ms, 'widgets': len(results)}
+                    for index, result in zip(by_dataset[dataset_id], results):
+                        rendered[index] = result
+        
+        return {
+            'widgets': rendered,
+            'datasets': datasets
+        }
+    
+    def _render_dataset(self, user_id, dataset_id, widgets):
+        """Build every widget of one dataset from a single load"""
+        start = time.perf_counter()
+        meta = self.data_processor.get_dataset_info(dataset_id, user_id)
+        if not meta:
+            return dataset_id, 0.0, [{'id': widget.get('id'), 'error': 'Dataset not found', 'ms': 0.0}
+                                     for widget in widgets]
+        
+        # Columns a widget names but the dataset lacks fail that widget alone, below
+        available = {col['name'] for col in meta.get('columns_info', [])}
+        columns = []
+        for widget in widgets:
+            if widget.get('chart_type') != 'table':
+                columns += [col for col in self._chart_columns(widget.get('config') or {}) if col in available]
+        try:
+            df = self.data_processor.load_dataframe(meta, columns=list(dict.fromkeys(columns))) if columns else None
+        except Exception as e:
+            return dataset_id, 0.0, [{'id': widget.get('id'), 'error': str(e), 'ms': 0.0} for widget in widgets]
+        load_ms = round((time.perf_counter() - start) * 1000, 1)
+        
+        results = []
+        for widget in widgets:
+            start = time.perf_counter()
+            chart_type = widget.get('chart_type')
+            config = widget.get('config') or {}
+            try:
+                if chart_type not in self.supported_charts:
+                    raise ValueError(f"Unsupported chart type: {chart_type}")
+                frame = self._load_table(meta, config) if chart_type == 'table' else df
+                result = {'id': widget.get('id'), 'chart': self._build_chart(frame, chart_type, config)}
+            except Exception as e:
+                result = {'id': widget.get('id'), 'error': str(e)}
+            result['ms'] = round((time.perf_counter() - start) * 1000, 1)
+            results.append(result)
+        
+        return dataset_id, load_ms, results
+    
+    def _chart_columns(self, config):
+        """Columns a non-table chart reads"""
+        return [col for col in (config.get('x_column'), config.get('y_column')) if col]
+    
+    def _load_table(self, meta, config):
+        """Load the rows and columns a table widget shows"""
+        return self.data_processor.load_dataframe(meta, columns=config.get('columns'), nrows=config.get('limit', 50))
+    
+    def _build_chart(self, df, chart_type, config):
+        """Compute a chart's data from a loaded frame"""
         
         # Extract configuration
         x_column = config.get('x_column')
@@ -36,22 +128,31 @@ class ChartBuilder:
         agg_function = config.get('aggregation', 'sum')
         limit = config.get('limit', 50)
         sort_by = config.get('sort_by', 'value')
-        
-        if chart_type == 'table':
-            return self._create_table(df, config, limit)
+        # Groups beyond the limit are combined into one "Other" item when requested
+        other_label = 'Other' if config.get('other') else None
         
         # Prepare data based on chart type
-        if chart_type in ['bar', 'horizontal_bar', 'line', 'area']:
+        if chart_type == 'table':
+            chart_data = self._create_table(df, config, limit)
+        elif chart_type in ['line', 'area'] and config.get('downsample'):
+            # Point budget for a whole series, instead of the top `limit` categories
+            max_points = min(int(config.get('max_points', Config.LINE_MAX_POINTS)), Config.LINE_MAX_POINTS)
+            chart_data = self._create_series_chart(
+                df, x_column, y_column, agg_function, config['downsample'], max_points
+            )
+        elif chart_type in ['bar', 'horizontal_bar', 'line', 'area']:
             chart_data = self._create_categorical_chart(
-                df, x_column, y_column, agg_function, limit, sort_by
+                df, x_column, y_column, agg_function, limit, sort_by, other_label
             )
         elif chart_type in ['pie', 'doughnut']:
             chart_data = self._create_pie_chart(
-                df, x_column, y_column, agg_function, limit
+                df, x_column, y_column, agg_function, limit, other_label
             )
         elif chart_type == 'scatter':
+            # Point budget is separate from the category limit, which is far smaller
+            max_points = min(int(config.get('max_points', Config.SCATTER_MAX_POINTS)), Config.SCATTER_MAX_POINTS)
             chart_data = self._create_scatter_chart(
-                df, x_column, y_column, limit
+                df, x_column, y_column, max_points, config.get('seed', Config.SCATTER_SEED)
             )
         else:
             raise ValueError(f"Chart type {chart_type} not implemented")
@@ -62,34 +163,20 @@ class ChartBuilder:
             'config': config
         }
     
-    def _create_categorical_chart(self, df, x_column, y_column, agg_func, limit, sort_by):
+    def _create_categorical_chart(self, df, x_column, y_column, agg_func, limit, sort_by, other=None):
         """Create data for bar, line, and area charts"""
         
         if not x_column or not y_column:
             raise ValueError("Both x_column and y_column are required")
         
-        # Aggregate data
-        if agg_func == 'sum':
-            grouped = df.groupby(x_column)[y_column].sum()
-        elif agg_func == 'mean':
-            grouped = df.groupby(x_column)[y_column].mean()
-        elif agg_func == 'count':
-            grouped = df.groupby(x_column)[y_column].count()
-        elif agg_func == 'min':
-            grouped = df.groupby(x_column)[y_column].min()
-        elif agg_func == 'max':
-            grouped = df.groupby(x_column)[y_column].max()
-        else:
-            grouped = df.groupby(x_column)[y_column].sum()
-        
-        # Sort
-        if sort_by == 'value':
-            grouped = grouped.sort_values(ascending=False)
-        else:
-            grouped = grouped.sort_index()
+        if agg_func not in ['sum', 'mean', 'count', 'min', 'max']:
+            agg_func = 'sum'
         
-        # Limit results
-        grouped = grouped.head(limit)
+        # Sort by value (largest first) or by category, keep the top `limit`
+        grouped = aggregate(
+            df, x_column, [(y_column, agg_func, 'value')],
+            sort_by='value' if sort_by == 'value' else 'index', limit=limit, other=other
+        )['value']
         
         return {
             'labels': [str(label) for label in grouped.index.tolist()],
@@ -98,53 +185,91 @@ class ChartBuilder:
             'y_label': y_column
         }
     
-    def _create_pie_chart(self, df, category_column, value_column, agg_func, limit):
+    def _create_series_chart(self, df, x_column, y_column, agg_func, method, max_points):
+        """Create data for line and area charts over a whole series
+
+        The series is aggregated per x value and kept in x order; when it is
+        longer than ``max_points`` it is downsampled with ``method`` ('lttb'
+        or 'minmax') so the payload stays bounded however long the data is.
+        """
+        
+        if not x_column or not y_column:
+            raise ValueError("Both x_column and y_column are required")
+        if method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"Unsupported downsampling method: {method}")
+        
+        if agg_func not in ['sum', 'mean', 'count', 'min', 'max']:
+            agg_func = 'sum'
+        grouped = aggregate(df, x_column, [(y_column, agg_func, 'value')])['value']
+        values = grouped.to_numpy(dtype='float64', na_value=np.nan)
+        values = np.where(np.isnan(values), 0.0, values)
+        
+        # Numeric and date x values keep their spacing; anything else is evenly spaced
+        index = grouped.index
+        if pd.api.types.is_datetime64_any_dtype(index):
+            positions = index.asi8.astype('float64')
+        elif pd.api.types.is_numeric_dtype(index):
+            positions = index.to_numpy(dtype='float64')
+        else:
+            positions = np.arange(len(index), dtype='float64')
+        
+        keep = DOWNSAMPLE_METHODS[method](positions, values, max_points)
+        
+        return {
+            'labels': [str(label) for label in index[keep].tolist()],
+            'values': values[keep].tolist(),
+            'total_points': len(grouped),
+            'downsampled': len(keep) < len(grouped),
+            'x_label': x_column,
+            'y_label': y_column
+        }
+    
+    def _create_pie_chart(self, df, category_column, value_column, agg_func, limit, other=None):
         """Create data for pie and doughnut charts"""
         
         if not category_column:
             raise ValueError("category_column is required for pie charts")
         
-        if value_column:
-            # Aggregate by category
-            if agg_func == 'count':
-                grouped = df.groupby(category_column).size()
-            else:
-                grouped = df.groupby(category_column)[value_column].sum()
+        # Sum by category, or just count occurrences
+        if value_column and agg_func != 'count':
+            spec = (value_column, 'sum', 'value')
         else:
-            # Just count occurrences
-            grouped = df[category_column].value_counts()
+            spec = ('*', 'count', 'value')
         
         # Sort and limit
-        grouped = grouped.sort_values(ascending=False).head(limit)
+        grouped = aggregate(df, category_column, [spec], sort_by='value', limit=limit, other=other)['value']
         
         return {
             'labels': [str(label) for label in grouped.index.tolist()],
             'values': [float(val) if pd.notna(val) else 0 for val in grouped.values.tolist()]
         }
     
-    def _create_scatter_chart(self, df, x_column, y_column, limit):
-        """Create data for scatter charts"""
+    def _create_scatter_chart(self, df, x_column, y_column, max_points, seed):
+        """Create data for scatter charts
+
+        Rows missing either value are dropped first; if more than
+        ``max_points`` remain, a seeded sample keeps the same points on
+        every render, in their original row order.
+        """
         
         if not x_column or not y_column:
             raise ValueError("Both x_column and y_column are required for scatter charts")
         
-        # Sample data if too large
-        if len(df) > limit:
-            df_sample = df.sample(n=limit)
-        else:
-            df_sample = df
+        # Non-numeric values cannot be plotted and are treated as missing
+        x = pd.to_numeric(df[x_column], errors='coerce').to_numpy(dtype='float64')
+        y = pd.to_numeric(df[y_column], errors='coerce').to_numpy(dtype='float64')
+        valid = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+        total = len(valid)
         
-        # Remove rows with null values in either column
-        df_clean = df_sample[[x_column, y_column]].dropna()
+        # Sample data if too large
+        if total > max_points:
+            rng = np.random.default_rng(seed)
+            valid = np.sort(rng.choice(valid, size=max_points, replace=False))
         
         return {
-            'data': [
-                {
-                    'x': float(row[x_column]) if pd.notna(row[x_column]) else 0,
-                    'y': float(row[y_column]) if pd.notna(row[y_column]) else 0
-                }
-                for _, row in df_clean.iterrows()
-            ],
+            'data': [{'x': px, 'y': py} for px, py in zip(x[valid].tolist(), y[valid].tolist())],
+            'total_points': total,
+            'sampled': total > max_points,
             'x_label': x_column,
             'y_label': y_column
         }
@@ -0,0 +1,129 @@
+"""
+Claims Export Module
+Stream filtered claims rows as CSV, gzip-compressed CSV or Parquet, one chunk of rows at a time
+"""
+import zlib
+
+import pandas as pd
+
+from config import Config
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+# Download formats: media type and file extension
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def available_formats():
+    """Get the export formats usable in this installation (Parquet needs pyarrow)"""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != 'parquet' or pq is not None]
+
+
+def iter_frames(df, positions, columns, chunk_rows=None, touch=None):
+    """Yield the rows at ``positions`` (None = all rows) in frames of ``chunk_rows`` rows
+
+    ``touch`` is called with each chunk's rows (positions, or a slice of all
+    rows) before they are read.
+    """
+    chunk_rows = chunk_rows or Config.PCHI_EXPORT_CHUNK_ROWS
+    total = len(df) if positions is None else len(positions)
+    for start in range(0, max(total, 1), chunk_rows):
+        rows = slice(start, start + chunk_rows) if positions is None else positions[start:start + chunk_rows]
+        if touch is not None:
+            touch(rows)
+        if positions is None:
+            yield pd.DataFrame({col: df[col].iloc[rows] for col in columns})
+        else:
+            yield pd.DataFrame({col: df[col].take(rows) for col in columns})
+
+
+def iter_csv(frames):
+    """Encode frames as one CSV document, header first"""
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header, date_format='%Y-%m-%d').encode('utf-8')
+        header = False
+
+
+def iter_gzip(chunks, level=6):
+    """Gzip-compress a stream of byte chunks"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink:
+    """Write-only file object that hands what was written back in pieces"""
+
+    def __init__(self):
+        self.pieces = []
+        self.closed = False
+
+    def write(self, data):
+        self.pieces.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.pieces)
+        self.pieces = []
+        return data
+
+
+def iter_parquet(frames):
+    """Encode frames as one Parquet file, one row group per frame"""
+    if pq is None:
+        raise ValueError("Parquet export needs pyarrow, which is not installed")
+
+    sink = _ChunkSink()
+    writer = None
+    for frame in frames:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            # Text columns that are empty in the first chunk are still text
+            schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                for field in table.schema])
+            writer = pq.ParquetWriter(sink, schema)
+        writer.write_table(table.cast(writer.schema))
+        data = sink.drain()
+        if data:
+            yield data
+    if writer is not None:
+        writer.close()
+    yield sink.drain()
+
+
+def export_stream(df, positions, columns, fmt='csv', chunk_rows=None, touch=None):
+    """Get a generator of the export file's bytes
+
+    Rows are taken from ``df`` in chunks and encoded as they are sent, so at
+    most one chunk of rows is held in memory whatever the size of the export.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt == 'parquet' and pq is None:
+        raise ValueError("Parquet export needs pyarrow, which is not installed")
+
+    frames = iter_frames(df, positions, columns, chunk_rows, touch)
+    if fmt == 'parquet':
+        return iter_parquet(frames)
+    if fmt == 'csv.gz':
+        return iter_gzip(iter_csv(frames))
+    return iter_csv(frames)
@@ -0,0 +1,147 @@
+"""
+Claims Table Module
+Paged, sortable views of the claims rows with matching row ids cached per filter set
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from core.query_cache import canonical_filters
+
+
+class ClaimsTable:
+    """Pages of display columns for any filter set and sort order
+
+    Only the rows of the requested page are copied and formatted. The row
+    positions matching a filter set are cached in sorted order, so turning
+    the page is a slice; each column's sort order over all rows is computed
+    once, on the first request sorted by it, and a filtered sort is then a
+    pass over that order instead of a new sort. With ``partitions`` the
+    partitions holding the rows read are marked as used. Unsorted rows, and
+    ties in a sort, come in frame order, or in ``order_by`` column order.
+    """
+
+    def __init__(self, df, filter_index, columns, max_entries=None, partitions=None, order_by=None):
+        self.df = df
+        self.filter_index = filter_index
+        self.partitions = partitions
+        self.order_by = order_by if order_by in df.columns else None
+        self.columns = [col for col in columns if col in df.columns]
+        self.max_entries = max_entries or Config.PCHI_TABLE_CACHE_SIZE
+        self._orders = {}
+        self._positions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def page(self, filters=None, page=1, page_size=100, sort_by=None, ascending=True):
+        """Get one page of the table, sorted by a display column if ``sort_by`` is given"""
+        if sort_by is not None and sort_by not in self.columns:
+            raise ValueError(f"Cannot sort by column: {sort_by}")
+        ascending = bool(ascending)
+
+        positions = self.positions(filters, sort_by, ascending)
+        total = len(self.df) if positions is None else len(positions)
+
+        start_idx = (page - 1) * page_size
+        end_idx = start_idx + page_size
+        if positions is None:
+            rows = np.arange(max(start_idx, 0), min(max(end_idx, 0), total))
+        else:
+            rows = positions[start_idx:end_idx]
+        if self.partitions is not None:
+            self.partitions.touch(rows)
+
+        # Take the page rows column by column; only those rows are ever copied
+        df_page = pd.DataFrame({col: self.df[col].take(rows) for col in self.columns})
+
+        # Convert dates to strings
+        for col in df_page.columns:
+            if pd.api.types.is_datetime64_any_dtype(df_page[col]):
+                df_page[col] = df_page[col].dt.strftime('%Y-%m-%d')
+
+        return {
+            'columns': list(self.columns),
+            'data': df_page.astype(object).fillna('').values.tolist(),
+            'total_records': total,
+            'page': page,
+            'page_size': page_size,
+            'total_pages': (total + page_size - 1) // page_size,
+            'sort_by': sort_by,
+            'ascending': ascending
+        }
+
+    def positions(self, filters=None, sort_by=None, ascending=True):
+        """Get the matching row positions in display order, or None for every row in frame order"""
+        key = (canonical_filters(filters), sort_by, bool(ascending) or sort_by is None)
+        if key == ((), None, True) and self.order_by is None:
+            return None
+
+        with self._lock:
+            positions = self._positions.get(key)
+            if positions is not None:
+                self._positions.move_to_end(key)
+                self.hits += 1
+                return positions
+            self.misses += 1
+
+        mask = self.filter_index.mask(filters) if self.filter_index is not None else None
+        if sort_by is None and self.order_by is None:
+            positions = np.flatnonzero(mask) if mask is not None else np.arange(len(self.df))
+        else:
+            order = self._sort_order(sort_by, ascending) if sort_by is not None else self._sort_order(self.order_by, True)
+            positions = order[mask[order]] if mask is not None else order
+
+        with self._lock:
+            self._positions[key] = positions
+            self._positions.move_to_end(key)
+            while len(self._positions) > self.max_entries:
+                self._positions.popitem(last=False)
+        return positions
+
+    def _sort_order(self, column, ascending):
+        """Get every row position ordered by ``column``, computed on first use
+
+        Missing values sort last in both directions and ties keep the
+        default order, so pages stay stable between requests.
+        """
+        with self._lock:
+            order = self._orders.get((column, ascending))
+        if order is not None:
+            return order
+
+        values = self.df[column]
+        if self.partitions is not None:
+            self.partitions.touch()
+        try:
+            codes, uniques = pd.factorize(values, sort=True)
+        except TypeError:
+            # Mixed types in an object column sort by their text
+            codes, uniques = pd.factorize(values.astype(str).where(values.notna()), sort=True)
+
+        missing = codes < 0
+        keys = codes if ascending else -codes
+        keys = np.where(missing, len(uniques), keys)
+        dtype = np.int32 if len(values) < 2 ** 31 else np.int64
+        if self.order_by is not None and column != self.order_by:
+            default = self._sort_order(self.order_by, True)
+            order = default[np.argsort(keys[default], kind='stable')].astype(dtype)
+        else:
+            order = np.argsort(keys, kind='stable').astype(dtype)
+
+        with self._lock:
+            return self._orders.setdefault((column, ascending), order)
+
+    def stats(self):
+        """Get cache counters"""
+        with self._lock:
+            return {
+                'entries': len(self._positions),
+                'max_entries': self.max_entries,
+                'sort_orders': len(self._orders),
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,392 @@
+"""
+Column Store Module
+Typed binary copies of datasets for fast, column-pruned loading
+"""
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+
+class ColumnStore:
+    """Stores a DataFrame as one raw binary file per column plus a JSON schema"""
+
+    SCHEMA_FILE = 'schema.json'
+
+    def __init__(self, path):
+        self.path = path
+        self._schema = None
+
+    def exists(self):
+        """Check whether a complete copy has been written"""
+        return os.path.exists(os.path.join(self.path, self.SCHEMA_FILE))
+
+    def schema(self):
+        """Load the store schema (column names, kinds and dtypes)"""
+        if self._schema is None:
+            with open(os.path.join(self.path, self.SCHEMA_FILE), 'r') as f:
+                self._schema = json.load(f)
+        return self._schema
+
+    def columns(self):
+        """Get column names in their original order"""
+        return [entry['name'] for entry in self.schema()['columns']]
+
+    def write(self, df):
+        """Write a DataFrame, replacing any previous copy atomically"""
+        writer = self.writer()
+        try:
+            writer.append(df)
+            writer.close()
+        except Exception:
+            writer.abort()
+            raise
+
+    def writer(self):
+        """Start a chunked write that replaces this store when closed"""
+        return ColumnStoreWriter(self)
+
+    def read(self, columns=None, nrows=None, mmap=False, categorical=False):
+        """Read selected columns back into a DataFrame
+
+        Only the files of the requested columns are touched. With ``mmap`` the
+        numeric columns are memory-mapped read-only instead of copied, and with
+        ``categorical`` string columns stay as pandas categoricals.
+        """
+        schema = self.schema()
+        entries = {entry['name']: entry for entry in schema['columns']}
+
+        if columns is None:
+            columns = [entry['name'] for entry in schema['columns']]
+
+        rows = schema['rows'] if nrows is None else min(int(nrows), schema['rows'])
+
+        data = {}
+        for col in dict.fromkeys(columns):
+            if col not in entries:
+                raise KeyError(f"Column not found: {col}")
+            data[col] = self._read_column(entries[col], schema['rows'], rows, mmap, categorical)
+
+        return pd.DataFrame(data, columns=list(data.keys()), copy=False)
+
+    def _read_column(self, entry, total_rows, rows, mmap, categorical):
+        """Read a single column as a numpy array or categorical"""
+        filepath = os.path.join(self.path, entry['file'])
+        storage_dtype = 'int64' if entry['kind'] == 'datetime' else entry['dtype']
+
+        if rows == 0:
+            array = np.empty(0, dtype=storage_dtype)
+        elif mmap:
+            array = np.memmap(filepath, dtype=storage_dtype, mode='r', shape=(total_rows,))[:rows]
+        else:
+            array = np.fromfile(filepath, dtype=storage_dtype, count=rows)
+
+        if entry['kind'] == 'datetime':
+            return array.view(entry['dtype'])
+
+        if entry['kind'] == 'category':
+            with open(os.path.join(self.path, entry['categories_file']), 'r') as f:
+                categories = json.load(f)
+
+            if categorical:
+                return pd.Categorical.from_codes(array, categories=pd.Index(categories))
+
+            # Decode with a trailing NaN slot so missing values (code -1) map to NaN
+            lookup = np.empty(len(categories) + 1, dtype=object)
+            lookup[:len(categories)] = categories
+            lookup[-1] = np.nan
+            return lookup[array]
+
+        return array
+
+
+class ColumnStoreWriter:
+    """Builds a column store from DataFrame chunks; nothing is visible until close()
+
+    Each chunk is encoded and appended to the column files, so memory stays
+    bounded by the chunk size plus the category labels seen so far. Integer
+    columns that meet missing values or floats in a later chunk are promoted
+    to float64, as ``pd.read_csv`` would type the whole file. Columns whose
+    chunks cannot be reconciled (e.g. numbers in one chunk, text in another)
+    are reported in ``mixed`` and must be rewritten with ``rewrite()`` before
+    closing.
+    """
+
+    # Values converted at a time when a column file is promoted to a wider dtype
+    BLOCK_ROWS = 1 << 20
+
+    # Chunk labels are merged into the column dictionary once this many are pending
+    MERGE_LABELS = 1 << 16
+
+    def __init__(self, store):
+        self.store = store
+        self.tmp_path = f"{store.path}.tmp"
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+        self.rows = 0
+        self.columns = {}
+        self.mixed = []
+
+    def append(self, df):
+        """Append a chunk; every chunk must have the same columns"""
+        for col in df.columns:
+            state = self.columns.get(col)
+            if state is None:
+                if self.rows:
+                    raise ValueError(f"Column not in the first chunk: {col}")
+                state = self._new_state(col, len(self.columns))
+                self.columns[col] = state
+            if col not in self.mixed:
+                self._append_column(state, df[col])
+        self.rows += len(df)
+
+    def rewrite(self, name, chunks):
+        """Replace the values of one column with a new sequence of Series chunks"""
+        state = self._new_state(name, self.columns[name]['position'])
+        self.columns[name] = state
+        open(self._file(state), 'wb').close()
+        for series in chunks:
+            self._append_column(state, series)
+        if name in self.mixed:
+            self.mixed.remove(name)
+
+    def close(self):
+        """Write the schema and replace the previous copy atomically"""
+        if self.mixed:
+            raise ValueError(f"Columns have mixed types: {', '.join(map(str, self.mixed))}")
+
+        entries = []
+        for state in self.columns.values():
+            if state['kind'] is None:
+                # Only missing values were seen: pd.read_csv types these as float64
+                self._init_state(state, 'numeric', 'float64')
+            if state['rows'] != self.rows:
+                raise ValueError(f"Column {state['entry']['name']} has {state['rows']} of {self.rows} rows")
+            if state['kind'] == 'category':
+                self._finish_categories(state)
+            entries.append(state['entry'])
+
+        schema = {
+            'version': 1,
+            'rows': self.rows,
+            'columns': entries
+        }
+        with open(os.path.join(self.tmp_path, ColumnStore.SCHEMA_FILE), 'w') as f:
+            json.dump(schema, f)
+
+        shutil.rmtree(self.store.path, ignore_errors=True)
+        os.replace(self.tmp_path, self.store.path)
+        self.store._schema = schema
+
+    def abort(self):
+        """Discard a partially written copy"""
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+    def _new_state(self, name, position):
+        return {
+            'entry': {'name': name, 'file': f"{position}.bin"},
+            'position': position,
+            'kind': None,
+            'rows': 0,
+            'pending': 0,
+            'chunks': [],
+            'categories': np.empty(0, dtype=object),
+            'unmerged': 0
+        }
+
+    def _file(self, state):
+        return os.path.join(self.tmp_path, state['entry']['file'])
+
+    def _init_state(self, state, kind, dtype):
+        """Fix the kind of a column once its first typed chunk arrives"""
+        state['kind'] = kind
+        state['entry']['kind'] = kind
+        state['entry']['dtype'] = dtype
+        pending, state['pending'] = state['pending'], 0
+        self._write(state, _missing(kind, dtype, pending))
+
+    def _append_column(self, state, series):
+        """Encode one chunk of a column and append it to the column file"""
+        if len(series) == 0:
+            return
+
+        kind, dtype, array, labels = _encode(series)
+        all_missing = _all_missing(kind, array)
+        name = state['entry']['name']
+
+        if state['kind'] is None:
+            if all_missing and kind == 'numeric':
+                # An empty stretch says nothing about the column type yet
+                state['pending'] += len(series)
+                return
+            if state['pending'] and kind == 'numeric' and np.dtype(dtype).kind in 'biu':
+                # Earlier missing values: booleans become text, integers become floats
+                if np.dtype(dtype).kind == 'b':
+                    self.mixed.append(name)
+                    return
+                self._init_state(state, kind, 'float64')
+            else:
+                self._init_state(state, kind, dtype)
+
+        current = state['entry']['dtype']
+        if all_missing and (kind, dtype) != (state['kind'], current):
+            if state['kind'] == 'numeric' and np.dtype(current).kind == 'b':
+                self.mixed.append(name)
+                return
+            if state['kind'] == 'numeric' and np.dtype(current).kind in 'iu':
+                self._promote(state, 'float64')
+            kind, dtype, labels = state['kind'], state['entry']['dtype'], []
+            array = _missing(kind, dtype, len(series))
+
+        if kind != state['kind'] or (kind == 'datetime' and dtype != current):
+            self.mixed.append(name)
+            return
+
+        if kind == 'numeric' and dtype != current:
+            if 'b' in (np.dtype(dtype).kind, np.dtype(current).kind):
+                self.mixed.append(name)
+                return
+            merged = str(np.promote_types(dtype, current))
+            if merged != current:
+                self._promote(state, merged)
+            array = array.astype(merged)
+
+        self._write(state, array, labels)
+
+    def _write(self, state, array, labels=None):
+        """Append encoded values; category codes stay chunk-local until close()"""
+        with open(self._file(state), 'ab') as f:
+            np.ascontiguousarray(array).tofile(f)
+        state['rows'] += len(array)
+        if state['kind'] == 'category':
+            labels = _object_array(labels if labels is not None else [])
+            state['chunks'].append({'rows': len(array), 'labels': labels, 'codes': None})
+            state['unmerged'] += len(labels)
+            if state['unmerged'] >= max(self.MERGE_LABELS, len(state['categories'])):
+                self._merge_labels(state)
+
+    def _merge_labels(self, state):
+        """Fold pending chunk labels into the column dictionary
+
+        Labels repeated across chunks are kept once; each chunk keeps only the
+        mapping from its local codes to dictionary codes. The dictionary goes
+        first in the factorized array, so existing codes never change.
+        """
+        pending = [chunk for chunk in state['chunks'] if chunk['codes'] is None]
+        merged, uniques = pd.factorize(np.concatenate([state['categories']] + [chunk['labels'] for chunk in pending]))
+
+        offset = len(state['categories'])
+        for chunk in pending:
+            chunk['codes'] = merged[offset:offset + len(chunk['labels'])].astype('int32')
+            chunk['labels'] = None
+            offset += len(chunk['codes'])
+
+        state['categories'] = _object_array(uniques)
+        state['unmerged'] = 0
+
+    def _promote(self, state, dtype):
+        """Rewrite a numeric column file with a wider dtype, a block at a time"""
+        source = self._file(state)
+        target = f"{source}.promote"
+        current = state['entry']['dtype']
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            while True:
+                block = np.fromfile(src, dtype=current, count=self.BLOCK_ROWS)
+                if len(block) == 0:
+                    break
+                block.astype(dtype).tofile(dst)
+        os.replace(target, source)
+        state['entry']['dtype'] = dtype
+
+    def _finish_categories(self, state):
+        """Rewrite chunk-local codes as dictionary codes and write the category labels
+
+        Labels keep the order in which they first appear, as ``pd.factorize``
+        over the whole column would.
+        """
+        self._merge_labels(state)
+        chunks = state['chunks']
+        entry = state['entry']
+
+        # Codes are stored as narrow as pandas keeps them, so memory-mapped
+        # reads become categoricals without a copy
+        dtype = _code_dtype(len(state['categories']))
+
+        # A single chunk is already encoded against its own labels
+        if len(chunks) > 1 or dtype != entry['dtype']:
+            source = self._file(state)
+            target = f"{source}.merge"
+            with open(source, 'rb') as src, open(target, 'wb') as dst:
+                for chunk in chunks:
+                    codes = np.fromfile(src, dtype='int32', count=chunk['rows'])
+                    if len(chunks) > 1:
+                        # The trailing -1 slot keeps missing values missing
+                        codes = np.append(chunk['codes'], np.int32(-1))[codes]
+                    codes.astype(dtype).tofile(dst)
+            os.replace(target, source)
+            entry['dtype'] = dtype
+
+        entry['categories_file'] = f"{state['position']}.cats.json"
+        with open(os.path.join(self.tmp_path, entry['categories_file']), 'w') as f:
+            f.write(json.dumps(state['categories'].tolist(), default=str))
+
+
+def _encode(series):
+    """Encode a Series as (kind, dtype, storage array, category labels)"""
+    values = series.array
+
+    if pd.api.types.is_datetime64_any_dtype(series) and getattr(series.dt, 'tz', None) is None:
+        array = series.to_numpy()
+        return 'datetime', str(array.dtype), array.view('int64'), None
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return 'category', 'int32', series.cat.codes.to_numpy().astype('int32'), series.cat.categories.tolist()
+
+    if pd.api.types.is_bool_dtype(series) and not isinstance(values, pd.arrays.BooleanArray):
+        return 'numeric', 'bool', series.to_numpy(), None
+
+    if pd.api.types.is_numeric_dtype(series):
+        if pd.api.types.is_extension_array_dtype(series):
+            array = series.to_numpy(dtype='float64', na_value=np.nan)
+        else:
+            array = series.to_numpy()
+        return 'numeric', str(array.dtype), array, None
+
+    codes, uniques = pd.factorize(series)
+    return 'category', 'int32', codes.astype('int32'), uniques.tolist()
+
+
+def _code_dtype(categories):
+    """Narrowest code dtype pandas uses for a categorical with this many categories"""
+    for dtype in ('int8', 'int16', 'int32'):
+        if categories < np.iinfo(dtype).max:
+            return dtype
+    return 'int64'
+
+
+def _object_array(values):
+    """Copy a list of labels into a 1-d object array"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _all_missing(kind, array):
+    """Check whether every value of an encoded chunk is missing"""
+    if kind == 'category':
+        return bool((array < 0).all())
+    if kind == 'datetime':
+        return bool((array == np.iinfo('int64').min).all())
+    if array.dtype.kind == 'f':
+        return bool(np.isnan(array).all())
+    return False
+
+
+def _missing(kind, dtype, rows):
+    """Storage values for ``rows`` missing entries of a column"""
+    if kind == 'category':
+        return np.full(rows, -1, dtype='int32')
+    if kind == 'datetime':
+        return np.full(rows, np.iinfo('int64').min, dtype='int64')
+    return np.full(rows, np.nan, dtype=dtype)
@@ -0,0 +1,185 @@
+"""
+CSV Profiler Module
+Streaming per-column statistics merged from chunks, with bounded memory
+"""
+import numpy as np
+import pandas as pd
+
+
+class HyperLogLog:
+    """Approximate distinct counter (about 0.8% standard error at the default precision)"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values):
+        """Add an array of values (hashed with pandas' stable value hashing)"""
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_array(np.asarray(values, dtype=object), categorize=False)
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        rest = hashes & np.uint64((1 << width) - 1)
+
+        # Rank = position of the leftmost 1-bit in the remaining bits; they fit
+        # a float64 mantissa exactly, so frexp gives their bit length
+        rank = width - np.frexp(rest.astype(np.float64))[1] + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        """Fold another counter of the same precision into this one"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        """Estimate the number of distinct values added"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+
+        return int(round(estimate))
+
+
+class HeavyHitters:
+    """Mergeable Misra-Gries summary of the most frequent values
+
+    Keeps at most ``capacity`` counters. While fewer distinct values than
+    that have been seen the counts are exact; after that every count is a
+    lower bound within ``error`` of the true count.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.values = np.empty(0, dtype=object)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.error = 0
+
+    @property
+    def exact(self):
+        """Whether no counter has ever been dropped"""
+        return self.error == 0
+
+    def update(self, values, counts):
+        """Merge distinct ``values`` seen ``counts`` times (e.g. one chunk's tallies)"""
+        if len(self.values):
+            codes, values = pd.factorize(np.concatenate([self.values, values]))
+            counts = np.bincount(codes, weights=np.concatenate([self.counts, counts])).astype(np.int64)
+
+        if len(counts) > self.capacity:
+            # Subtract the (capacity + 1)-th largest count and drop what reaches zero
+            cutoff = int(np.partition(counts, len(counts) - self.capacity - 1)[len(counts) - self.capacity - 1])
+            keep = counts > cutoff
+            values, counts = values[keep], counts[keep] - cutoff
+            self.error += cutoff
+
+        self.values = np.asarray(values, dtype=object)
+        self.counts = np.asarray(counts, dtype=np.int64)
+
+    def top(self, n=10):
+        """Get the ``n`` most frequent values as a dict"""
+        order = np.argsort(-self.counts, kind='stable')[:n]
+        return {self.values[i]: int(self.counts[i]) for i in order}
+
+
+class ColumnProfile:
+    """Running statistics for one column"""
+
+    def __init__(self, name):
+        self.name = name
+        self.null_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.distinct = None
+        self.frequent = None
+
+    def add(self, series):
+        """Fold one chunk of the column into the statistics"""
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.dropna()
+            self.null_count += len(series) - len(values)
+            if len(values):
+                low, high = values.min(), values.max()
+                self.min = low if self.min is None else min(self.min, low)
+                self.max = high if self.max is None else max(self.max, high)
+                self.sum += float(values.sum())
+                self.count += len(values)
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            self.null_count += int(series.isna().sum())
+        else:
+            if self.distinct is None:
+                self.distinct = HyperLogLog()
+                self.frequent = HeavyHitters()
+            codes, uniques = pd.factorize(series)
+            present = codes[codes >= 0]
+            self.null_count += len(codes) - len(present)
+            uniques = np.asarray(uniques, dtype=object)
+            self.distinct.add(uniques)
+            self.frequent.update(uniques, np.bincount(present, minlength=len(uniques)))
+
+    def info(self, dtype):
+        """Build the column summary stored in the dataset metadata"""
+        if np.dtype(dtype).kind in 'iufb':
+            col_type = 'numeric'
+            stats = {
+                'min': float(self.min) if self.min is not None else None,
+                'max': float(self.max) if self.max is not None else None,
+                'mean': self.sum / self.count if self.count else None,
+            }
+        elif np.dtype(dtype).kind == 'M':
+            col_type = 'datetime'
+            stats = {}
+        else:
+            col_type = 'categorical'
+            if self.frequent is None:
+                unique_values = 0
+            elif self.frequent.exact:
+                unique_values = len(self.frequent.values)
+            else:
+                unique_values = self.distinct.count()
+            stats = {
+                'unique_count': int(unique_values),
+                'top_values': self.frequent.top(10) if self.frequent is not None and unique_values < 1000 else {}
+            }
+
+        return {
+            'name': self.name,
+            'type': col_type,
+            'dtype': dtype,
+            'null_count': self.null_count,
+            'stats': stats
+        }
+
+
+class CSVProfiler:
+    """Profiles a CSV chunk by chunk: exact min/max/mean/null counts, sketched
+    distinct counts (HyperLogLog) and top values (Misra-Gries)"""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def add(self, chunk):
+        """Fold one DataFrame chunk into the column profiles"""
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(col)
+            self.columns[col].add(chunk[col])
+        self.rows += len(chunk)
+
+    def reset_column(self, name):
+        """Forget a column's statistics so it can be profiled again"""
+        self.columns[name] = ColumnProfile(name)
+
+    def add_column(self, name, series):
+        """Fold one chunk of a single, re-read column into its profile"""
+        self.columns[name].add(series)
+
+    def columns_info(self, dtypes):
+        """Get the per-column summaries given each column's final dtype"""
+        return [profile.info(dtypes[name]) for name, profile in self.columns.items()]
@@ -8,6 +8,13 @@ import os
 from datetime import datetime
 import hashlib
 
+from core.aggregation import aggregate, normalize_measures
+from core.column_store import ColumnStore
+from core.csv_profiler import CSVProfiler
+from core.dataset_catalog import DatasetCatalog
+from core.dataset_cache import dataset_cache
+from config import Config
+
 
 class DataProcessor:
     """Handles all data processing operations"""
@@ -15,48 +22,26 @@ class DataProcessor:
     def __init__(self):
         self.datasets_path = 'data/datasets'
         os.makedirs(self.datasets_path, exist_ok=True)
+        self._catalog = None
+    
+    @property
+    def catalog(self):
+        """Metadata index for the current datasets directory"""
+        if self._catalog is None or self._catalog.datasets_path != self.datasets_path:
+            self._catalog = DatasetCatalog(self.datasets_path)
+        return self._catalog
     
     def process_csv(self, filepath, user_id, filename):
         """Process uploaded CSV file and extract metadata"""
         try:
-            # Read CSV with efficient memory usage
-            df = pd.read_csv(filepath, low_memory=False)
-            
             # Generate dataset ID
             dataset_id = hashlib.md5(f"{user_id}_{filename}_{datetime.now()}".encode()).hexdigest()[:16]
             
-            # Analyze columns
-            columns_info = []
-            for col in df.columns:
-                col_data = df[col]
-                dtype = str(col_data.dtype)
-                
-                # Determine column type
-                if pd.api.types.is_numeric_dtype(col_data):
-                    col_type = 'numeric'
-                    stats = {
-                        'min': float(col_data.min()) if not pd.isna(col_data.min()) else None,
-                        'max': float(col_data.max()) if not pd.isna(col_data.max()) else None,
-                        'mean': float(col_data.mean()) if not pd.isna(col_data.mean()) else None,
-                    }
-                elif pd.api.types.is_datetime64_any_dtype(col_data):
-                    col_type = 'datetime'
-                    stats = {}
-                else:
-                    col_type = 'categorical'
-                    unique_values = col_data.nunique()
-                    stats = {
-                        'unique_count': int(unique_values),
-                        'top_values': col_data.value_counts().head(10).to_dict() if unique_values < 1000 else {}
-                    }
-                
-                columns_info.append({
-                    'name': col,
-                    'type': col_type,
-                    'dtype': dtype,
-                    'null_count': int(col_data.isnull().sum()),
-                    'stats': stats
-                })
+            # Stream the file once: profile each chunk and append it to the columnar copy
+            columnar_path = self._columnar_path(dataset_id)
+            profiler = CSVProfiler()
+            store = self._write_columnar(filepath, ColumnStore(columnar_path), profiler)
+            columns_info = profiler.columns_info(self._column_dtypes(store))
             
             # Create dataset metadata
             dataset_meta = {
@@ -64,8 +49,9 @@ class DataProcessor:
                 'user_id': user_id,
                 'filename': filename,
                 'filepath': filepath,
-                'rows': len(df),
-                'columns': len(df.columns),
+                'columnar_path': columnar_path,
+                'rows': profiler.rows,
+                'columns': len(columns_info),
                 'columns_info': columns_info,
                 'created_at': datetime.now().isoformat(),
                 'size_mb': os.path.getsize(filepath) / (1024 * 1024)
@@ -75,42 +61,94 @@ class DataProcessor:
             meta_file = os.path.join(self.datasets_path, f"{dataset_id}.json")
             with open(meta_file, 'w') as f:
                 json.dump(dataset_meta, f, indent=2)
+            self.catalog.add(dataset_meta)
             
             return dataset_meta
         
         except Exception as e:
             raise Exception(f"Error processing CSV: {str(e)}")
     
+    def load_dataframe(self, meta, columns=None, nrows=None):
+        """Load dataset rows, serving repeated requests from the shared dataset cache"""
+        store = ColumnStore(meta.get('columnar_path') or self._columnar_path(meta['id']))
+        
+        # Datasets uploaded before the columnar copy existed are converted once
+        if not store.exists():
+            self._write_columnar(meta['filepath'], store)
+        
+        if columns is None:
+            columns = store.columns()
+        version = os.path.getmtime(os.path.join(store.path, ColumnStore.SCHEMA_FILE))
+        
+        # Row-limited reads (previews, tables) are cheap and not worth caching
+        if nrows is not None:
+            df = dataset_cache.get(meta['id'], version, columns)
+            if df is not None:
+                return df.head(nrows)
+            return store.read(columns=columns, nrows=nrows)
+        
+        return dataset_cache.get(meta['id'], version, columns,
+                                 loader=lambda missing: store.read(columns=missing))
+    
+    def _write_columnar(self, filepath, store, profiler=None):
+        """Convert a CSV into a column store chunk by chunk, profiling it on the way
+
+        Columns whose chunks disagree on type (numbers in one, text in another)
+        are read again as text, matching how a full ``pd.read_csv`` types them.
+        """
+        writer = store.writer()
+        try:
+            for chunk in pd.read_csv(filepath, chunksize=Config.CSV_CHUNK_SIZE):
+                writer.append(chunk)
+                if profiler is not None:
+                    profiler.add(chunk)
+            
+            for col in list(writer.mixed):
+                if profiler is not None:
+                    profiler.reset_column(col)
+                writer.rewrite(col, self._text_chunks(filepath, col, profiler))
+            
+            writer.close()
+        except Exception:
+            writer.abort()
+            raise
+        
+        return store
+    
+    def _text_chunks(self, filepath, col, profiler=None):
+        """Yield one column of a CSV as text, chunk by chunk"""
+        for chunk in pd.read_csv(filepath, usecols=[col], dtype=str, chunksize=Config.CSV_CHUNK_SIZE):
+            if profiler is not None:
+                profiler.add_column(col, chunk[col])
+            yield chunk[col]
+    
+    def _column_dtypes(self, store):
+        """Get each column's pandas dtype name as a full pd.read_csv would report it"""
+        return {
+            entry['name']: 'object' if entry['kind'] == 'category' else entry['dtype']
+            for entry in store.schema()['columns']
+        }
+    
+    def _columnar_path(self, dataset_id):
+        """Get the directory holding the columnar copy of a dataset"""
+        return os.path.join(self.datasets_path, f"{dataset_id}.cols")
+    
     def get_user_datasets(self, user_id):
         """Get all datasets for a specific user"""
-        datasets = []
-        
-        for filename in os.listdir(self.datasets_path):
-            if filename.endswith('.json'):
-                filepath = os.path.join(self.datasets_path, filename)
-                with open(filepath, 'r') as f:
-                    meta = json.load(f)
-                    if meta.get('user_id') == user_id:
-                        datasets.append({
-                            'id': meta['id'],
-                            'filename': meta['filename'],
-                            'rows': meta['rows'],
-                            'columns': meta['columns'],
-                            'created_at': meta['created_at'],
-                            'size_mb': round(meta['size_mb'], 2)
-                        })
-        
-        return sorted(datasets, key=lambda x: x['created_at'], reverse=True)
+        datasets = self.catalog.list_user(user_id)
+        for dataset in datasets:
+            dataset['size_mb'] = round(dataset['size_mb'], 2)
+        return datasets
     
     def get_dataset_info(self, dataset_id, user_id):
         """Get detailed information about a dataset"""
-        meta_file = os.path.join(self.datasets_path, f"{dataset_id}.json")
+        if self.catalog.owner(dataset_id) != user_id:
+            return None
         
+        meta_file = os.path.join(self.datasets_path, f"{dataset_id}.json")
         if os.path.exists(meta_file):
             with open(meta_file, 'r') as f:
-                meta = json.load(f)
-                if meta.get('user_id') == user_id:
-                    return meta
+                return json.load(f)
         
         return None
     
@@ -122,7 +160,7 @@ class DataProcessor:
             return None
         
         try:
-            df = pd.read_csv(meta['filepath'], nrows=rows)
+            df = self.load_dataframe(meta, nrows=rows)
             
             # Convert to JSON-serializable format
             data = df.to_dict('records')
@@ -145,39 +183,39 @@ class DataProcessor:
             return None
         
         try:
-            df = pd.read_csv(meta['filepath'], usecols=[column_name])
+            df = self.load_dataframe(meta, columns=[column_name])
             return df[column_name].tolist()
         
         except Exception as e:
             return None
     
-    def aggregate_data(self, dataset_id, user_id, group_by, value_column, agg_func='sum'):
-        """Aggregate data by group"""
+    def aggregate_data(self, dataset_id, user_id, group_by, value_column=None, agg_func='sum',
+                       measures=None, sort_by=None, limit=None, other=None):
+        """Aggregate data by group
+
+        Either one ``value_column``/``agg_func`` pair, or several ``measures``
+        given as (column, agg) pairs, e.g. [('APPROVED', 'sum'), ('*', 'count'),
+        ('INCURRED', 'mean')], all computed in one grouped pass. ``sort_by``,
+        ``limit`` and ``other`` select the top groups as in ``aggregate``.
+        """
         meta = self.get_dataset_info(dataset_id, user_id)
         
         if not meta:
             return None
         
         try:
-            df = pd.read_csv(meta['filepath'])
+            if measures is None:
+                measures = [(value_column, agg_func)]
+            measures = normalize_measures(measures)
             
-            # Perform aggregation
-            if agg_func == 'sum':
-                result = df.groupby(group_by)[value_column].sum()
-            elif agg_func == 'mean':
-                result = df.groupby(group_by)[value_column].mean()
-            elif agg_func == 'count':
-                result = df.groupby(group_by)[value_column].count()
-            elif agg_func == 'min':
-                result = df.groupby(group_by)[value_column].min()
-            elif agg_func == 'max':
-                result = df.groupby(group_by)[value_column].max()
-            else:
-                return None
+            columns = [group_by] + [m['column'] for m in measures if m['column'] and m['column'] != group_by]
+            df = self.load_dataframe(meta, columns=list(dict.fromkeys(columns)))
+            result = aggregate(df, group_by, measures, sort_by=sort_by, limit=limit, other=other)
             
             return {
                 'labels': result.index.tolist(),
-                'values': result.values.tolist()
+                'values': result.iloc[:, 0].tolist(),
+                'measures': {name: result[name].tolist() for name in result.columns}
             }
         
         except Exception as e:
@@ -0,0 +1,120 @@
+"""
+Dataset Cache Module
+Process-wide in-memory cache of loaded dataset columns with LRU eviction
+"""
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+from config import Config
+
+
+class DatasetCache:
+    """LRU cache of dataset columns keyed by dataset id and file version"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, dataset_id, version, columns, loader=None):
+        """Get the requested columns of a dataset as a DataFrame
+
+        ``version`` is the modification time of the stored copy; an entry with
+        a different version is discarded. Missing columns are loaded through
+        ``loader(columns)`` and cached. Without a loader a miss returns None.
+        """
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is not None and entry['version'] != version:
+                self._remove(dataset_id)
+                entry = None
+
+            missing = [col for col in columns if entry is None or col not in entry['columns']]
+            if not missing:
+                self._entries.move_to_end(dataset_id)
+                self.hits += 1
+                return self._frame(entry['columns'], columns)
+
+            self.misses += 1
+            present = {} if entry is None else dict(entry['columns'])
+
+        if loader is None:
+            return None
+
+        loaded = loader(missing)
+        with self._lock:
+            self._store(dataset_id, version, loaded)
+
+        present.update({col: loaded[col] for col in loaded.columns})
+        return self._frame(present, columns)
+
+    def invalidate(self, dataset_id):
+        """Drop a dataset from the cache"""
+        with self._lock:
+            if dataset_id in self._entries:
+                self._remove(dataset_id)
+
+    def clear(self):
+        """Drop every cached dataset"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Get cache counters and memory usage"""
+        with self._lock:
+            return {
+                'datasets': len(self._entries),
+                'size_mb': round(self.current_bytes / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def _frame(self, cached_columns, columns):
+        """Build a DataFrame over cached columns without copying them"""
+        names = list(dict.fromkeys(columns))
+        return pd.DataFrame({col: cached_columns[col] for col in names}, columns=names, copy=False)
+
+    def _store(self, dataset_id, version, df):
+        """Merge loaded columns into the cache and evict down to the budget"""
+        size = int(df.memory_usage(index=False, deep=True).sum())
+        entry = self._entries.get(dataset_id)
+
+        if entry is not None and entry['version'] != version:
+            self._remove(dataset_id)
+            entry = None
+
+        existing = entry['size'] if entry is not None else 0
+        if existing + size > self.max_bytes:
+            return
+
+        if entry is None:
+            entry = {'version': version, 'columns': {}, 'size': 0}
+            self._entries[dataset_id] = entry
+
+        for col in df.columns:
+            entry['columns'][col] = df[col]
+        entry['size'] += size
+        self.current_bytes += size
+        self._entries.move_to_end(dataset_id)
+
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, dataset_id):
+        """Remove an entry and release its accounted memory"""
+        entry = self._entries.pop(dataset_id)
+        self.current_bytes -= entry['size']
+
+
+# Shared by every DataProcessor and ChartBuilder in the process
+dataset_cache = DatasetCache(Config.DATASET_CACHE_MAX_MB * 1024 * 1024)
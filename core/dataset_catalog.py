@@ -0,0 +1,104 @@
+"""
+Dataset Catalog Module
+SQLite index of dataset metadata for per-user listings and ownership lookups
+"""
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+
+class DatasetCatalog:
+    """Indexed summary rows for every dataset metadata JSON file
+
+    The JSON files stay the source of truth; the catalog only holds the
+    fields needed to list and authorize datasets, and can be rebuilt from
+    the files at any time.
+    """
+
+    FILENAME = 'catalog.db'
+
+    # Summary fields, in table column order
+    FIELDS = ['id', 'user_id', 'filename', 'rows', 'columns', 'created_at', 'size_mb']
+
+    INSERT = ('INSERT OR REPLACE INTO datasets (id, user_id, filename, "rows", "columns", created_at, size_mb) '
+              'VALUES (?, ?, ?, ?, ?, ?, ?)')
+
+    def __init__(self, datasets_path):
+        self.datasets_path = datasets_path
+        self.path = os.path.join(datasets_path, self.FILENAME)
+
+        is_new = not os.path.exists(self.path)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS datasets (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    filename TEXT,
+                    "rows" INTEGER,
+                    "columns" INTEGER,
+                    created_at TEXT,
+                    size_mb REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS datasets_user ON datasets (user_id, created_at)")
+
+        # Datasets uploaded before the catalog existed are indexed once
+        if is_new:
+            self.rebuild()
+
+    def _connect(self):
+        # Listings read while uploads and deletes write from other threads; the 30s timeout
+        # waits out another worker's write instead of failing the listing
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, meta):
+        """Index (or re-index) one dataset's metadata"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(self.INSERT, [meta.get(field) for field in self.FIELDS])
+
+    def remove(self, dataset_id):
+        """Drop a dataset from the index"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM datasets WHERE id = ?", (dataset_id,))
+
+    def list_user(self, user_id):
+        """Get a user's dataset summaries, newest first"""
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                'SELECT id, filename, "rows", "columns", created_at, size_mb FROM datasets '
+                'WHERE user_id = ? ORDER BY created_at DESC',
+                (user_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def owner(self, dataset_id):
+        """Get the user id owning a dataset, or None if it is not indexed"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT user_id FROM datasets WHERE id = ?", (dataset_id,)).fetchone()
+        return row[0] if row else None
+
+    def rebuild(self):
+        """Re-index every metadata JSON file in the datasets directory
+
+        Returns the number of datasets indexed. Unreadable files are skipped.
+        """
+        entries = []
+        for filename in os.listdir(self.datasets_path):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.datasets_path, filename), 'r') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if meta.get('id') and meta.get('user_id') is not None:
+                entries.append([meta.get(field) for field in self.FIELDS])
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM datasets")
+            conn.executemany(self.INSERT, entries)
+
+        return len(entries)
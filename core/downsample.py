@@ -0,0 +1,72 @@
+"""
+Downsample Module
+Reduce long series to a fixed number of visually faithful points for line charts
+"""
+import numpy as np
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: pick ``n_out`` points that keep the series' shape
+
+    The first and last points are always kept. The rest are split into
+    ``n_out - 2`` equal buckets, and from each the point forming the largest
+    triangle with the previously kept point and the next bucket's average is
+    kept. ``x`` must be increasing. Returns the kept positions in x order.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 1)], dtype=np.intp)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def min_max(y, n_out):
+    """Keep the minimum and maximum of each of ``n_out // 2`` equal buckets
+
+    Preserves every peak and trough at the bucket resolution, at the cost of
+    less even spacing than LTTB. With ``n_out`` below 2 only the maximum is
+    kept. Returns the kept positions in x order.
+    """
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 2:
+        return np.array([np.argmax(y)], dtype=np.intp)
+
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(np.intp)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        low = start + int(np.argmin(y[start:end]))
+        high = start + int(np.argmax(y[start:end]))
+        selected.extend(sorted({low, high}))
+    return np.array(selected, dtype=np.intp)
+
+
+# Methods selectable from a chart config
+METHODS = {
+    'lttb': lambda x, y, n_out: lttb(x, y, n_out),
+    'minmax': lambda x, y, n_out: min_max(y, n_out),
+}
@@ -0,0 +1,154 @@
+"""
+Filter Index Module
+Categorical codes and packed row bitmaps for fast multi-dimension filtering
+"""
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """Precomputed per-dimension codes and bitmaps over a fixed set of rows"""
+
+    # Dimensions with at most this many values get one packed bitmap per value
+    MAX_BITMAP_VALUES = 32
+
+    def __init__(self, df, dimensions):
+        """Index ``dimensions`` (filter key -> column name) of a DataFrame"""
+        self.rows = len(df)
+        self.dimensions = {}
+
+        for key, column in dimensions.items():
+            if column not in df.columns:
+                continue
+
+            codes, values = pd.factorize(df[column], sort=True)
+            codes = codes.astype(np.int32)
+            dimension = {
+                'column': column,
+                'codes': codes,
+                'values': pd.Index(values),
+                'not_null': np.packbits(codes >= 0) if (codes < 0).any() else None
+            }
+
+            if len(values) <= self.MAX_BITMAP_VALUES:
+                dimension['bitmaps'] = [np.packbits(codes == code) for code in range(len(values))]
+
+            self.dimensions[key] = dimension
+
+    def with_rows(self, df, positions):
+        """Get an index of ``df``, a copy of the indexed frame where only ``positions`` changed
+
+        ``positions`` holds the rows whose values were replaced and the rows
+        appended after the old last row. Only those rows are factorized; the
+        codes and bitmaps of every other row are copied. Values not seen
+        before are added after the existing ones, so existing codes keep
+        their meaning.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        index = FilterIndex.__new__(FilterIndex)
+        index.rows = len(df)
+        index.dimensions = {}
+
+        for key, dimension in self.dimensions.items():
+            incoming = pd.Index(np.asarray(df[dimension['column']].take(positions), dtype=object))
+            values = dimension['values']
+            new_values = incoming[values.get_indexer(incoming) < 0].dropna().unique()
+            if len(new_values):
+                values = values.append(new_values)
+            row_codes = values.get_indexer(incoming).astype(np.int32)
+
+            codes = np.empty(len(df), dtype=np.int32)
+            codes[:self.rows] = dimension['codes']
+            codes[positions] = row_codes
+
+            not_null = dimension['not_null']
+            if not_null is not None:
+                not_null = _extend_bits(not_null, len(df))
+                _assign_bits(not_null, positions, row_codes >= 0)
+            elif (row_codes < 0).any():
+                not_null = np.packbits(codes >= 0)
+            extended = {'column': dimension['column'], 'codes': codes, 'values': values, 'not_null': not_null}
+
+            bitmaps = dimension.get('bitmaps')
+            if bitmaps is not None and len(values) <= self.MAX_BITMAP_VALUES:
+                extended['bitmaps'] = []
+                for code in range(len(values)):
+                    bitmap = _extend_bits(bitmaps[code] if code < len(bitmaps) else None, len(df))
+                    _assign_bits(bitmap, positions, row_codes == code)
+                    extended['bitmaps'].append(bitmap)
+
+            index.dimensions[key] = extended
+
+        return index
+
+    def mask(self, filters):
+        """Get a boolean row mask for the filters, or None when nothing is filtered
+
+        Each filter keeps rows whose value is in the selected list, matching
+        ``Series.isin``; filters on different dimensions are ANDed together.
+        """
+        packed = None
+
+        for key, dimension in self.dimensions.items():
+            selected = filters.get(key) if filters else None
+            if not selected:
+                continue
+
+            bitmap = self._dimension_bitmap(dimension, selected)
+            if bitmap is None:
+                continue
+
+            if packed is None:
+                packed = bitmap.copy()
+            else:
+                np.bitwise_and(packed, bitmap, out=packed)
+
+        if packed is None:
+            return None
+
+        return np.unpackbits(packed, count=self.rows).view(bool)
+
+    def positions(self, filters):
+        """Get the row positions matching the filters"""
+        mask = self.mask(filters)
+        if mask is None:
+            return np.arange(self.rows)
+        return np.flatnonzero(mask)
+
+    def _dimension_bitmap(self, dimension, selected):
+        """Get the packed bitmap of rows matching any selected value, or None for all rows"""
+        values = dimension['values']
+        selected_codes = values.get_indexer(pd.Index(list(selected)))
+        selected_codes = np.unique(selected_codes[selected_codes >= 0])
+
+        # Selecting every value only drops missing values
+        if len(selected_codes) == len(values):
+            return dimension['not_null']
+
+        bitmaps = dimension.get('bitmaps')
+        if bitmaps is not None and len(selected_codes) <= len(values) // 2:
+            packed = np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+            for code in selected_codes:
+                np.bitwise_or(packed, bitmaps[code], out=packed)
+            return packed
+
+        # Lookup table over the codes; the extra trailing slot catches missing values (-1)
+        lookup = np.zeros(len(values) + 1, dtype=bool)
+        lookup[selected_codes] = True
+        return np.packbits(lookup[dimension['codes']])
+
+
+def _extend_bits(packed, rows):
+    """Copy a packed bitmap into one sized for ``rows`` rows; the new rows start unset"""
+    extended = np.zeros((rows + 7) // 8, dtype=np.uint8)
+    if packed is not None:
+        extended[:len(packed)] = packed
+    return extended
+
+
+def _assign_bits(packed, positions, bits):
+    """Set the bits of a packed bitmap at ``positions`` to ``bits``"""
+    offsets = positions >> 3
+    masks = (0x80 >> (positions & 7)).astype(np.uint8)
+    np.bitwise_and.at(packed, offsets, ~masks)
+    np.bitwise_or.at(packed, offsets[bits], masks[bits])
@@ -0,0 +1,163 @@
+"""
+Login Guard Module
+Bounded password verification pool, login rate limiting and a verified-credential cache
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+
+class LoginPool:
+    """Fixed set of worker threads for password hashing with a bounded queue
+
+    pbkdf2 runs in OpenSSL without holding the GIL, so the workers hash in
+    parallel while request threads only wait. When ``max_queue`` logins are
+    already waiting, new ones are refused instead of piling up.
+    """
+
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login')
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+    def submit(self, fn, *args):
+        """Queue ``fn(*args)``; returns a Future, or None when the queue is full"""
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.rejected += 1
+                return None
+            self.pending += 1
+
+        return self._executor.submit(self._run, time.monotonic(), fn, args)
+
+    def _run(self, queued_at, fn, args):
+        with self._lock:
+            self.pending -= 1
+            self.running += 1
+            self.wait_seconds += time.monotonic() - queued_at
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def stats(self):
+        """Get queue depth and throughput counters"""
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                'workers': self.workers,
+                'queue_depth': self.pending,
+                'max_queue': self.max_queue,
+                'running': self.running,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.wait_seconds / started * 1000, 1) if started else 0.0
+            }
+
+
+class RateLimiter:
+    """Sliding-window limit of ``max_attempts`` per key every ``window_seconds``"""
+
+    def __init__(self, max_attempts, window_seconds):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        """Get the key's attempts inside the window (call with the lock held)"""
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return None
+        while attempts and attempts[0] <= now - self.window_seconds:
+            attempts.popleft()
+        if not attempts:
+            del self._attempts[key]
+            return None
+        return attempts
+
+    def retry_after(self, key):
+        """Seconds until ``key`` may try again, or 0 if it is under the limit"""
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._recent(key, now)
+            if attempts is None or len(attempts) < self.max_attempts:
+                return 0
+            return max(1, int(attempts[0] + self.window_seconds - now + 1))
+
+    def add(self, key):
+        """Record an attempt for ``key``"""
+        now = time.monotonic()
+        with self._lock:
+            # Sweep idle keys now and then so one-off clients do not accumulate
+            if len(self._attempts) > 10000:
+                for stale in list(self._attempts):
+                    self._recent(stale, now)
+            self._attempts.setdefault(key, deque()).append(now)
+
+    def reset(self, key):
+        """Forget the attempts recorded for ``key``"""
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+class CredentialCache:
+    """Recently verified logins, so repeat logins skip the slow password hash
+
+    Only an HMAC of (username, stored hash, password) under a per-process
+    random key is kept. Including the stored hash means a password change
+    invalidates the entry without any explicit eviction.
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._key = secrets.token_bytes(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _digest(self, username, password, stored_hash):
+        message = '\0'.join([username, stored_hash, password]).encode()
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def check(self, username, password, stored_hash):
+        """Whether this password was verified against this stored hash recently"""
+        with self._lock:
+            entry = self._entries.get(username)
+        if entry is None or entry[1] <= time.monotonic():
+            return False
+        return hmac.compare_digest(entry[0], self._digest(username, password, stored_hash))
+
+    def remember(self, username, password, stored_hash):
+        """Record a successful verification"""
+        digest = self._digest(username, password, stored_hash)
+        with self._lock:
+            self._entries[username] = (digest, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, username):
+        """Drop a user's cached verification"""
+        with self._lock:
+            self._entries.pop(username, None)
+
+
+# Shared by the login and registration endpoints in the process
+login_pool = LoginPool(Config.LOGIN_WORKERS, Config.LOGIN_QUEUE_SIZE)
+ip_limiter = RateLimiter(*Config.LOGIN_RATE_LIMIT_IP)
+user_limiter = RateLimiter(*Config.LOGIN_RATE_LIMIT_USER)
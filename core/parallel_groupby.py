@@ -0,0 +1,221 @@
+"""
+Parallel Groupby Module
+Grouped count/sum/min/max over row chunks in a worker pool, merged from partial aggregates
+"""
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from config import Config
+
+
+# How partial aggregates of row chunks combine
+MERGE = {
+    'sum': np.add,
+    'count': np.add,
+    'min': np.fmin,
+    'max': np.fmax,
+}
+
+
+def partial_aggregate(codes, n_groups, values, ops):
+    """Aggregate one chunk of rows
+
+    ``codes`` are group numbers (negative = no group), ``values`` a 2-D
+    float64 array with one column per entry of ``ops``, fastest in column
+    (Fortran) order so each column is read contiguously. NaN values are
+    skipped. Returns an ``(n_groups, len(ops))`` float64 array; groups with
+    no values get 0 for sum/count and NaN for min/max.
+    """
+    keep = codes >= 0
+    if not keep.all():
+        codes, values = codes[keep], values[keep]
+
+    result = np.empty((n_groups, len(ops)), dtype=np.float64)
+    for j, op in enumerate(ops):
+        column = values[:, j]
+        if op == 'sum':
+            totals = np.bincount(codes, weights=column, minlength=n_groups)
+            if np.isnan(totals).any():
+                totals = np.bincount(codes, weights=np.where(np.isnan(column), 0.0, column), minlength=n_groups)
+            result[:, j] = totals
+        elif op == 'count':
+            result[:, j] = np.bincount(codes, weights=~np.isnan(column), minlength=n_groups)
+        else:
+            present = ~np.isnan(column)
+            out = np.full(n_groups, np.inf if op == 'min' else -np.inf)
+            (np.minimum if op == 'min' else np.maximum).at(out, codes[present], column[present])
+            out[np.isinf(out)] = np.nan
+            result[:, j] = out
+    return result
+
+
+# Shared blocks a worker process has attached, by role ('codes'/'values')
+_attached = {}
+
+
+def _attach(role, name):
+    """Map a shared block in a worker, reusing the mapping while the block stays the same"""
+    block = _attached.get(role)
+    if block is None or block.name != name:
+        if block is not None:
+            block.close()
+        block = _attached[role] = shared_memory.SharedMemory(name=name)
+    return block
+
+
+def _shared_chunk(codes_name, values_name, rows, columns, start, stop, n_groups, ops):
+    """Aggregate rows ``start:stop`` of the shared arrays (runs in a worker process)"""
+    codes = np.ndarray(rows, dtype=np.int64, buffer=_attach('codes', codes_name).buf)
+    values = np.ndarray((rows, columns), dtype=np.float64, buffer=_attach('values', values_name).buf, order='F')
+    return partial_aggregate(codes[start:stop], n_groups, values[start:stop], ops)
+
+
+def _columns(values):
+    """Get the columns of a DataFrame, a 2-D array or a 1-D array (one column)"""
+    if hasattr(values, 'columns'):
+        return [values.iloc[:, j].to_numpy() for j in range(values.shape[1])]
+    values = np.asarray(values)
+    return [values] if values.ndim == 1 else [values[:, j] for j in range(values.shape[1])]
+
+
+def _column_major(values, out=None):
+    """Get ``values`` as a float64 array with contiguous columns, written into ``out`` if given"""
+    columns = _columns(values)
+    if out is None:
+        out = np.empty((len(columns[0]) if columns else 0, len(columns)), dtype=np.float64, order='F')
+    for j, column in enumerate(columns):
+        out[:, j] = column
+    return out
+
+
+class GroupAggregator:
+    """Runs grouped aggregations serially or split across a worker pool
+
+    With ``workers`` > 1 and at least ``min_rows`` rows, the rows are cut
+    into one contiguous chunk per worker, each chunk is aggregated on its
+    own and the partial results are merged. The 'process' backend shares
+    the arrays with worker processes through shared memory and scales with
+    cores; the 'thread' backend avoids process start-up but only overlaps
+    work where numpy releases the GIL.
+
+    The shared blocks are kept between calls (sized for the largest one
+    so far) because filling fresh memory costs several times more than
+    filling memory already mapped; ``shutdown`` releases them.
+    """
+
+    def __init__(self, workers=1, backend='process', min_rows=0):
+        if backend not in ('process', 'thread'):
+            raise ValueError(f"Unsupported parallel backend: {backend}")
+        self.workers = max(int(workers or 1), 1)
+        self.backend = backend
+        self.min_rows = min_rows
+        self._pool = None
+        self._blocks = {}
+        self._lock = threading.Lock()
+        self._shared_lock = threading.Lock()
+
+    def is_parallel(self, rows):
+        """Whether an aggregation over ``rows`` rows is split across workers"""
+        return self.workers > 1 and rows >= max(self.min_rows, self.workers)
+
+    def aggregate(self, codes, n_groups, values, ops):
+        """Aggregate the columns of ``values`` per group (see ``partial_aggregate``)
+
+        ``values`` may be a 2-D array, a DataFrame or, for one op, a 1-D array.
+        """
+        codes = np.ascontiguousarray(codes, dtype=np.int64)
+        if not self.is_parallel(len(codes)):
+            return partial_aggregate(codes, n_groups, _column_major(values), ops)
+
+        edges = np.linspace(0, len(codes), self.workers + 1).astype(np.intp)
+        chunks = list(zip(edges[:-1], edges[1:]))
+        pool = self._get_pool()
+
+        if self.backend == 'thread':
+            values = _column_major(values)
+            partials = list(pool.map(
+                lambda chunk: partial_aggregate(codes[chunk[0]:chunk[1]], n_groups, values[chunk[0]:chunk[1]], ops),
+                chunks
+            ))
+        else:
+            # One aggregation at a time owns the shared blocks; each already uses every worker
+            with self._shared_lock:
+                rows, columns = len(codes), len(ops)
+                codes_block = self._shared_block('codes', rows * 8)
+                values_block = self._shared_block('values', rows * columns * 8)
+                np.ndarray(rows, dtype=np.int64, buffer=codes_block.buf)[...] = codes
+                _column_major(values, np.ndarray((rows, columns), dtype=np.float64,
+                                                 buffer=values_block.buf, order='F'))
+
+                try:
+                    futures = [pool.submit(_shared_chunk, codes_block.name, values_block.name, rows, columns,
+                                           start, stop, n_groups, ops)
+                               for start, stop in chunks]
+                    partials = [future.result() for future in futures]
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed for memory); answer serially and start a fresh pool next time
+                    with self._lock:
+                        self._pool = None
+                    pool.shutdown(wait=False)
+                    return partial_aggregate(codes, n_groups, _column_major(values), ops)
+
+        result = partials[0]
+        for partial in partials[1:]:
+            for j, op in enumerate(ops):
+                result[:, j] = MERGE[op](result[:, j], partial[:, j])
+        return result
+
+    def sums(self, codes, n_groups, values):
+        """Sum every column of ``values`` per group"""
+        return self.aggregate(codes, n_groups, values, ['sum'] * len(_columns(values)))
+
+    def _shared_block(self, role, size):
+        """Get the shared block for ``role`` with at least ``size`` bytes (call with the shared lock held)"""
+        block = self._blocks.get(role)
+        if block is None or block.size < size:
+            if block is not None:
+                block.close()
+                block.unlink()
+            block = self._blocks[role] = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        return block
+
+    def _get_pool(self):
+        """Start the worker pool on first use"""
+        with self._lock:
+            if self._pool is None:
+                if self.backend == 'thread':
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='groupby')
+                else:
+                    # Spawned workers do not inherit the server's threads and locks
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context('spawn'))
+            return self._pool
+
+    def shutdown(self):
+        """Stop the worker pool and release the shared blocks"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+        with self._shared_lock:
+            for block in self._blocks.values():
+                block.close()
+                block.unlink()
+            self._blocks = {}
+
+
+def default_workers():
+    """Configured worker count; 0 means one per available core"""
+    if Config.PCHI_PARALLEL_WORKERS:
+        return Config.PCHI_PARALLEL_WORKERS
+    return len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+
+
+# Shared by the PCHI cube build and panel queries answered from the claims frame
+group_aggregator = GroupAggregator(default_workers(), Config.PCHI_PARALLEL_BACKEND, Config.PCHI_PARALLEL_MIN_ROWS)
+atexit.register(group_aggregator.shutdown)
@@ -2,66 +2,583 @@
 PCHI Claims Analyzer
 Backend module for analyzing PCHI insurance claims data
 """
+import copy
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import json
 
+from config import Config
+
+from core.claims_export import export_stream
+from core.claims_table import ClaimsTable
+from core.filter_index import FilterIndex
+from core.pchi_cube import ClaimsCube, FrameTotals, AGE_LABELS, PANEL_KEYS, RATIO_METRICS, has_group_key, ratio_metrics
+from core.pchi_partitions import ClaimsPartitions
+from core.pchi_snapshot import ClaimsSnapshot, file_sha256, trim_heap
+
+
+# Filter keys accepted by the API and the columns they select on
+FILTER_COLUMNS = {
+    'years': 'YEAR',
+    'statuses': 'CLAIM_STATUS',
+    'business_units': 'BU',
+    'products': 'PRODUCT',
+    'distribution_channels': 'DISTRIBUTION'
+}
+
+# Columns read from the PCHI extract and how each is typed; everything else is skipped.
+# Repeated labels load as categoricals, dates parse with DATE_FORMAT in the reader.
+CLAIM_SCHEMA = {
+    'CL_NO': 'object',
+    'CLAIM_STATUS': 'category',
+    'PROVIDER': 'category',
+    'BU': 'category',
+    'PRODUCT': 'category',
+    'DISTRIBUTION': 'category',
+    'BEN_TYPE_DESC': 'category',
+    'Gender': 'category',
+    'AGE': 'float32',
+    'PAYDATE': 'datetime64[ns]',
+    'UPDATE_DATE': 'datetime64[ns]',
+    'INCURRED': 'float64',
+    'APPROVED': 'float64',
+    'CLAIMED': 'float64',
+    'OUTSTANDING': 'float64',
+    'DIAGNOSIS_DETAILS': 'object',
+    'POLICYHOLDER': 'object',
+    'Member Name': 'object'
+}
+
+# Columns ratio metrics group by: the filter dimensions and the panel keys
+RATIO_DIMENSIONS = list(FILTER_COLUMNS.values()) + PANEL_KEYS
+
+# Columns the claim measures behind RATIO_METRICS are computed from
+RATIO_COLUMNS = ['CLAIM_STATUS', 'APPROVED', 'CLAIMED']
+
+# Date format of the extract; columns that do not match fall back to inference
+DATE_FORMAT = '%Y-%m-%d'
+
+# Bump when load_claims changes how it derives columns, so old snapshots are not reused
+SNAPSHOT_VERSION = 3
+
+# Column the claims rows are ordered and partitioned by
+PARTITION_COLUMN = 'YEAR_MONTH'
+
+# Position of each claim in the extract, the default order of the table and exports
+ORDER_COLUMN = 'FILE_ROW'
+
+# Extract columns outside CLAIM_SCHEMA that load_claim_extras types; the rest keep read_csv's types
+EXTRA_DATE_COLUMNS = ['POLICY EFF DATE', 'POLICY EXP DATE', 'SICK/FROM', 'SICK/TO', 'RECEIPT/DT', 'CHQDATE', 'CREATE_DATE']
+EXTRA_NUMERIC_COLUMNS = ['DED_AMT', 'COPAY_AMT', 'MANUAL_REJECTED_AMT']
+
+# Columns load_claims derives
+DERIVED_COLUMNS = ['YEAR', 'MONTH', 'QUARTER', 'YEAR_MONTH', ORDER_COLUMN]
+
+# Columns each dashboard panel reads; the filtered frame is pruned to these
+PANEL_COLUMNS = {
+    'kpis': ['INCURRED', 'APPROVED', 'CLAIMED', 'OUTSTANDING', 'CLAIM_STATUS'],
+    'trends': ['YEAR_MONTH', 'CL_NO', 'INCURRED', 'APPROVED'],
+    'status': ['CLAIM_STATUS'],
+    'providers': ['PROVIDER', 'APPROVED'],
+    'business-units': ['BU', 'CL_NO', 'APPROVED'],
+    'age-distribution': ['AGE'],
+    'gender-distribution': ['Gender'],
+    'benefit-types': ['BEN_TYPE_DESC', 'APPROVED'],
+    'distribution-channels': ['DISTRIBUTION', 'CL_NO', 'APPROVED', 'CLAIM_STATUS'],
+    'products': ['PRODUCT', 'CL_NO', 'APPROVED'],
+    'yearly-comparison': ['YEAR', 'CL_NO', 'APPROVED'],
+    'table': ['CL_NO', 'CLAIM_STATUS', 'PROVIDER', 'PAYDATE',
+              'INCURRED', 'APPROVED', 'CLAIMED', 'BEN_TYPE_DESC',
+              'DIAGNOSIS_DETAILS', 'POLICYHOLDER', 'Member Name']
+}
+
+
+def load_claims(csv_path, partitioned=True):
+    """Read the schema columns of a PCHI extract and add the derived date columns
+
+    With ``partitioned`` the rows are ordered by PARTITION_COLUMN (pay month,
+    missing dates last), keeping file order within a month, so each month is
+    one contiguous range of rows. ORDER_COLUMN then keeps each row's position
+    in the file.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    columns = [col for col in CLAIM_SCHEMA if col in header]
+    dates = [col for col in columns if CLAIM_SCHEMA[col].startswith('datetime')]
+    numerics = [col for col in columns if CLAIM_SCHEMA[col].startswith('float')]
+
+    df = pd.read_csv(
+        csv_path,
+        usecols=columns,
+        dtype={col: CLAIM_SCHEMA[col] for col in columns if col not in dates + numerics},
+        parse_dates=dates,
+        date_format=DATE_FORMAT
+    )
+
+    # Values the reader could not parse are coerced to NaN/NaT
+    for col in dates:
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in numerics:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype(CLAIM_SCHEMA[col])
+
+    # Add derived columns
+    if 'PAYDATE' in df.columns:
+        paydate = df['PAYDATE'].dt
+        df['YEAR'] = paydate.year.astype('Int16')
+        df['MONTH'] = paydate.month.astype('Int8')
+        df['QUARTER'] = paydate.quarter.astype('Int8')
+        df['YEAR_MONTH'] = _year_month(df['PAYDATE'])
+
+    if partitioned:
+        df[ORDER_COLUMN] = np.arange(len(df), dtype=np.int32 if len(df) < 2 ** 31 else np.int64)
+        if PARTITION_COLUMN in df.columns:
+            df = _partition_order(df, df[PARTITION_COLUMN])
+
+    return df
+
+
+def load_claim_extras(csv_path):
+    """Read the extract columns ``load_claims`` skips, in its row order
+
+    These are only shown by raw data views, so they are kept apart from the
+    claims frame the queries read.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    columns = [col for col in header if col not in CLAIM_SCHEMA and col not in DERIVED_COLUMNS]
+    dates = [col for col in columns if col in EXTRA_DATE_COLUMNS]
+    order = ['PAYDATE'] if 'PAYDATE' in header else []
+
+    df = pd.read_csv(
+        csv_path,
+        usecols=columns + order,
+        parse_dates=dates + order,
+        date_format=DATE_FORMAT,
+        low_memory=False
+    )
+
+    for col in dates + order:
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in columns:
+        if col in EXTRA_NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Same row order as load_claims
+    if order:
+        df = _partition_order(df, _year_month(df['PAYDATE']))
+    return df[columns]
+
+
+def load_claims_snapshot(csv_path, snapshot_dir=None, extra_columns=False):
+    """Get ``load_claims(csv_path)``, memory-mapped from the shared snapshot when one exists
+
+    The snapshot is keyed by the file contents and the loader schema, so the
+    Flask workers and the Streamlit process all map the same snapshot and
+    share its pages. With ``extra_columns`` every other extract column is
+    added from a second snapshot (``load_claim_extras``), in file column
+    order with the derived columns last. An empty ``PCHI_SNAPSHOT_DIR``
+    disables snapshots and always parses the CSV into a private frame.
+    """
+    snapshot_dir = Config.PCHI_SNAPSHOT_DIR if snapshot_dir is None else snapshot_dir
+    if not snapshot_dir:
+        df = load_claims(csv_path)
+        extras = load_claim_extras(csv_path) if extra_columns else None
+    else:
+        snapshot = ClaimsSnapshot(snapshot_dir, keep=Config.PCHI_SNAPSHOT_KEEP)
+        df = snapshot.load(csv_path, load_claims, _snapshot_fingerprint(),
+                           categorical_text=Config.PCHI_CATEGORICAL_TEXT)
+        extras = None
+        if extra_columns:
+            extras = snapshot.load(csv_path, load_claim_extras, _snapshot_fingerprint('extras', EXTRA_DATE_COLUMNS,
+                                                                                      EXTRA_NUMERIC_COLUMNS),
+                                   categorical_text=Config.PCHI_CATEGORICAL_TEXT)
+    if extras is None:
+        return df
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    columns = {col: df[col] if col in df.columns else extras[col] for col in header if col in df or col in extras}
+    columns.update({col: df[col] for col in df.columns if col not in columns})
+    return pd.DataFrame(columns, copy=False)
+
+
+def merge_claims_snapshot(csv_path, delta_hashes, merge, snapshot_dir=None):
+    """Get the frame ``merge()`` builds for ``csv_path`` with deltas merged in, mapped like the extract
+
+    The merged frame is snapshotted by the hashes of the extract and of the
+    deltas (``delta_hashes``, in merge order), so the first process to merge a delta writes it and
+    every other maps it without merging again. Without snapshots the merged
+    frame is private.
+    """
+    snapshot_dir = Config.PCHI_SNAPSHOT_DIR if snapshot_dir is None else snapshot_dir
+    if not snapshot_dir:
+        return merge()
+    snapshot = ClaimsSnapshot(snapshot_dir, keep=Config.PCHI_SNAPSHOT_KEEP)
+    return snapshot.load(csv_path, lambda _: merge(), _snapshot_fingerprint(),
+                         categorical_text=Config.PCHI_CATEGORICAL_TEXT, delta_hashes=delta_hashes)
+
+
+def _snapshot_fingerprint(*extra):
+    """Loader settings a snapshot is only valid for"""
+    return json.dumps([SNAPSHOT_VERSION, CLAIM_SCHEMA, DATE_FORMAT, PARTITION_COLUMN, *extra], sort_keys=True)
+
+
+def _partition_order(df, partitions):
+    """Get ``df`` with rows ordered by the codes of the ``partitions`` categorical, file order kept within each"""
+    codes = partitions.cat.codes.to_numpy() if isinstance(partitions, pd.Series) else partitions.codes
+    if (codes[1:] < codes[:-1]).any():
+        df = df.take(np.argsort(codes, kind='stable')).reset_index(drop=True)
+    return df
+
+
+def _merge_rows(df, positions, incoming):
+    """Get a copy of ``df`` with rows ``positions`` replaced by the first rows of ``incoming``
+
+    The remaining ``incoming`` rows are appended. Categorical columns gain
+    any new categories (kept sorted where they were), so existing codes stay
+    valid and nothing is refactorized.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col in incoming.columns:
+            added = incoming[col]
+        else:
+            added = pd.Series(np.nan, index=incoming.index).astype(values.dtype)
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories
+            labels = pd.Index(np.asarray(added.dropna().unique(), dtype=object))
+            new_labels = labels[categories.get_indexer(labels) < 0]
+            if len(new_labels):
+                merged = categories.append(new_labels)
+                if categories.is_monotonic_increasing:
+                    merged = merged.sort_values()
+                values = values.cat.set_categories(merged)
+            added = added.astype(values.dtype)
+        elif added.dtype != values.dtype:
+            added = added.astype(values.dtype)
+
+        merged = pd.concat([values, added.iloc[len(positions):]], ignore_index=True)
+        if len(positions):
+            merged.iloc[positions] = added.iloc[:len(positions)].array
+        columns[col] = merged
+
+    return pd.DataFrame(columns)
+
+
+def _year_month(dates):
+    """Format dates as YYYY-MM categories, formatting each month only once
+
+    Missing dates get the label 'NaT', as ``to_period('M').astype(str)`` does.
+    """
+    months = dates.dt.year * 12 + dates.dt.month - 1
+    codes, uniques = pd.factorize(months)
+    labels = [f"{int(m) // 12:04d}-{int(m) % 12 + 1:02d}" for m in uniques]
+    if (codes < 0).any():
+        codes = codes.copy()
+        codes[codes < 0] = len(labels)
+        labels.append('NaT')
+    values = pd.Categorical.from_codes(codes, categories=labels)
+    return values.reorder_categories(sorted(labels))
+
 
 class PCHIAnalyzer:
     """Analyzer for PCHI claims data"""
 
-    def __init__(self, csv_path):
-        """Initialize with CSV file path"""
+    def __init__(self, csv_path, build_cube=True, progress=None):
+        """Initialize with CSV file path
+
+        With ``build_cube`` the aggregate panels are answered from a cube
+        pre-aggregated at load time; otherwise they scan the filtered rows.
+        ``progress`` is called with the name of each load stage as it starts.
+        """
         self.csv_path = csv_path
+        self.build_cube = build_cube
+        self.progress = progress
+        self.version = self.file_version(csv_path)
         self.df = None
+        self.filter_index = None
+        self.cube = None
+        self.table = None
+        self.partitions = None
+        self.deltas = ()
+        self.delta_hashes = ()
+        self.delta_summary = None
+        self._claims = None
         self._load_data()
 
     def _load_data(self):
         """Load and preprocess the claims data"""
         try:
-            # Load data
-            self.df = pd.read_csv(self.csv_path)
-
-            # Convert date columns
-            date_columns = ['POLICY EFF DATE', 'POLICY EXP DATE', 'SICK/FROM', 'SICK/TO',
-                           'RECEIPT/DT', 'PAYDATE', 'CHQDATE', 'CREATE_DATE', 'UPDATE_DATE']
-            for col in date_columns:
-                if col in self.df.columns:
-                    self.df[col] = pd.to_datetime(self.df[col], errors='coerce')
-
-            # Convert numeric columns
-            numeric_columns = ['INCURRED', 'APPROVED', 'CLAIMED', 'OUTSTANDING',
-                              'DED_AMT', 'COPAY_AMT', 'MANUAL_REJECTED_AMT', 'AGE']
-            for col in numeric_columns:
-                if col in self.df.columns:
-                    self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
-
-            # Add derived columns
-            if 'PAYDATE' in self.df.columns:
-                self.df['YEAR'] = self.df['PAYDATE'].dt.year
-                self.df['MONTH'] = self.df['PAYDATE'].dt.month
-                self.df['QUARTER'] = self.df['PAYDATE'].dt.quarter
-                self.df['YEAR_MONTH'] = self.df['PAYDATE'].dt.to_period('M').astype(str)
+            self._report('reading')
+            self.df = load_claims_snapshot(self.csv_path)
+            self.partitions = ClaimsPartitions(self.df, PARTITION_COLUMN, Config.PCHI_PARTITION_CACHE_MB * 1024 * 1024)
+
+            # Index the filter dimensions once so requests never copy the frame
+            self._report('indexing')
+            self.filter_index = FilterIndex(self.df, FILTER_COLUMNS)
+            self.table = ClaimsTable(self.df, self.filter_index, PANEL_COLUMNS['table'],
+                                     partitions=self.partitions, order_by=ORDER_COLUMN)
+
+            # Pre-aggregate the count/sum rollups every chart panel is built from
+            if self.build_cube:
+                self._report('aggregating')
+                self.cube = ClaimsCube(self.df, FILTER_COLUMNS)
+
+            # Only the indexes should stay resident; partitions are paged in as queries use them
+            self.partitions.evict()
+            trim_heap()
 
         except Exception as e:
             raise Exception(f"Error loading data: {str(e)}")
 
+    def _report(self, stage):
+        """Tell the progress callback which load stage is starting"""
+        if self.progress is not None:
+            self.progress(stage)
+
+    def with_delta(self, delta_path):
+        """Get a new analyzer with the new and updated claims of a delta file merged in
+
+        Claims are matched on CL_NO. The latest UPDATE_DATE of a claim wins:
+        an update replaces the resident row in place unless the resident row
+        was updated later, and unknown claims are appended. Only the delta is
+        parsed and factorized, and the cube is only aggregated over the
+        changed rows. The merged columns and filter codes are still new
+        copies, so this analyzer is left unchanged and requests already
+        running finish on it; a merge costs a pass over every loaded row.
+        With snapshots the merged frame is written once and memory-mapped by
+        every process, like a loaded extract.
+        """
+        try:
+            delta = load_claims(delta_path, partitioned=False)
+        except Exception as e:
+            raise Exception(f"Error loading delta: {str(e)}")
+        for col in ['CL_NO', 'UPDATE_DATE']:
+            if col not in delta.columns:
+                raise ValueError(f"Delta file has no {col} column")
+
+        # Keep the latest version of each claim in the delta
+        delta = (delta[delta['CL_NO'].notna()]
+                 .sort_values('UPDATE_DATE', kind='stable', na_position='first')
+                 .drop_duplicates('CL_NO', keep='last'))
+
+        positions = self._claim_positions(delta['CL_NO'])
+        found = positions >= 0
+        stale = np.zeros(len(delta), dtype=bool)
+        if 'UPDATE_DATE' in self.df.columns:
+            resident = self.df['UPDATE_DATE'].to_numpy()[positions[found]]
+            stale[found] = resident > delta['UPDATE_DATE'].to_numpy()[found]
+
+        updated = positions[found & ~stale]
+        incoming = pd.concat([delta[found & ~stale], delta[~found]], ignore_index=True)
+        if ORDER_COLUMN in self.df.columns:
+            # Updated claims keep their place in the extract, new ones follow it
+            file_rows = self.df[ORDER_COLUMN]
+            added = np.arange(len(self.df), len(self.df) + int((~found).sum()))
+            incoming[ORDER_COLUMN] = np.concatenate([file_rows.to_numpy()[updated], added]).astype(file_rows.dtype)
+        deltas = self.deltas + ((os.path.abspath(delta_path), self.file_version(delta_path)),)
+        delta_hashes = self.delta_hashes + (file_sha256(delta_path),)
+        df = merge_claims_snapshot(self.csv_path, delta_hashes, lambda: _merge_rows(self.df, updated, incoming))
+        changed = np.concatenate([updated, np.arange(len(self.df), len(df))])
+
+        analyzer = copy.copy(self)
+        analyzer.df = df
+        analyzer.filter_index = self.filter_index.with_rows(df, changed)
+        analyzer.partitions = self.partitions.with_rows(df)
+        analyzer.table = ClaimsTable(df, analyzer.filter_index, PANEL_COLUMNS['table'],
+                                     partitions=analyzer.partitions, order_by=ORDER_COLUMN)
+        if self.cube is not None:
+            analyzer.cube = self.cube.with_rows(self.df.take(updated), df.take(changed))
+        analyzer.deltas = deltas
+        analyzer.delta_hashes = delta_hashes
+        analyzer.delta_summary = {'updated': len(updated), 'added': int((~found).sum()), 'stale': int(stale.sum())}
+        analyzer._claims = None
+        analyzer.partitions.evict()
+        trim_heap()
+        return analyzer
+
+    def _claim_positions(self, claims):
+        """Get the row of each claim number, -1 for claims not loaded
+
+        Where a claim number repeats, its last row is the one matched.
+        """
+        if self._claims is None:
+            numbers = self.df['CL_NO']
+            rows = ~numbers.duplicated(keep='last').to_numpy() if not numbers.is_unique else None
+            index = pd.Index(numbers if rows is None else numbers[rows])
+            self._claims = (index, None if rows is None else np.flatnonzero(rows))
+
+        index, rows = self._claims
+        positions = index.get_indexer(pd.Index(np.asarray(claims, dtype=object)))
+        if rows is not None:
+            positions = np.where(positions >= 0, rows[positions], -1)
+        return positions
+
+    @staticmethod
+    def file_version(csv_path):
+        """Get the (mtime, size) signature of a CSV file, used to detect changes"""
+        stat = os.stat(csv_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
     def get_kpi_summary(self, filters=None):
         """Get key performance indicators"""
-        df = self._apply_filters(filters)
+        return self._kpi_summary(self._totals_source(filters, 'kpis'))
+
+    def get_claims_trend(self, filters=None):
+        """Get claims trend over time"""
+        return self._claims_trend(self._totals_source(filters, 'trends'))
+
+    def get_status_distribution(self, filters=None):
+        """Get claim status distribution"""
+        return self._status_distribution(self._totals_source(filters, 'status'))
+
+    def get_top_providers(self, filters=None, limit=10):
+        """Get top providers by approved amount"""
+        return self._top_providers(self._totals_source(filters, 'providers'), limit=limit)
+
+    def get_bu_analysis(self, filters=None):
+        """Get business unit analysis"""
+        return self._bu_analysis(self._totals_source(filters, 'business-units'))
+
+    def get_age_distribution(self, filters=None):
+        """Get age distribution of claimants"""
+        return self._age_distribution(self._totals_source(filters, 'age-distribution'))
 
-        total_claims = len(df)
-        total_incurred = float(df['INCURRED'].sum()) if 'INCURRED' in df.columns else 0
-        total_approved = float(df['APPROVED'].sum()) if 'APPROVED' in df.columns else 0
-        total_claimed = float(df['CLAIMED'].sum()) if 'CLAIMED' in df.columns else 0
-        total_outstanding = float(df['OUTSTANDING'].sum()) if 'OUTSTANDING' in df.columns else 0
+    def get_gender_distribution(self, filters=None):
+        """Get gender distribution"""
+        return self._gender_distribution(self._totals_source(filters, 'gender-distribution'))
+
+    def get_benefit_type_analysis(self, filters=None, limit=10):
+        """Get benefit type analysis"""
+        return self._benefit_type_analysis(self._totals_source(filters, 'benefit-types'), limit=limit)
+
+    def get_distribution_channel_analysis(self, filters=None):
+        """Get distribution channel analysis"""
+        return self._distribution_channel_analysis(self._totals_source(filters, 'distribution-channels'))
+
+    def get_product_analysis(self, filters=None, limit=10):
+        """Get product analysis"""
+        return self._product_analysis(self._totals_source(filters, 'products'), limit=limit)
+
+    def get_yearly_comparison(self, filters=None):
+        """Get year-over-year comparison"""
+        return self._yearly_comparison(self._totals_source(filters, 'yearly-comparison'))
+
+    def get_ratio_metrics(self, filters=None, dimension='DISTRIBUTION', metrics=None):
+        """Get ratio metrics (RATIO_METRICS names) per value of a filter dimension or panel key"""
+        metrics = list(RATIO_METRICS) if not metrics else list(dict.fromkeys(metrics))
+        unknown = [metric for metric in metrics if metric not in RATIO_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(map(str, unknown))}")
+        if dimension not in RATIO_DIMENSIONS or not has_group_key(self.df.columns, dimension):
+            raise ValueError(f"Cannot group by: {dimension}")
+
+        key_columns = ['AGE'] if dimension == 'AGE_GROUP' else [dimension]
+        source = self._totals_source(filters, columns=key_columns + RATIO_COLUMNS)
+        return self._ratio_metrics(source, dimension, metrics)
+
+    def get_claims_data_table(self, filters=None, page=1, page_size=100, sort_by=None, ascending=True):
+        """Get paginated claims data for table view, optionally sorted by a display column"""
+        return self.table.page(filters, page, page_size, sort_by, ascending)
+
+    def export_claims(self, filters=None, fmt='csv', columns=None, sort_by=None, ascending=True):
+        """Get a generator streaming the filtered claims as a CSV, gzip or Parquet file
+
+        ``columns`` defaults to the table columns and may name any extract
+        column in CLAIM_SCHEMA; rows come in table order.
+        """
+        columns = self.table.columns if not columns else list(dict.fromkeys(columns))
+        unknown = [col for col in columns if col not in CLAIM_SCHEMA or col not in self.df.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(map(str, unknown))}")
+        if sort_by is not None and sort_by not in self.table.columns:
+            raise ValueError(f"Cannot sort by column: {sort_by}")
+
+        positions = self.table.positions(filters, sort_by, ascending)
+        return export_stream(self.df, positions, columns, fmt, touch=self.partitions.touch)
+
+    def get_dashboard_bundle(self, filters=None, panels=None, page=1, page_size=100, sort_by=None, ascending=True):
+        """Get several dashboard panels computed from a single filter pass
+
+        ``panels`` are the names in PANEL_COLUMNS (the /api/pchi endpoint
+        names); all panels are returned when omitted. Panels grouping by the
+        same key share one rollup of claim counts and amounts.
+        """
+        panels = list(PANEL_COLUMNS) if not panels else list(dict.fromkeys(panels))
+        unknown = [panel for panel in panels if panel not in PANEL_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown panels: {', '.join(unknown)}")
+
+        aggregate_panels = [panel for panel in panels if panel != 'table']
+        source = self._totals_source(filters, *aggregate_panels) if aggregate_panels else None
+
+        builders = {
+            'kpis': lambda: self._kpi_summary(source),
+            'trends': lambda: self._claims_trend(source),
+            'status': lambda: self._status_distribution(source),
+            'providers': lambda: self._top_providers(source),
+            'business-units': lambda: self._bu_analysis(source),
+            'age-distribution': lambda: self._age_distribution(source),
+            'gender-distribution': lambda: self._gender_distribution(source),
+            'benefit-types': lambda: self._benefit_type_analysis(source),
+            'distribution-channels': lambda: self._distribution_channel_analysis(source),
+            'products': lambda: self._product_analysis(source),
+            'yearly-comparison': lambda: self._yearly_comparison(source),
+            'table': lambda: self.get_claims_data_table(filters, page, page_size, sort_by, ascending)
+        }
+
+        return {panel: builders[panel]() for panel in panels}
+
+    def _totals_source(self, filters, *panels, columns=()):
+        """Get the source of group totals for the given panels
+
+        Totals come from the pre-aggregated cube when it was built; otherwise
+        from the filtered rows, pruned to the columns the panels read (plus
+        ``columns``). Either way totals per key are memoized, so panels
+        sharing a key share a pass.
+        """
+        if self.cube is not None:
+            return self.cube.view(filters)
+
+        columns = list(dict.fromkeys([col for panel in panels for col in PANEL_COLUMNS[panel]] + list(columns)))
+        return FrameTotals(self._apply_filters(filters, columns))
+
+    def _ratio_metrics(self, source, dimension, metrics):
+        """Build ratio metrics per value of ``dimension`` from group totals"""
+        totals = source.totals(dimension)
+        ratios = ratio_metrics(totals, metrics)
+
+        result = {
+            'dimension': dimension,
+            'labels': totals.index.tolist(),
+            'claim_counts': totals['rows'].tolist()
+        }
+        for metric in metrics:
+            if metric in ratios.columns:
+                result[metric] = [None if pd.isna(x) else round(x, 2) for x in ratios[metric].tolist()]
+        return result
+
+    def _kpi_summary(self, source):
+        """Build key performance indicators from group totals"""
+        totals = source.grand_totals()
+
+        total_claims = int(totals['rows'])
+        total_incurred = float(totals['incurred']) if 'incurred' in totals else 0
+        total_approved = float(totals['approved']) if 'approved' in totals else 0
+        total_claimed = float(totals['claimed']) if 'claimed' in totals else 0
+        total_outstanding = float(totals['outstanding']) if 'outstanding' in totals else 0
 
         approval_rate = 0
-        if 'CLAIM_STATUS' in df.columns and total_claims > 0:
-            approval_rate = float((df['CLAIM_STATUS'] == 'Accept').sum() / total_claims * 100)
+        if 'accepted' in totals and total_claims > 0:
+            approval_rate = float(totals['accepted'] / total_claims * 100)
 
-        avg_claim_amount = float(df['APPROVED'].mean()) if 'APPROVED' in df.columns else 0
+        avg_claim_amount = 0
+        if 'approved' in totals:
+            approved_count = int(totals['approved_count'])
+            avg_claim_amount = total_approved / approved_count if approved_count > 0 else float('nan')
 
         return {
             'total_claims': total_claims,
@@ -73,116 +590,93 @@ class PCHIAnalyzer:
             'avg_claim_amount': round(avg_claim_amount, 2)
         }
 
-    def get_claims_trend(self, filters=None):
-        """Get claims trend over time"""
-        df = self._apply_filters(filters)
-
-        if 'YEAR_MONTH' not in df.columns:
+    def _claims_trend(self, source):
+        """Build the monthly claims trend from group totals"""
+        if 'YEAR_MONTH' not in self.df.columns:
             return {'labels': [], 'claim_counts': [], 'approved_amounts': [], 'incurred_amounts': []}
 
-        monthly_data = df.groupby('YEAR_MONTH').agg({
-            'CL_NO': 'count',
-            'INCURRED': 'sum',
-            'APPROVED': 'sum'
-        }).reset_index()
+        monthly_data = source.totals('YEAR_MONTH')
 
         return {
-            'labels': monthly_data['YEAR_MONTH'].tolist(),
-            'claim_counts': monthly_data['CL_NO'].tolist(),
-            'approved_amounts': [round(x, 2) for x in monthly_data['APPROVED'].tolist()],
-            'incurred_amounts': [round(x, 2) for x in monthly_data['INCURRED'].tolist()]
+            'labels': monthly_data.index.tolist(),
+            'claim_counts': monthly_data['claims'].tolist(),
+            'approved_amounts': [round(x, 2) for x in monthly_data['approved'].tolist()],
+            'incurred_amounts': [round(x, 2) for x in monthly_data['incurred'].tolist()]
         }
 
-    def get_status_distribution(self, filters=None):
-        """Get claim status distribution"""
-        df = self._apply_filters(filters)
-
-        if 'CLAIM_STATUS' not in df.columns:
+    def _status_distribution(self, source):
+        """Build the claim status distribution from group totals"""
+        if 'CLAIM_STATUS' not in self.df.columns:
             return {'labels': [], 'values': []}
 
-        status_counts = df['CLAIM_STATUS'].value_counts()
+        status_counts = source.totals('CLAIM_STATUS')['rows'].sort_values(ascending=False, kind='stable')
 
         return {
             'labels': status_counts.index.tolist(),
             'values': status_counts.values.tolist()
         }
 
-    def get_top_providers(self, filters=None, limit=10):
-        """Get top providers by approved amount"""
-        df = self._apply_filters(filters)
-
-        if 'PROVIDER' not in df.columns or 'APPROVED' not in df.columns:
+    def _top_providers(self, source, limit=10):
+        """Build the top providers by approved amount from group totals"""
+        if 'PROVIDER' not in self.df.columns or 'APPROVED' not in self.df.columns:
             return {'labels': [], 'values': []}
 
-        top_providers = df.groupby('PROVIDER')['APPROVED'].sum().nlargest(limit)
+        top_providers = source.totals('PROVIDER')['approved'].nlargest(limit)
 
         return {
             'labels': top_providers.index.tolist(),
             'values': [round(x, 2) for x in top_providers.values.tolist()]
         }
 
-    def get_bu_analysis(self, filters=None):
-        """Get business unit analysis"""
-        df = self._apply_filters(filters)
-
-        if 'BU' not in df.columns:
+    def _bu_analysis(self, source):
+        """Build the business unit analysis from group totals"""
+        if 'BU' not in self.df.columns:
             return {'labels': [], 'claim_counts': [], 'approved_amounts': []}
 
-        bu_data = df.groupby('BU').agg({
-            'CL_NO': 'count',
-            'APPROVED': 'sum'
-        }).reset_index()
+        bu_data = source.totals('BU')
 
         return {
-            'labels': bu_data['BU'].tolist(),
-            'claim_counts': bu_data['CL_NO'].tolist(),
-            'approved_amounts': [round(x, 2) for x in bu_data['APPROVED'].tolist()]
+            'labels': bu_data.index.tolist(),
+            'claim_counts': bu_data['claims'].tolist(),
+            'approved_amounts': [round(x, 2) for x in bu_data['approved'].tolist()]
         }
 
-    def get_age_distribution(self, filters=None):
-        """Get age distribution of claimants"""
-        df = self._apply_filters(filters)
-
-        if 'AGE' not in df.columns:
+    def _age_distribution(self, source):
+        """Build the claimant age distribution from group totals"""
+        if 'AGE' not in self.df.columns:
             return {'labels': [], 'values': []}
 
-        age_bins = [0, 18, 30, 40, 50, 60, 100]
-        age_labels = ['0-18', '19-30', '31-40', '41-50', '51-60', '60+']
-        df['AGE_GROUP'] = pd.cut(df['AGE'], bins=age_bins, labels=age_labels)
-
-        age_dist = df['AGE_GROUP'].value_counts().sort_index()
+        age_dist = source.totals('AGE_GROUP')['rows'].reindex(AGE_LABELS, fill_value=0)
 
         return {
-            'labels': age_dist.index.tolist(),
+            'labels': list(AGE_LABELS),
             'values': age_dist.values.tolist()
         }
 
-    def get_gender_distribution(self, filters=None):
-        """Get gender distribution"""
-        df = self._apply_filters(filters)
-
-        if 'Gender' not in df.columns:
+    def _gender_distribution(self, source):
+        """Build the gender distribution from group totals"""
+        if 'Gender' not in self.df.columns:
             return {'labels': [], 'values': []}
 
-        gender_dist = df['Gender'].value_counts()
+        gender_dist = source.totals('Gender')['rows'].sort_values(ascending=False, kind='stable')
 
         return {
             'labels': gender_dist.index.tolist(),
             'values': gender_dist.values.tolist()
         }
 
-    def get_benefit_type_analysis(self, filters=None, limit=10):
-        """Get benefit type analysis"""
-        df = self._apply_filters(filters)
-
-        if 'BEN_TYPE_DESC' not in df.columns:
+    def _benefit_type_analysis(self, source, limit=10):
+        """Build the benefit type analysis from group totals"""
+        if 'BEN_TYPE_DESC' not in self.df.columns:
             return {'by_count': {'labels': [], 'values': []}, 'by_amount': {'labels': [], 'values': []}}
 
+        benefit_data = source.totals('BEN_TYPE_DESC')
+
         # Top by count
-        top_by_count = df['BEN_TYPE_DESC'].value_counts().head(limit)
+        top_by_count = benefit_data['rows'].sort_values(ascending=False, kind='stable').head(limit)
 
         # Top by amount
-        top_by_amount = df.groupby('BEN_TYPE_DESC')['APPROVED'].sum().nlargest(limit)
+        top_by_amount = benefit_data['approved'].nlargest(limit)
 
         return {
             'by_count': {
@@ -195,102 +689,50 @@ class PCHIAnalyzer:
             }
         }
 
-    def get_distribution_channel_analysis(self, filters=None):
-        """Get distribution channel analysis"""
-        df = self._apply_filters(filters)
-
-        if 'DISTRIBUTION' not in df.columns:
+    def _distribution_channel_analysis(self, source):
+        """Build the distribution channel analysis from group totals"""
+        if 'DISTRIBUTION' not in self.df.columns:
             return {'labels': [], 'claim_counts': [], 'approved_amounts': [], 'approval_rates': []}
 
         # Channel performance
-        channel_data = df.groupby('DISTRIBUTION').agg({
-            'CL_NO': 'count',
-            'APPROVED': 'sum'
-        }).reset_index()
+        channel_data = source.totals('DISTRIBUTION')
 
         # Approval rates
-        approval_rates = []
-        for channel in channel_data['DISTRIBUTION']:
-            channel_df = df[df['DISTRIBUTION'] == channel]
-            if len(channel_df) > 0 and 'CLAIM_STATUS' in df.columns:
-                rate = (channel_df['CLAIM_STATUS'] == 'Accept').sum() / len(channel_df) * 100
-                approval_rates.append(round(rate, 2))
-            else:
-                approval_rates.append(0)
+        approval_rates = [0] * len(channel_data)
+        if 'accepted' in channel_data.columns:
+            approval_rates = [round(x, 2) for x in ratio_metrics(channel_data, ['accept_rate'])['accept_rate'].tolist()]
 
         return {
-            'labels': channel_data['DISTRIBUTION'].tolist(),
-            'claim_counts': channel_data['CL_NO'].tolist(),
-            'approved_amounts': [round(x, 2) for x in channel_data['APPROVED'].tolist()],
+            'labels': channel_data.index.tolist(),
+            'claim_counts': channel_data['claims'].tolist(),
+            'approved_amounts': [round(x, 2) for x in channel_data['approved'].tolist()],
             'approval_rates': approval_rates
         }
 
-    def get_product_analysis(self, filters=None, limit=10):
-        """Get product analysis"""
-        df = self._apply_filters(filters)
-
-        if 'PRODUCT' not in df.columns:
+    def _product_analysis(self, source, limit=10):
+        """Build the top products by approved amount from group totals"""
+        if 'PRODUCT' not in self.df.columns:
             return {'labels': [], 'claim_counts': [], 'approved_amounts': []}
 
-        product_data = df.groupby('PRODUCT').agg({
-            'CL_NO': 'count',
-            'APPROVED': 'sum'
-        }).nlargest(limit, 'APPROVED').reset_index()
+        product_data = source.totals('PRODUCT').nlargest(limit, 'approved')
 
         return {
-            'labels': product_data['PRODUCT'].tolist(),
-            'claim_counts': product_data['CL_NO'].tolist(),
-            'approved_amounts': [round(x, 2) for x in product_data['APPROVED'].tolist()]
+            'labels': product_data.index.tolist(),
+            'claim_counts': product_data['claims'].tolist(),
+            'approved_amounts': [round(x, 2) for x in product_data['approved'].tolist()]
         }
 
-    def get_yearly_comparison(self, filters=None):
-        """Get year-over-year comparison"""
-        df = self._apply_filters(filters)
-
-        if 'YEAR' not in df.columns:
+    def _yearly_comparison(self, source):
+        """Build the year-over-year comparison from group totals"""
+        if 'YEAR' not in self.df.columns:
             return {'labels': [], 'claim_counts': [], 'approved_amounts': []}
 
-        yearly_data = df.groupby('YEAR').agg({
-            'CL_NO': 'count',
-            'APPROVED': 'sum'
-        }).reset_index()
+        yearly_data = source.totals('YEAR')
 
         return {
-            'labels': [int(x) for x in yearly_data['YEAR'].tolist()],
-            'claim_counts': yearly_data['CL_NO'].tolist(),
-            'approved_amounts': [round(x, 2) for x in yearly_data['APPROVED'].tolist()]
-        }
-
-    def get_claims_data_table(self, filters=None, page=1, page_size=100):
-        """Get paginated claims data for table view"""
-        df = self._apply_filters(filters)
-
-        # Select relevant columns
-        display_columns = ['CL_NO', 'CLAIM_STATUS', 'PROVIDER', 'PAYDATE',
-                          'INCURRED', 'APPROVED', 'CLAIMED', 'BEN_TYPE_DESC',
-                          'DIAGNOSIS_DETAILS', 'POLICYHOLDER', 'Member Name']
-
-        available_columns = [col for col in display_columns if col in df.columns]
-        df_display = df[available_columns].copy()
-
-        # Convert dates to strings
-        for col in df_display.columns:
-            if pd.api.types.is_datetime64_any_dtype(df_display[col]):
-                df_display[col] = df_display[col].dt.strftime('%Y-%m-%d')
-
-        # Pagination
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-
-        df_page = df_display.iloc[start_idx:end_idx]
-
-        return {
-            'columns': df_page.columns.tolist(),
-            'data': df_page.fillna('').values.tolist(),
-            'total_records': len(df_display),
-            'page': page,
-            'page_size': page_size,
-            'total_pages': (len(df_display) + page_size - 1) // page_size
+            'labels': [int(x) for x in yearly_data.index.tolist()],
+            'claim_counts': yearly_data['claims'].tolist(),
+            'approved_amounts': [round(x, 2) for x in yearly_data['approved'].tolist()]
         }
 
     def get_filter_options(self):
@@ -301,7 +743,13 @@ class PCHIAnalyzer:
             options['years'] = sorted([int(x) for x in self.df['YEAR'].dropna().unique()])
 
         if 'CLAIM_STATUS' in self.df.columns:
-            options['statuses'] = self.df['CLAIM_STATUS'].dropna().unique().tolist()
+            statuses = self.df['CLAIM_STATUS']
+            if ORDER_COLUMN in self.df.columns:
+                # In order of first appearance in the extract, not in the pay-month order of the rows
+                first_rows = self.df[ORDER_COLUMN].groupby(statuses, observed=True).min()
+                options['statuses'] = first_rows.sort_values().index.tolist()
+            else:
+                options['statuses'] = statuses.dropna().unique().tolist()
 
         if 'BU' in self.df.columns:
             options['business_units'] = sorted(self.df['BU'].dropna().unique().tolist())
@@ -315,26 +763,30 @@ class PCHIAnalyzer:
 
         return options
 
-    def _apply_filters(self, filters):
-        """Apply filters to dataframe"""
-        if filters is None or not filters:
-            return self.df.copy()
-
-        df = self.df.copy()
-
-        if 'years' in filters and filters['years'] and 'YEAR' in df.columns:
-            df = df[df['YEAR'].isin(filters['years'])]
-
-        if 'statuses' in filters and filters['statuses'] and 'CLAIM_STATUS' in df.columns:
-            df = df[df['CLAIM_STATUS'].isin(filters['statuses'])]
-
-        if 'business_units' in filters and filters['business_units'] and 'BU' in df.columns:
-            df = df[df['BU'].isin(filters['business_units'])]
-
-        if 'products' in filters and filters['products'] and 'PRODUCT' in df.columns:
-            df = df[df['PRODUCT'].isin(filters['products'])]
-
-        if 'distribution_channels' in filters and filters['distribution_channels'] and 'DISTRIBUTION' in df.columns:
-            df = df[df['DISTRIBUTION'].isin(filters['distribution_channels'])]
-
-        return df
+    def _apply_filters(self, filters, columns=None):
+        """Apply filters to dataframe
+
+        Filtering is a bitmap AND over the precomputed filter index. With no
+        active filter the shared frame itself is returned, so callers must treat
+        the result as read-only. ``columns`` limits the rows copied out to the
+        columns a query actually uses. Rows are in pay-month order, so filters
+        selecting whole months (years) match only those partitions, and a
+        single run of rows is returned as a slice of the frame without a copy.
+        """
+        mask = self.filter_index.mask(filters) if self.filter_index is not None else None
+
+        if mask is None:
+            if self.partitions is not None:
+                self.partitions.touch()
+            return self.df
+
+        positions = np.flatnonzero(mask)
+        if self.partitions is not None:
+            self.partitions.touch(positions)
+        columns = list(self.df.columns) if columns is None else [col for col in columns if col in self.df.columns]
+
+        if columns and len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+            rows = slice(int(positions[0]), int(positions[-1]) + 1)
+            return pd.concat([self.df[col].iloc[rows] for col in columns], axis=1, copy=False)
+
+        return self.df.loc[mask, columns]
@@ -0,0 +1,282 @@
+"""
+PCHI Claims Cube
+Pre-aggregated claim totals keyed by the filter dimensions and panel group-by keys
+"""
+import numpy as np
+import pandas as pd
+
+from core.filter_index import FilterIndex
+from core.parallel_groupby import group_aggregator
+
+
+# Age buckets used by the age distribution panel
+AGE_BINS = [0, 18, 30, 40, 50, 60, 100]
+AGE_LABELS = ['0-18', '19-30', '31-40', '41-50', '51-60', '60+']
+
+# Panel group-by keys that are not filter dimensions; each gets its own cube
+PANEL_KEYS = ['YEAR_MONTH', 'PROVIDER', 'BEN_TYPE_DESC', 'AGE_GROUP', 'Gender']
+
+# Ratio metrics as (numerator measure, denominator measure, scale); a ratio of
+# two group totals is the grouped mean of an indicator or the ratio of sums
+RATIO_METRICS = {
+    'accept_rate': ('accepted', 'rows', 100),
+    'reject_rate': ('rejected', 'rows', 100),
+    'approved_claimed_ratio': ('approved', 'claimed', 100),
+    'avg_approved': ('approved', 'approved_count', 1),
+}
+
+
+def group_key(df, key):
+    """Get the values a panel groups by, deriving AGE_GROUP from AGE"""
+    if key == 'AGE_GROUP':
+        return pd.cut(df['AGE'], bins=AGE_BINS, labels=AGE_LABELS)
+    return df[key]
+
+
+def has_group_key(columns, key):
+    """Check whether a group-by key can be computed from the given columns"""
+    if key == 'AGE_GROUP':
+        return 'AGE' in columns
+    return key in columns
+
+
+def claim_measures(df):
+    """Get the additive per-row measures every panel is built from
+
+    Counts are stored alongside sums so means and rates can be derived after
+    rolling up: ``approved_count`` for the average claim, the ``accepted`` and
+    ``rejected`` indicators for approval and rejection rates.
+    """
+    measures = {'rows': np.ones(len(df), dtype=np.int64)}
+
+    if 'CL_NO' in df.columns:
+        measures['claims'] = df['CL_NO'].notna().to_numpy(dtype=np.int64)
+    if 'APPROVED' in df.columns:
+        measures['approved'] = df['APPROVED'].to_numpy(dtype=np.float64)
+        measures['approved_count'] = df['APPROVED'].notna().to_numpy(dtype=np.int64)
+    if 'INCURRED' in df.columns:
+        measures['incurred'] = df['INCURRED'].to_numpy(dtype=np.float64)
+    if 'CLAIMED' in df.columns:
+        measures['claimed'] = df['CLAIMED'].to_numpy(dtype=np.float64)
+    if 'OUTSTANDING' in df.columns:
+        measures['outstanding'] = df['OUTSTANDING'].to_numpy(dtype=np.float64)
+    if 'CLAIM_STATUS' in df.columns:
+        measures['accepted'] = (df['CLAIM_STATUS'] == 'Accept').to_numpy(dtype=np.int64)
+        measures['rejected'] = (df['CLAIM_STATUS'] == 'Reject').to_numpy(dtype=np.int64)
+
+    return pd.DataFrame(measures, index=df.index)
+
+
+def ratio_metrics(totals, metrics=None):
+    """Derive RATIO_METRICS from measure totals per group
+
+    Returns a frame with one column per metric whose measures are present;
+    groups with a zero denominator get NaN.
+    """
+    ratios = pd.DataFrame(index=totals.index)
+    for name in metrics or RATIO_METRICS:
+        numerator, denominator, scale = RATIO_METRICS[name]
+        if numerator in totals.columns and denominator in totals.columns:
+            denominators = totals[denominator].where(totals[denominator] != 0)
+            ratios[name] = totals[numerator] / denominators * scale
+    return ratios
+
+
+def group_totals(measures, keys, aggregator=None):
+    """Sum ``measures`` per non-missing value of ``keys``
+
+    Gives the same frame as ``measures.groupby(keys, observed=True).sum()``.
+    Large frames are summed in row chunks by the parallel aggregator; below
+    its threshold the pandas groupby is faster than factorizing first.
+    """
+    aggregator = aggregator or group_aggregator
+    if not aggregator.is_parallel(len(measures)):
+        return measures.groupby(keys, observed=True).sum()
+
+    codes, uniques = pd.factorize(keys, sort=True)
+    sums = aggregator.sums(codes, len(uniques), measures)
+    totals = pd.DataFrame(sums, index=pd.Index(uniques, name=keys.name), columns=measures.columns)
+    return totals.astype(measures.dtypes.to_dict())
+
+
+class FrameTotals:
+    """Group totals computed directly from a (filtered) claims frame"""
+
+    def __init__(self, df, aggregator=None):
+        self.df = df
+        self.aggregator = aggregator
+        self._measures = None
+        self._totals = {}
+
+    def totals(self, key):
+        """Get measure totals per non-missing value of ``key``"""
+        if key not in self._totals:
+            self._totals[key] = group_totals(self._get_measures(), group_key(self.df, key), self.aggregator)
+        return self._totals[key]
+
+    def grand_totals(self):
+        """Get measure totals over all rows"""
+        return self._get_measures().sum()
+
+    def _get_measures(self):
+        if self._measures is None:
+            self._measures = claim_measures(self.df)
+        return self._measures
+
+
+class ClaimsCube:
+    """Claim measures pre-aggregated over the filter dimensions and panel keys"""
+
+    def __init__(self, df, dimensions, aggregator=None):
+        """Build the cube from the claims frame
+
+        ``dimensions`` maps filter keys to columns, as for FilterIndex. One
+        base cube covers the dimensions alone; every panel key present in the
+        frame gets a cube over the dimensions plus that key. Measures are
+        summed by ``aggregator`` (the shared parallel one by default).
+        """
+        self.aggregator = aggregator or group_aggregator
+        self.dimensions = {key: col for key, col in dimensions.items() if col in df.columns}
+        self.dimension_columns = list(self.dimensions.values())
+        self.measure_columns = list(claim_measures(df.iloc[:0]).columns)
+        self.cells = self._build_cells(df)
+        self.indexes = {key: FilterIndex(cells, self.dimensions) for key, cells in self.cells.items()}
+
+    def with_rows(self, removed, added):
+        """Get a cube with the ``removed`` rows taken out and the ``added`` rows put in
+
+        Both frames are aggregated into cells as the cube was, and their
+        totals are subtracted from and added to the matching cells; cells
+        left without rows are dropped. The work grows with the changed rows
+        and the number of cells, not with the rows already aggregated.
+        ``added`` must come from the updated frame, whose categories cover
+        every value of the old one.
+        """
+        cube = ClaimsCube.__new__(ClaimsCube)
+        cube.aggregator = self.aggregator
+        cube.dimensions = self.dimensions
+        cube.dimension_columns = self.dimension_columns
+        cube.measure_columns = self.measure_columns
+        cube.cells = {}
+        cube.indexes = {}
+
+        removed_cells = self._build_cells(removed) if len(removed) else {}
+        added_cells = self._build_cells(added) if len(added) else {}
+
+        for key, cells in self.cells.items():
+            keys = [col for col in cells.columns if col not in self.measure_columns]
+            parts = [cells]
+            if key in added_cells:
+                parts.append(added_cells[key])
+            if key in removed_cells:
+                negated = removed_cells[key].copy()
+                negated[self.measure_columns] = -negated[self.measure_columns]
+                parts.append(negated)
+
+            # Align key dtypes so categoricals stay categorical through the concat
+            target = parts[1] if key in added_cells else cells
+            parts = [part.astype({col: target[col].dtype for col in keys}) for part in parts]
+
+            merged = (pd.concat(parts, ignore_index=True)
+                      .groupby(keys, dropna=False, observed=True, sort=False)[self.measure_columns]
+                      .sum()
+                      .reset_index())
+            merged = merged[merged['rows'] != 0].reset_index(drop=True)
+            cube.cells[key] = merged
+            cube.indexes[key] = FilterIndex(merged, self.dimensions)
+
+        return cube
+
+    def view(self, filters):
+        """Get a totals source restricted to the filters"""
+        return CubeView(self, filters)
+
+    def cell_count(self):
+        """Get the total number of pre-aggregated cells"""
+        return sum(len(cells) for cells in self.cells.values())
+
+    def rollup(self, key, filters):
+        """Roll the matching cube cells up to totals per value of ``key``"""
+        cube_key = None if key in self.dimension_columns else key
+        cells = self.cells[cube_key]
+        mask = self.indexes[cube_key].mask(filters)
+        if mask is not None:
+            cells = cells[mask]
+        return cells.groupby(key, observed=True)[self.measure_columns].sum()
+
+    def grand_totals(self, filters):
+        """Roll the matching base cells up to overall totals"""
+        cells = self.cells[None]
+        mask = self.indexes[None].mask(filters)
+        if mask is not None:
+            cells = cells[mask]
+        return cells[self.measure_columns].sum()
+
+    def _build_cells(self, df):
+        """Aggregate a frame into the base cube and one cube per panel key present"""
+        measures = claim_measures(df)
+
+        # Dimension codes are shared by every cube, so factorize them once
+        dimension_codes = {col: pd.factorize(df[col]) for col in self.dimension_columns}
+
+        cells = {}
+        for key in [None] + PANEL_KEYS:
+            if key is not None and not has_group_key(df.columns, key):
+                continue
+            key_codes = dict(dimension_codes)
+            if key is not None:
+                key_codes[key] = pd.factorize(group_key(df, key))
+            cells[key] = self._aggregate(len(df), measures, key_codes)
+        return cells
+
+    def _aggregate(self, rows, measures, key_codes):
+        """Sum measures per combination of the factorized key columns
+
+        The codes of every key are combined into one integer cell id, so the
+        whole cube is one grouped sum over all measures. Missing values get
+        code 0 and stay as their own cells, which keeps "no filter" totals
+        identical to the raw rows.
+        """
+        cell_ids = np.zeros(rows, dtype=np.int64)
+        key_uniques = []
+        for codes, uniques in key_codes.values():
+            cell_ids = cell_ids * (len(uniques) + 1) + (codes + 1)
+            key_uniques.append((pd.Index(uniques), len(uniques) + 1))
+
+        cell_ids, cells = pd.factorize(cell_ids)
+        cell_count = len(cells)
+
+        columns = {}
+        remainder = np.asarray(cells, dtype=np.int64)
+        decoded = []
+        for uniques, radix in reversed(key_uniques):
+            remainder, codes = np.divmod(remainder, radix)
+            decoded.append(uniques.take(codes - 1, allow_fill=True, fill_value=np.nan))
+        for name, values in zip(key_codes.keys(), reversed(decoded)):
+            columns[name] = values
+
+        totals = self.aggregator.sums(cell_ids, cell_count, measures)
+        for j, col in enumerate(measures.columns):
+            dtype = measures[col].dtype
+            columns[col] = totals[:, j].astype(dtype) if dtype.kind == 'i' else totals[:, j]
+
+        return pd.DataFrame(columns)
+
+
+class CubeView:
+    """Totals source answering panel queries from a cube for one filter set"""
+
+    def __init__(self, cube, filters):
+        self.cube = cube
+        self.filters = filters
+        self._totals = {}
+
+    def totals(self, key):
+        """Get measure totals per non-missing value of ``key``"""
+        if key not in self._totals:
+            self._totals[key] = self.cube.rollup(key, self.filters)
+        return self._totals[key]
+
+    def grand_totals(self):
+        """Get measure totals over all matching rows"""
+        return self.cube.grand_totals(self.filters)
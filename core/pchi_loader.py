@@ -0,0 +1,297 @@
+"""
+PCHI Loader Module
+Background loading and hot reloading of the PCHI analyzer with a readiness state
+"""
+import fnmatch
+import os
+import threading
+import time
+from datetime import datetime
+
+from core.pchi_analyzer import PCHIAnalyzer
+
+
+class PCHILoader:
+    """Builds the PCHI analyzer in a background thread and swaps in reloads"""
+
+    # Load stages in order, used to report rough progress
+    STAGES = ['reading', 'indexing', 'aggregating']
+
+    def __init__(self, csv_path, build_cube=True, watch_dir=None, pattern='*.csv', settle_seconds=0,
+                 delta_dir=None, delta_pattern='*.csv'):
+        """Load ``csv_path``, or the newest file matching ``pattern`` in ``watch_dir``
+
+        A changed source is only reloaded once its (mtime, size) signature has
+        stayed the same for ``settle_seconds``, so a file that is still being
+        copied into place is not picked up half-written. Files matching
+        ``delta_pattern`` in ``delta_dir`` are merged into the loaded data as
+        they appear (see ``PCHIAnalyzer.with_delta``).
+        """
+        self.csv_path = csv_path
+        self.build_cube = build_cube
+        self.watch_dir = watch_dir
+        self.pattern = pattern
+        self.settle_seconds = settle_seconds
+        self.delta_dir = delta_dir
+        self.delta_pattern = delta_pattern
+        self.analyzer = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._watcher = None
+        self._pending = None
+        self._pending_since = None
+        self.stage = None
+        self.loading_path = None
+        self.started_at = None
+        self.load_seconds = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.error = None
+        self.attempted = None
+        self.delta_seconds = None
+        self.delta_error = None
+        self._failed_deltas = set()
+
+    def source_path(self):
+        """Get the file to load: the newest match in the watch directory, or the fixed path"""
+        if self.watch_dir:
+            try:
+                matches = [os.path.join(self.watch_dir, name) for name in os.listdir(self.watch_dir)
+                           if fnmatch.fnmatch(name, self.pattern)]
+            except OSError:
+                matches = []
+            if matches:
+                return max(matches, key=os.path.getmtime)
+
+        if self.csv_path and os.path.exists(self.csv_path):
+            return self.csv_path
+        return None
+
+    def start(self, path=None):
+        """Start loading in the background unless a load is already running
+
+        Returns True when a new load was started.
+        """
+        path = path or self.source_path()
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            if path is None or not os.path.exists(path):
+                return False
+
+            self.attempted = (path, PCHIAnalyzer.file_version(path))
+            self.loading_path = path
+            self.stage = 'starting'
+            self.started_at = time.monotonic()
+            self.error = None
+            self._pending = None
+            self._thread = threading.Thread(target=self._load, args=(path,), name='pchi-loader', daemon=True)
+            self._thread.start()
+            return True
+
+    def check(self):
+        """Start a background load if the source is new or changed
+
+        The first load starts right away; a reload waits for the source to
+        settle. A source that already failed to load is not retried until it
+        changes. Returns True when a load was started.
+        """
+        if self.loading:
+            return False
+
+        path = self.source_path()
+        if path is None:
+            return False
+
+        try:
+            signature = (path, PCHIAnalyzer.file_version(path))
+        except OSError:
+            return False
+
+        analyzer = self.analyzer
+        if analyzer is not None and signature == (analyzer.csv_path, analyzer.version):
+            self._pending = None
+            return self.check_deltas()
+        if self.error is not None and signature == self.attempted:
+            return False
+
+        if analyzer is not None and self.settle_seconds > 0:
+            now = time.monotonic()
+            if signature != self._pending:
+                self._pending = signature
+                self._pending_since = now
+                return False
+            if now - self._pending_since < self.settle_seconds:
+                return False
+
+        return self.start(path)
+
+    def pending_deltas(self):
+        """Get the delta files not yet merged into the loaded data, in name order
+
+        Deltas older than the loaded extract are taken to be part of it, and
+        a delta is only picked up once it has been unchanged for
+        ``settle_seconds``. A delta that failed is not retried until it changes.
+        """
+        analyzer = self.analyzer
+        if not self.delta_dir or analyzer is None:
+            return []
+        try:
+            names = sorted(name for name in os.listdir(self.delta_dir) if fnmatch.fnmatch(name, self.delta_pattern))
+        except OSError:
+            return []
+
+        applied = set(analyzer.deltas)
+        base_mtime = analyzer.version[0]
+        now = time.time_ns()
+        pending = []
+        for name in names:
+            path = os.path.abspath(os.path.join(self.delta_dir, name))
+            try:
+                version = PCHIAnalyzer.file_version(path)
+            except OSError:
+                continue
+            if (path, version) in applied or (path, version) in self._failed_deltas:
+                continue
+            if version[0] < base_mtime or now - version[0] < self.settle_seconds * 10 ** 9:
+                continue
+            pending.append(path)
+        return pending
+
+    def check_deltas(self):
+        """Start merging new delta files in the background; returns True when started"""
+        paths = self.pending_deltas()
+        if not paths:
+            return False
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self.stage = 'merging'
+            self.started_at = time.monotonic()
+            self.delta_error = None
+            self._thread = threading.Thread(target=self._merge, args=(paths,), name='pchi-delta', daemon=True)
+            self._thread.start()
+            return True
+
+    def get(self):
+        """Get the loaded analyzer, or None while it is not available
+
+        Never blocks on a load. The returned analyzer is an immutable snapshot:
+        a reload builds a new one and swaps it in, so a request that already
+        holds the old analyzer finishes on it.
+        """
+        analyzer = self.analyzer
+        # With a watcher running, reloads are picked up by polling instead
+        if analyzer is None or self._watcher is None:
+            self.check()
+        return analyzer
+
+    def watch(self, interval):
+        """Poll the source every ``interval`` seconds in a daemon thread"""
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._poll, args=(interval,), name='pchi-watcher', daemon=True)
+            self._watcher.start()
+
+    @property
+    def loading(self):
+        """Whether a load is currently running"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self):
+        """Get the readiness state, load progress and the loaded data size"""
+        with self._lock:
+            loading = self.loading
+            if self.analyzer is not None:
+                state = 'ready'
+            elif loading:
+                state = 'loading'
+            elif self.error is not None:
+                state = 'failed'
+            elif self.source_path() is None:
+                state = 'missing'
+            else:
+                state = 'idle'
+
+            status = {'status': state, 'loading': loading}
+            if loading:
+                status['stage'] = self.stage
+                status['progress'] = round(self._stage_fraction() * 100)
+                status['elapsed_seconds'] = round(time.monotonic() - self.started_at, 1)
+                status['loading_path'] = self.loading_path
+            if self.analyzer is not None:
+                status['path'] = self.analyzer.csv_path
+                status['rows'] = len(self.analyzer.df)
+                status['load_seconds'] = round(self.load_seconds, 2)
+                status['loaded_at'] = self.loaded_at
+                status['reloads'] = self.reloads
+                status['deltas'] = len(self.analyzer.deltas)
+                status['partitions'] = self.analyzer.partitions.stats()
+                if self.delta_seconds is not None:
+                    status['delta_seconds'] = round(self.delta_seconds, 2)
+            if self.delta_error is not None:
+                status['delta_error'] = self.delta_error
+            if self.error is not None:
+                status['error'] = self.error
+            return status
+
+    def _load(self, path):
+        """Build a new analyzer and swap it in (runs in the loader thread)"""
+        try:
+            analyzer = PCHIAnalyzer(path, build_cube=self.build_cube, progress=self._set_stage)
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+                self.stage = None
+            return
+
+        with self._lock:
+            if self.analyzer is not None:
+                self.reloads += 1
+            self.analyzer = analyzer
+            self.load_seconds = time.monotonic() - self.started_at
+            self.loaded_at = datetime.now().isoformat()
+            self.stage = None
+
+    def _merge(self, paths):
+        """Merge delta files into the loaded analyzer and swap in the result (runs in the loader thread)"""
+        analyzer = self.analyzer
+        for path in paths:
+            try:
+                analyzer = analyzer.with_delta(path)
+            except Exception as e:
+                with self._lock:
+                    self.delta_error = f"{os.path.basename(path)}: {str(e)}"
+                    try:
+                        self._failed_deltas.add((path, PCHIAnalyzer.file_version(path)))
+                    except OSError:
+                        pass
+                break
+
+        with self._lock:
+            # A full reload that finished meanwhile already has newer data
+            if analyzer is not self.analyzer and self.analyzer is not None and \
+                    (analyzer.csv_path, analyzer.version) == (self.analyzer.csv_path, self.analyzer.version):
+                self.analyzer = analyzer
+                self.delta_seconds = time.monotonic() - self.started_at
+            self.stage = None
+
+    def _poll(self, interval):
+        """Check the source forever (runs in the watcher thread)"""
+        while True:
+            time.sleep(interval)
+            try:
+                self.check()
+            except Exception:
+                pass
+
+    def _set_stage(self, stage):
+        self.stage = stage
+
+    def _stage_fraction(self):
+        """Fraction of the load stages already finished"""
+        if self.stage not in self.STAGES:
+            return 0.0
+        return self.STAGES.index(self.stage) / len(self.STAGES)
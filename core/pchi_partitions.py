@@ -0,0 +1,183 @@
+"""
+PCHI Partitions Module
+Pay-month partitions of the claims frame, paged in on first use and paged out when cold
+"""
+import mmap
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Pages can only be dropped where mmap supports madvise (not on Windows)
+MADV_DONTNEED = getattr(mmap, 'MADV_DONTNEED', None)
+
+
+class ClaimsPartitions:
+    """Contiguous row ranges of a claims frame, one per value of the partition column
+
+    ``load_claims`` keeps rows in pay-month order, so every month is one
+    range of each column, both in the snapshot files and in the frame that
+    maps them. A query filtered to some months only reads their ranges.
+    When the frame is memory-mapped, a partition's pages are only read in
+    as its rows are first used, and they are dropped again once more than
+    ``max_bytes`` of partitions are resident, least recently used first; a
+    later use reads them back from the page cache or disk. A partition is
+    counted at the size of all its mapped columns, an upper bound on what
+    the queries read. Pages of a private (parsed) frame cannot be dropped,
+    so there ``touch`` only keeps count.
+    """
+
+    def __init__(self, df, column, max_bytes=None):
+        """Partition ``df`` into runs of equal ``column`` values (one partition without the column)"""
+        self.column = column
+        self.rows = len(df)
+        self.max_bytes = max_bytes
+        self.labels, self.bounds = _runs(df, column)
+        self._buffers = [buffer for col in df.columns for buffer in _mapped_buffers(df[col].array)]
+        self.row_bytes = sum(itemsize for _, _, itemsize in self._buffers)
+        self._resident = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def with_rows(self, df):
+        """Get the partitions of ``df``, a copy of this frame with rows appended
+
+        The appended rows (a delta merge) form one extra partition; updated
+        rows stay in the partition they were loaded in.
+        """
+        partitions = ClaimsPartitions(df, None, self.max_bytes)
+        partitions.column = self.column
+        partitions.labels = list(self.labels)
+        partitions.bounds = self.bounds
+        if len(df) > self.rows:
+            partitions.labels.append(None)
+            partitions.bounds = np.append(self.bounds, len(df))
+        return partitions
+
+    def partitions_of(self, rows=None):
+        """Get the partition numbers holding ``rows`` (positions, a slice, or None for every row)"""
+        if rows is None:
+            return np.arange(len(self.labels))
+        if isinstance(rows, slice):
+            start, stop, _ = rows.indices(self.rows)
+            if start >= stop:
+                return np.empty(0, dtype=np.int64)
+            rows = np.array([start, stop - 1])
+        rows = np.asarray(rows)
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.searchsorted(self.bounds, rows, side='right') - 1)
+
+    def touch(self, rows=None):
+        """Mark the partitions holding ``rows`` as used and resident
+
+        Partitions beyond the memory budget are then paged out, least
+        recently used first. Returns the labels of the partitions touched.
+        """
+        numbers = self.partitions_of(rows)
+        with self._lock:
+            for number in numbers:
+                number = int(number)
+                if number in self._resident:
+                    self._resident.move_to_end(number)
+                    continue
+                self._resident[number] = self._size(number)
+                self.loads += 1
+
+            if self.max_bytes is not None:
+                resident = sum(self._resident.values())
+                while resident > self.max_bytes and self._resident:
+                    number, size = self._resident.popitem(last=False)
+                    self._page_out(number)
+                    self.evictions += 1
+                    resident -= size
+
+        return [self.labels[number] for number in numbers]
+
+    def evict(self, rows=None):
+        """Page out the partitions holding ``rows`` (every partition by default)"""
+        with self._lock:
+            for number in self.partitions_of(rows):
+                number = int(number)
+                self._page_out(number)
+                if self._resident.pop(number, None) is not None:
+                    self.evictions += 1
+
+    def resident(self):
+        """Get the labels of the partitions currently counted as resident"""
+        with self._lock:
+            return [self.labels[number] for number in self._resident]
+
+    def stats(self):
+        """Get partition counters and the resident size"""
+        with self._lock:
+            resident = sum(self._resident.values())
+            return {
+                'column': self.column,
+                'partitions': len(self.labels),
+                'mapped': bool(self._buffers),
+                'resident': len(self._resident),
+                'resident_mb': round(resident / (1024 * 1024), 2),
+                'max_mb': None if self.max_bytes is None else round(self.max_bytes / (1024 * 1024), 2),
+                'loads': self.loads,
+                'evictions': self.evictions
+            }
+
+    def _size(self, number):
+        """Mapped bytes of one partition"""
+        return int(self.bounds[number + 1] - self.bounds[number]) * self.row_bytes
+
+    def _page_out(self, number):
+        """Drop this process's pages of one partition in every mapped column"""
+        start, stop = int(self.bounds[number]), int(self.bounds[number + 1])
+        for buffer, offset, itemsize in self._buffers:
+            # Pages at either end may be shared with the neighbouring partitions
+            first = (offset + start * itemsize) // mmap.PAGESIZE * mmap.PAGESIZE
+            last = min(offset + stop * itemsize, len(buffer))
+            if last > first:
+                try:
+                    buffer.madvise(MADV_DONTNEED, first, last - first)
+                except (OSError, ValueError):
+                    pass
+
+
+def _runs(df, column):
+    """Get the labels and row bounds of the runs of equal values of ``column``"""
+    if column not in df.columns or len(df) == 0:
+        return [None], np.array([0, len(df)])
+
+    values = df[column]
+    codes = values.cat.codes.to_numpy() if isinstance(values.dtype, pd.CategoricalDtype) else pd.factorize(values)[0]
+    starts = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    bounds = np.concatenate([[0], starts, [len(df)]])
+    labels = values.iloc[bounds[:-1]].tolist()
+    return labels, bounds
+
+
+def _mapped_buffers(values):
+    """Get (mmap, byte offset, item size) for each memory-mapped array holding a column's data"""
+    if MADV_DONTNEED is None:
+        return []
+    if isinstance(values, pd.Categorical):
+        arrays = [values.codes]
+    elif isinstance(values, pd.core.arrays.masked.BaseMaskedArray):
+        arrays = [values._data, values._mask]
+    elif values.dtype == object:
+        return []
+    else:
+        arrays = [np.asarray(values)]
+
+    buffers = []
+    for array in arrays:
+        if array.ndim != 1 or array.strides[0] != array.itemsize:
+            continue
+        base = array
+        while isinstance(base, np.ndarray):
+            if isinstance(base, np.memmap) and isinstance(base.base, mmap.mmap):
+                offset = array.ctypes.data - base.ctypes.data + base.offset % mmap.ALLOCATIONGRANULARITY
+                buffers.append((base.base, offset, array.itemsize))
+                break
+            base = base.base
+    return buffers
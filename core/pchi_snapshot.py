@@ -0,0 +1,285 @@
+"""
+PCHI Snapshot Module
+Preprocessed claims frames persisted as memory-mappable column stores keyed by the source file hash
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from core.column_store import ColumnStore
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import ctypes
+    _libc = ctypes.CDLL('libc.so.6')
+except (ImportError, OSError):
+    _libc = None
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Get the hex SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def trim_heap():
+    """Hand memory freed after a load back to the OS (glibc only; a no-op elsewhere)
+
+    Parsing and aggregating leave large freed blocks in the malloc arenas.
+    They count as private memory in every worker until trimmed.
+    """
+    if _libc is not None and hasattr(_libc, 'malloc_trim'):
+        _libc.malloc_trim(0)
+
+
+class ClaimsSnapshot:
+    """Directory of preprocessed claims snapshots shared by every process on the host
+
+    A snapshot is a ColumnStore of the frame a loader produced, plus the
+    pandas dtypes to restore. It is named after the SHA-256 of the source
+    file and a fingerprint of the loader settings, so an edited file or a
+    changed schema never reuses a stale snapshot. File hashes are cached by
+    (mtime, size) so an unchanged file is not re-read to find its snapshot.
+
+    Every column is stored so that a memory-mapped read needs no copy:
+    nullable integers as their values plus a missing-value mask, repeated
+    text as categorical codes. Processes mapping the same snapshot (Gunicorn
+    workers, the Streamlit dashboard) then share those pages through the OS
+    page cache instead of each holding a private copy.
+    """
+
+    HASHES_FILE = 'hashes.json'
+    META_FILE = 'pchi.json'
+    DELTAS_DIR = 'deltas'
+    LOCK_FILE = '.build.lock'
+    MASK_SUFFIX = '.mask'
+    MAX_HASHES = 64
+
+    def __init__(self, directory, keep=2):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def load(self, csv_path, loader, fingerprint='', mmap=True, categorical_text=False, delta_hashes=()):
+        """Get the frame ``loader(csv_path)`` builds, from the snapshot when one exists
+
+        On a miss the frame is built, written as the new snapshot and read
+        back, so the process that built it maps the same pages as every
+        other; only the ``keep`` newest snapshots are kept. Processes
+        starting together build a snapshot once: the others wait for it.
+        With ``mmap`` column data is memory-mapped read-only instead of
+        copied, and with ``categorical_text`` text columns whose values
+        repeat stay categorical (only their distinct values are private).
+        With ``delta_hashes`` the frame is ``csv_path`` with the delta files
+        of those hashes merged in, snapshotted apart from plain extracts.
+        """
+        path = self.path_for(csv_path, fingerprint, delta_hashes)
+        df = self._read_existing(path, mmap, categorical_text)
+        if df is not None:
+            return df
+
+        with self._build_lock():
+            # Another process may have written it while this one waited
+            df = self._read_existing(path, mmap, categorical_text, remove_damaged=True)
+            if df is not None:
+                return df
+
+            df = loader(csv_path)
+            try:
+                self.write(path, df)
+                self._prune(path)
+                self._prune_hashes()
+            except OSError:
+                # A read-only or full disk only costs the next start a reparse
+                return df
+
+        return self._read_existing(path, mmap, categorical_text) if mmap else df
+
+    def path_for(self, csv_path, fingerprint='', delta_hashes=()):
+        """Get the snapshot directory for the current contents of ``csv_path``, with ``delta_hashes`` merged in order"""
+        key = '\0'.join([self.file_hash(csv_path), fingerprint, *delta_hashes])
+        key = hashlib.sha256(key.encode()).hexdigest()[:32]
+        if delta_hashes:
+            return os.path.join(self.directory, self.DELTAS_DIR, key)
+        return os.path.join(self.directory, key)
+
+    def file_hash(self, csv_path):
+        """Get the SHA-256 of a file, reusing the cached hash while its mtime and size are unchanged"""
+        stat = os.stat(csv_path)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        source = os.path.abspath(csv_path)
+
+        with self._lock:
+            hashes = self._read_hashes()
+        cached = hashes.get(source)
+        if cached and cached['signature'] == signature:
+            return cached['sha256']
+
+        sha256 = file_sha256(csv_path)
+        with self._lock:
+            hashes = self._read_hashes()
+            # Re-inserted so the most recently hashed sources come last
+            hashes.pop(source, None)
+            hashes[source] = {'signature': signature, 'sha256': sha256}
+            self._write_json(os.path.join(self.directory, self.HASHES_FILE), hashes)
+        return sha256
+
+    def write(self, path, df):
+        """Write ``df`` as the snapshot at ``path``
+
+        The snapshot is built in a private directory and renamed into place,
+        so a reader never sees partial files.
+        """
+        columns = {}
+        masked = []
+        text = []
+        for col in df.columns:
+            values = df[col].array
+            if isinstance(values, pd.core.arrays.masked.BaseMaskedArray):
+                columns[col] = values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0)
+                columns[col + self.MASK_SUFFIX] = values.isna()
+                masked.append(col)
+            elif df[col].dtype == object:
+                # Sorted categories keep the text sort order of the column
+                columns[col] = pd.Categorical(values)
+                if len(columns[col].categories) <= len(df) // 2:
+                    text.append(col)
+            else:
+                columns[col] = values
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=directory)
+        try:
+            store_path = os.path.join(staging, 'store')
+            ColumnStore(store_path).write(pd.DataFrame(columns, copy=False))
+            meta = {
+                'rows': len(df),
+                'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+                'masked': masked,
+                'categorical_text': text
+            }
+            self._write_json(os.path.join(store_path, self.META_FILE), meta)
+            try:
+                os.replace(store_path, path)
+            except OSError:
+                # Another process finished the same snapshot first
+                if not os.path.exists(os.path.join(path, self.META_FILE)):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def read(self, path, mmap=True, categorical_text=False):
+        """Read a snapshot back with the dtypes the loader produced
+
+        With ``categorical_text`` the repeated text columns are returned as
+        categoricals instead of object columns.
+        """
+        with open(os.path.join(path, self.META_FILE), 'r') as f:
+            meta = json.load(f)
+
+        store = ColumnStore(path).read(mmap=mmap, categorical=True)
+        keep = set(meta.get('categorical_text', [])) if categorical_text else set()
+        masked = set(meta.get('masked', []))
+
+        columns = {}
+        for col, dtype in meta['dtypes'].items():
+            values = store[col]
+            if col in masked:
+                array_type = pd.api.types.pandas_dtype(dtype).construct_array_type()
+                mask = store[col + self.MASK_SUFFIX].to_numpy()
+                columns[col] = array_type(values.to_numpy(), mask, copy=False)
+            elif str(values.dtype) != dtype and col not in keep:
+                # Text is stored as categories
+                columns[col] = values.astype(dtype)
+            else:
+                columns[col] = values
+        return pd.DataFrame(columns, copy=False)
+
+    def _read_existing(self, path, mmap, categorical_text, remove_damaged=False):
+        """Read the snapshot at ``path``, or None when it is missing or damaged
+
+        Only missing or malformed snapshot files count as damage; any other
+        error propagates. With ``remove_damaged`` (only under the build lock)
+        a damaged snapshot is deleted so it can be rebuilt from the source.
+        """
+        if not os.path.exists(os.path.join(path, self.META_FILE)):
+            return None
+        try:
+            return self.read(path, mmap=mmap, categorical_text=categorical_text)
+        except (FileNotFoundError, ValueError, KeyError):
+            if remove_damaged:
+                shutil.rmtree(path, ignore_errors=True)
+            return None
+
+    @contextmanager
+    def _build_lock(self):
+        """Hold the directory's build lock, shared by every process and thread (POSIX only)"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, self.LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _prune(self, keep):
+        """Remove all but the ``self.keep`` most recently written snapshots next to ``keep``
+
+        ``keep`` (the snapshot just written) always stays. Extract and merged
+        snapshots are counted apart. Processes still mapping a removed
+        snapshot keep reading it until they reload; its files only disappear
+        once the last mapping is closed.
+        """
+        directory = os.path.dirname(keep)
+        snapshots = []
+        for name in os.listdir(directory):
+            meta = os.path.join(directory, name, self.META_FILE)
+            if os.path.join(directory, name) != keep and os.path.exists(meta):
+                snapshots.append((os.path.getmtime(meta), name))
+        for _, name in sorted(snapshots, reverse=True)[max(self.keep - 1, 0):]:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    def _prune_hashes(self):
+        """Drop cached hashes of sources that no longer exist, keeping at most ``MAX_HASHES`` of the newest"""
+        with self._lock:
+            hashes = self._read_hashes()
+            kept = [(source, entry) for source, entry in hashes.items() if os.path.exists(source)]
+            kept = dict(kept[-self.MAX_HASHES:])
+            if len(kept) != len(hashes):
+                self._write_json(os.path.join(self.directory, self.HASHES_FILE), kept)
+
+    def _read_hashes(self):
+        try:
+            with open(os.path.join(self.directory, self.HASHES_FILE), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_json(self, path, data):
+        """Atomically replace a small JSON file"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.json-', suffix='.tmp', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
@@ -0,0 +1,122 @@
+"""
+Query Cache Module
+Memoized analyzer results keyed by query method, filters and data version
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+
+
+def canonical_filters(filters):
+    """Normalize a filters dict into a hashable key
+
+    Empty selections are dropped and selected values are sorted, so filter
+    sets that select the same rows share one key regardless of order.
+    """
+    if not filters:
+        return ()
+
+    items = []
+    for key, values in filters.items():
+        if values is None or values == '' or values == [] or values == {}:
+            continue
+        if isinstance(values, (list, tuple, set)):
+            values = tuple(sorted(set(values), key=lambda v: (type(v).__name__, v)))
+        items.append((key, values))
+
+    return tuple(sorted(items))
+
+
+def _canonical_param(value):
+    """Make a query parameter hashable"""
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return value
+
+
+class QueryCache:
+    """LRU cache of query results with a time-to-live per entry"""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = None
+        self._retired = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, method, filters, version, compute, **params):
+        """Get a query result, computing and caching it on a miss
+
+        ``version`` identifies the loaded data (e.g. the source file's mtime
+        and size); when it changes every cached result is dropped. Requests
+        still running on a replaced version are computed but never cached.
+        Returns ``(result, hit)``.
+        """
+        key = (method, canonical_filters(filters),
+               tuple(sorted((name, _canonical_param(value)) for name, value in params.items())))
+        now = time.monotonic()
+
+        with self._lock:
+            if version in self._retired:
+                self.misses += 1
+                retired = True
+            else:
+                retired = False
+                if version != self.version:
+                    if self.version is not None:
+                        self._retired.add(self.version)
+                    self._entries.clear()
+                    self.version = version
+
+        if retired:
+            return compute(), False
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires'] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['result'], True
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+
+        result = compute()
+
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = {'result': result, 'expires': time.monotonic() + self.ttl_seconds}
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return result, False
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Get cache counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+# Shared by every PCHI endpoint in the process
+query_cache = QueryCache(Config.PCHI_QUERY_CACHE_SIZE, Config.PCHI_QUERY_CACHE_TTL)
@@ -0,0 +1,210 @@
+"""
+User Store Module
+Storage backends for user accounts: a JSON file or an embedded SQLite database
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import closing
+
+
+class JSONUserStore:
+    """User accounts in one JSON file keyed by username
+
+    The file is re-read only when it changes on disk and is replaced
+    atomically on every write, so readers never see a half-written file.
+    Writes within one process are serialized; concurrent writers in several
+    processes can still overwrite each other, which the SQLite store avoids.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._users = None
+        self._version = None
+
+    def exists(self):
+        """Whether the users file exists"""
+        return os.path.exists(self.path)
+
+    def _file_version(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        """Get the users dict, reloading the file only if it changed (call with the lock held)"""
+        version = self._file_version()
+        if self._users is None or version != self._version:
+            try:
+                with open(self.path, 'r') as f:
+                    self._users = json.load(f)
+            except Exception:
+                self._users = {}
+            self._version = version
+        return self._users
+
+    def _save(self, users):
+        """Atomically replace the file with ``users`` (call with the lock held)"""
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(prefix='.users-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(users, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self._users = users
+        self._version = self._file_version()
+
+    def get(self, username):
+        """Get a copy of a user's record, or None"""
+        with self._lock:
+            user = self._load().get(username)
+            return dict(user) if user else None
+
+    def all(self):
+        """Get every user record keyed by username"""
+        with self._lock:
+            return {username: dict(user) for username, user in self._load().items()}
+
+    def add(self, user):
+        """Add a user record; returns False if the username is taken"""
+        with self._lock:
+            users = dict(self._load())
+            if user['username'] in users:
+                return False
+            users[user['username']] = user
+            self._save(users)
+            return True
+
+    def update(self, username, **fields):
+        """Update fields of a user record; returns False if the user does not exist"""
+        with self._lock:
+            users = dict(self._load())
+            if username not in users:
+                return False
+            users[username] = {**users[username], **fields}
+            self._save(users)
+            return True
+
+    def update_passwords(self, changes):
+        """Apply ``(username, expected_password, new_password)`` changes in one write
+
+        A change is skipped if the stored password is no longer the expected
+        one. Returns the number of passwords changed.
+        """
+        with self._lock:
+            users = dict(self._load())
+            changed = 0
+            for username, expected, new in changes:
+                if username in users and users[username]['password'] == expected:
+                    users[username] = {**users[username], 'password': new}
+                    changed += 1
+            if changed:
+                self._save(users)
+            return changed
+
+
+class SQLiteUserStore:
+    """User accounts in an embedded SQLite database
+
+    Usernames are the primary key, every write is its own transaction and
+    WAL mode lets readers in other workers proceed while one writes.
+    """
+
+    FIELDS = ['username', 'id', 'password', 'email', 'created_at', 'role', 'needs_reset']
+
+    def __init__(self, path):
+        self.path = path
+        self._exists = os.path.exists(path)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    id TEXT NOT NULL,
+                    password TEXT NOT NULL,
+                    email TEXT,
+                    created_at TEXT,
+                    role TEXT,
+                    needs_reset INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+    def exists(self):
+        """Whether the database file existed before this store opened it"""
+        return self._exists
+
+    def _connect(self):
+        # sqlite3 connections are bound to the thread that opened them, so each login or
+        # password change opens its own and closes it with the transaction
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _record(self, row):
+        user = dict(zip(self.FIELDS, row))
+        user['needs_reset'] = bool(user['needs_reset'])
+        return user
+
+    def get(self, username):
+        """Get a user's record, or None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"SELECT {', '.join(self.FIELDS)} FROM users WHERE username = ?",
+                               (username,)).fetchone()
+        return self._record(row) if row else None
+
+    def all(self):
+        """Get every user record keyed by username"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT {', '.join(self.FIELDS)} FROM users").fetchall()
+        return {row[0]: self._record(row) for row in rows}
+
+    def add(self, user):
+        """Add a user record; returns False if the username is taken"""
+        values = [user.get(field) for field in self.FIELDS]
+        values[-1] = int(bool(user.get('needs_reset')))
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(f"INSERT INTO users ({', '.join(self.FIELDS)}) "
+                             f"VALUES ({', '.join('?' * len(self.FIELDS))})", values)
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def update(self, username, **fields):
+        """Update fields of a user record; returns False if the user does not exist"""
+        fields = {name: value for name, value in fields.items() if name in self.FIELDS and name != 'username'}
+        if 'needs_reset' in fields:
+            fields['needs_reset'] = int(bool(fields['needs_reset']))
+        if not fields:
+            return self.get(username) is not None
+
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(f"UPDATE users SET {', '.join(f'{name} = ?' for name in fields)} WHERE username = ?",
+                                  [*fields.values(), username])
+        return cursor.rowcount > 0
+
+    def update_passwords(self, changes):
+        """Apply ``(username, expected_password, new_password)`` changes in one transaction
+
+        A change is skipped if the stored password is no longer the expected
+        one. Returns the number of passwords changed.
+        """
+        with closing(self._connect()) as conn, conn:
+            changed = 0
+            for username, expected, new in changes:
+                changed += conn.execute("UPDATE users SET password = ? WHERE username = ? AND password = ?",
+                                        (new, username, expected)).rowcount
+        return changed
+
+
+def open_user_store(path):
+    """Open the user store backend matching the file extension (.db/.sqlite → SQLite, else JSON)"""
+    if os.path.splitext(path)[1].lower() in ('.db', '.sqlite', '.sqlite3'):
+        return SQLiteUserStore(path)
+    return JSONUserStore(path)
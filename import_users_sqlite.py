@@ -0,0 +1,50 @@
+"""
+Import users from the JSON users file into a SQLite user store
+
+Usage: python import_users_sqlite.py [users.json] [users.db]
+Then set USERS_FILE to the .db path to switch the app over.
+"""
+import os
+import sys
+
+from core.user_store import JSONUserStore, SQLiteUserStore
+
+
+def import_users_sqlite(users_file='data/users.json', db_file='data/users.db'):
+    print("=" * 60)
+    print("User Store Import")
+    print("=" * 60)
+
+    if not os.path.exists(users_file):
+        print(f"\n❌ Users file not found: {users_file}")
+        return
+
+    users = JSONUserStore(users_file).all()
+    print(f"\n📋 Found {len(users)} users in {users_file}")
+
+    store = SQLiteUserStore(db_file)
+    imported = []
+    skipped = []
+
+    for username, user_data in users.items():
+        # Older records may predate the username field
+        user_data = {**user_data, 'username': user_data.get('username', username)}
+        if 'id' not in user_data or 'password' not in user_data:
+            print(f"⚠️  User '{username}' - missing id or password, skipped")
+            skipped.append(username)
+        elif store.add(user_data):
+            imported.append(username)
+        else:
+            print(f"⚠️  User '{username}' - already in {db_file}, skipped")
+            skipped.append(username)
+
+    print(f"\n" + "=" * 60)
+    print(f"✅ Import complete!")
+    print(f"   - {len(imported)} users imported into {db_file}")
+    print(f"   - {len(skipped)} users skipped")
+    print(f"   Set USERS_FILE={db_file} to use the SQLite store")
+    print(f"=" * 60)
+
+
+if __name__ == '__main__':
+    import_users_sqlite(*sys.argv[1:3])
@@ -0,0 +1,29 @@
+"""
+Rebuild the dataset catalog from the metadata JSON files
+
+Usage: python rebuild_dataset_catalog.py [datasets_dir]
+"""
+import os
+import sys
+
+from core.dataset_catalog import DatasetCatalog
+
+
+def rebuild_dataset_catalog(datasets_path='data/datasets'):
+    print("=" * 60)
+    print("Dataset Catalog Rebuild")
+    print("=" * 60)
+
+    if not os.path.isdir(datasets_path):
+        print(f"\n❌ Datasets directory not found: {datasets_path}")
+        return
+
+    catalog = DatasetCatalog(datasets_path)
+    count = catalog.rebuild()
+
+    print(f"\n✅ Indexed {count} datasets into {catalog.path}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    rebuild_dataset_catalog(sys.argv[1] if len(sys.argv) > 1 else 'data/datasets')
@@ -0,0 +1,97 @@
+"""
+Generate a synthetic PCHI claims file
+Used by the PCHI tests and benchmarks when the real extract is not available
+"""
+import sys
+import numpy as np
+import pandas as pd
+
+
+STATUSES = ['Accept', 'Reject', 'Pending']
+BUSINESS_UNITS = ['Group', 'Individual', 'Bancassurance', 'SME']
+CHANNELS = ['Agent', 'Broker', 'Bank', 'Direct', 'Online', 'Telesales']
+BENEFIT_TYPES = ['IPD Room & Board', 'OPD General', 'Surgery', 'Dental', 'Maternity',
+                 'Lab & X-Ray', 'Emergency', 'Physiotherapy', 'Medicine', 'ICU']
+GENDERS = ['M', 'F']
+
+
+def generate_sample(path, rows=10000, seed=42):
+    """Write ``rows`` synthetic claims shaped like the PCHI summary extract"""
+    sample_frame(rows, seed).to_csv(path, index=False, date_format='%Y-%m-%d')
+    return path
+
+
+def generate_delta(path, base_rows, updated=100, added=100, seed=7, update_date='2026-01-15'):
+    """Write a delta extract for a sample of ``base_rows`` claims
+
+    The first ``updated`` rows revise random existing claims and the other
+    ``added`` rows are new claims numbered after the base ones. Every row is
+    stamped with ``update_date`` as its UPDATE_DATE.
+    """
+    rng = np.random.default_rng(seed)
+    df = sample_frame(updated + added, seed)
+    numbers = np.concatenate([rng.choice(np.arange(1, base_rows + 1), updated, replace=False),
+                              np.arange(base_rows + 1, base_rows + added + 1)])
+    df['CL_NO'] = [f"CL{n:08d}" for n in numbers]
+    df['UPDATE_DATE'] = pd.Timestamp(update_date)
+    df.to_csv(path, index=False, date_format='%Y-%m-%d')
+    return path
+
+
+def sample_frame(rows, seed=42):
+    """Build ``rows`` synthetic claims as a DataFrame"""
+    rng = np.random.default_rng(seed)
+
+    paydate = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 2125, rows), unit='D')
+    receipt = paydate - pd.to_timedelta(rng.integers(1, 30, rows), unit='D')
+    sick_from = receipt - pd.to_timedelta(rng.integers(0, 10, rows), unit='D')
+    policy_eff = sick_from - pd.to_timedelta(rng.integers(30, 1000, rows), unit='D')
+
+    claimed = np.round(rng.gamma(2.0, 4000.0, rows), 2)
+    status = rng.choice(STATUSES, rows, p=[0.85, 0.1, 0.05])
+    approved = np.where(status == 'Accept', np.round(claimed * rng.uniform(0.6, 1.0, rows), 2), 0.0)
+    incurred = np.round(np.maximum(approved, claimed * rng.uniform(0.8, 1.0, rows)), 2)
+
+    df = pd.DataFrame({
+        'CL_NO': [f"CL{n:08d}" for n in range(1, rows + 1)],
+        'CLAIM_STATUS': status,
+        'PROVIDER': [f"Hospital {n:03d}" for n in rng.integers(1, 250, rows)],
+        'POLICYHOLDER': [f"Company {n:04d}" for n in rng.integers(1, 2000, rows)],
+        'Member Name': [f"Member {n:06d}" for n in rng.integers(1, rows // 3 + 2, rows)],
+        'Gender': rng.choice(GENDERS, rows),
+        'AGE': rng.integers(0, 90, rows).astype(float),
+        'BU': rng.choice(BUSINESS_UNITS, rows),
+        'PRODUCT': [f"Product {n:02d}" for n in rng.integers(1, 40, rows)],
+        'DISTRIBUTION': rng.choice(CHANNELS, rows),
+        'BEN_TYPE_DESC': rng.choice(BENEFIT_TYPES, rows),
+        'DIAGNOSIS_DETAILS': [f"ICD-{n:03d}" for n in rng.integers(1, 500, rows)],
+        'POLICY EFF DATE': policy_eff,
+        'POLICY EXP DATE': policy_eff + pd.Timedelta(days=365),
+        'SICK/FROM': sick_from,
+        'SICK/TO': sick_from + pd.to_timedelta(rng.integers(0, 7, rows), unit='D'),
+        'RECEIPT/DT': receipt,
+        'PAYDATE': paydate,
+        'CHQDATE': paydate + pd.to_timedelta(rng.integers(0, 5, rows), unit='D'),
+        'CREATE_DATE': receipt,
+        'UPDATE_DATE': paydate,
+        'INCURRED': incurred,
+        'APPROVED': approved,
+        'CLAIMED': claimed,
+        'OUTSTANDING': np.round(incurred - approved, 2),
+        'DED_AMT': np.round(rng.choice([0.0, 500.0, 1000.0], rows), 2),
+        'COPAY_AMT': np.round(claimed * rng.choice([0.0, 0.1, 0.2], rows), 2),
+        'MANUAL_REJECTED_AMT': np.round(claimed - approved, 2),
+    })
+
+    # Sprinkle missing values into the optional columns
+    for col in ['PROVIDER', 'DISTRIBUTION', 'AGE', 'Gender', 'PAYDATE', 'PRODUCT']:
+        df.loc[rng.random(rows) < 0.01, col] = None
+
+    return df
+
+
+if __name__ == '__main__':
+    output = sys.argv[1] if len(sys.argv) > 1 else 'data/uploads/sample_pchi_claims.csv'
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    generate_sample(output, count)
+    print(f"Wrote {count:,} synthetic claims to {output}")
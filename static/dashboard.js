@@ -4,6 +4,8 @@ let datasets = [];
 let selectedDataset = null;
 let currentWidgetId = null;
 let widgetCounter = 0;
+let widgetConfigs = {};  // Chart spec of each widget, saved with the layout so it can be re-rendered
+let currentDashboardId = null;
 
 // Initialize
 document.addEventListener('DOMContentLoaded', function() {
@@ -171,6 +173,8 @@ async function createChart() {
     const yColumn = document.getElementById('chart-y-column').value;
     const aggregation = document.getElementById('chart-aggregation').value;
     const limit = parseInt(document.getElementById('chart-limit').value);
+    const downsample = document.getElementById('chart-downsample').value;
+    const other = document.getElementById('chart-other').checked;
     
     if (!datasetId) {
         alert('Please select a dataset');
@@ -186,8 +190,12 @@ async function createChart() {
         x_column: xColumn,
         y_column: yColumn,
         aggregation: aggregation,
-        limit: limit
+        limit: limit,
+        other: other
     };
+    if (downsample && (chartType === 'line' || chartType === 'area')) {
+        config.downsample = downsample;
+    }
     
     try {
         const response = await fetch('/api/chart/create', {
@@ -202,6 +210,7 @@ async function createChart() {
         
         if (response.ok) {
             const chartData = await response.json();
+            widgetConfigs[currentWidgetId] = { dataset_id: datasetId, chart_type: chartType, config: config };
             addChartWidget(currentWidgetId, chartData);
             closeModal('chart-modal');
             hideEmptyState();
@@ -214,10 +223,13 @@ async function createChart() {
     }
 }
 
-// Add chart widget to grid
-function addChartWidget(widgetId, chartData) {
+// Add chart widget to grid (at a saved position if given)
+function addChartWidget(widgetId, chartData, position) {
+    const place = position
+        ? `gs-x="${position.x}" gs-y="${position.y}" gs-w="${position.w || 6}" gs-h="${position.h || 4}"`
+        : 'gs-w="6" gs-h="4"';
     const widgetHtml = `
-        <div class="grid-stack-item" gs-w="6" gs-h="4" gs-id="${widgetId}">
+        <div class="grid-stack-item" ${place} gs-id="${widgetId}">
             <div class="grid-stack-item-content">
                 <div class="widget-header">
                     <div class="widget-title">${chartData.type.charAt(0).toUpperCase() + chartData.type.slice(1)} Chart</div>
@@ -268,6 +280,8 @@ function renderChart(widgetId, chartData) {
             options: {
                 responsive: true,
                 maintainAspectRatio: false,
+                // Animating tens of thousands of points stalls the page
+                animation: chartData.data.data.length > 2000 ? false : {},
                 plugins: {
                     legend: { display: false }
                 },
@@ -365,6 +379,7 @@ function removeWidget(widgetId) {
     if (elements.length > 0) {
         grid.removeWidget(elements[0].el);
     }
+    delete widgetConfigs[widgetId];
     
     if (grid.engine.nodes.length === 0) {
         showEmptyState();
@@ -375,13 +390,14 @@ function removeWidget(widgetId) {
 function clearDashboard() {
     if (confirm('Are you sure you want to clear all widgets?')) {
         grid.removeAll();
+        widgetConfigs = {};
         showEmptyState();
     }
 }
 
 // Save dashboard
 async function saveDashboard() {
-    const layout = grid.save();
+    const layout = grid.save(false).map(item => ({ ...item, chart: widgetConfigs[item.id] }));
     const dashboardName = prompt('Enter dashboard name:', 'My Dashboard');
     
     if (!dashboardName) return;
@@ -391,12 +407,14 @@ async function saveDashboard() {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
+                ...(currentDashboardId ? { id: currentDashboardId } : {}),
                 name: dashboardName,
                 layout: layout
             })
         });
         
         if (response.ok) {
+            currentDashboardId = (await response.json()).dashboard_id;
             showToast('Dashboard saved successfully!');
         } else {
             alert('Failed to save dashboard');
@@ -406,6 +424,69 @@ async function saveDashboard() {
     }
 }
 
+// Open a saved dashboard
+async function openDashboard() {
+    try {
+        const response = await fetch('/api/dashboards');
+        const dashboards = await response.json();
+        if (dashboards.length === 0) {
+            alert('No saved dashboards yet');
+            return;
+        }
+        
+        const choice = prompt('Open which dashboard?\n' +
+            dashboards.map((d, i) => `${i + 1}. ${d.name}`).join('\n'), '1');
+        const dashboard = dashboards[parseInt(choice) - 1];
+        if (dashboard) {
+            await loadDashboard(dashboard.id);
+        }
+    } catch (error) {
+        alert('Failed to load dashboards: ' + error.message);
+    }
+}
+
+// Render every widget of a saved dashboard with one request
+async function loadDashboard(dashboardId) {
+    try {
+        const response = await fetch(`/api/dashboard/${dashboardId}/render`);
+        if (!response.ok) {
+            alert('Failed to load dashboard');
+            return;
+        }
+        const dashboard = await response.json();
+        
+        grid.removeAll();
+        widgetConfigs = {};
+        currentDashboardId = dashboard.id;
+        document.querySelector('.dashboard-title').textContent = dashboard.name;
+        
+        const positions = Object.fromEntries(dashboard.layout.map(item => [item.id, item]));
+        let failed = 0;
+        dashboard.widgets.forEach(widget => {
+            if (widget.error) {
+                failed++;
+                return;
+            }
+            widgetConfigs[widget.id] = positions[widget.id].chart;
+            addChartWidget(widget.id, widget.chart, positions[widget.id]);
+            
+            // Keep new widget ids clear of the loaded ones
+            const number = parseInt(String(widget.id).replace('widget-', ''));
+            if (!isNaN(number)) {
+                widgetCounter = Math.max(widgetCounter, number);
+            }
+        });
+        
+        if (dashboard.widgets.length > failed) {
+            hideEmptyState();
+        }
+        showToast(`Loaded ${dashboard.widgets.length - failed} widgets in ${dashboard.total_ms} ms` +
+            (failed ? ` (${failed} failed)` : ''));
+    } catch (error) {
+        alert('Failed to load dashboard: ' + error.message);
+    }
+}
+
 // Modal functions
 function openUploadModal() {
     document.getElementById('upload-modal').classList.add('active');
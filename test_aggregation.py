@@ -0,0 +1,95 @@
+"""
+Test the shared aggregation engine
+"""
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+from core.aggregation import aggregate
+from core.chart_builder import ChartBuilder
+from core.data_processor import DataProcessor
+
+
+def test_aggregation():
+    print("=" * 60)
+    print("Testing Aggregation Engine")
+    print("=" * 60)
+
+    df = pd.DataFrame({
+        'Region': ['North', 'South', 'North', 'East', 'West', 'South', 'North', 'East', None],
+        'Sales': [100.0, 250.0, None, 125.0, 10.0, 50.0, 300.0, 75.0, 999.0],
+        'Units': [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    })
+    grouped = df.groupby('Region')
+
+    # Test 1: Several measures in one pass
+    print("\n1. Aggregating several measures...")
+    result = aggregate(df, 'Region', [('Sales', 'sum'), ('*', 'count'), ('Sales', 'count'),
+                                      ('Units', 'mean'), ('Sales', 'min'), ('Units', 'max', 'peak')])
+    assert list(result.columns) == ['sum(Sales)', 'count(*)', 'count(Sales)', 'mean(Units)', 'min(Sales)', 'peak']
+    assert list(result.index) == ['East', 'North', 'South', 'West']
+    pd.testing.assert_series_equal(result['sum(Sales)'], grouped['Sales'].sum(), check_names=False)
+    pd.testing.assert_series_equal(result['count(*)'], grouped.size(), check_names=False)
+    pd.testing.assert_series_equal(result['count(Sales)'], grouped['Sales'].count(), check_names=False)
+    pd.testing.assert_series_equal(result['mean(Units)'], grouped['Units'].mean(), check_names=False)
+    pd.testing.assert_series_equal(result['min(Sales)'], grouped['Sales'].min(), check_names=False)
+    pd.testing.assert_series_equal(result['peak'], grouped['Units'].max(), check_names=False)
+    print("   ✅ Matches separate pandas groupbys")
+
+    # Test 2: Top-N with an "Other" bucket
+    print("\n2. Keeping the top 2 regions...")
+    top = aggregate(df, 'Region', [('Sales', 'sum'), ('Units', 'mean'), ('Sales', 'max')],
+                    sort_by='sum(Sales)', limit=2, other='Other')
+    assert list(top.index) == ['North', 'South', 'Other']
+    rest = df[df['Region'].isin(['East', 'West'])]
+    assert top.loc['Other', 'sum(Sales)'] == rest['Sales'].sum()
+    assert top.loc['Other', 'mean(Units)'] == rest['Units'].mean()
+    assert top.loc['Other', 'max(Sales)'] == rest['Sales'].max()
+    assert list(aggregate(df, 'Region', [('Sales', 'sum')], sort_by='sum(Sales)', limit=2).index) == ['North', 'South']
+    print("   ✅ Other combines the remaining groups exactly, means included")
+
+    # Test 3: Charts use the engine
+    print("\n3. Building charts...")
+    builder = ChartBuilder()
+    bar = builder._create_categorical_chart(df, 'Region', 'Sales', 'mean', 3, 'value')
+    expected = grouped['Sales'].mean().sort_values(ascending=False).head(3)
+    assert bar['labels'] == list(expected.index) and bar['values'] == list(expected.values)
+    pie = builder._create_pie_chart(df, 'Region', None, 'sum', 2, 'Other')
+    assert pie == {'labels': ['North', 'East', 'Other'], 'values': [3.0, 2.0, 3.0]}
+    print("   ✅ Bar and pie data unchanged, Other slice available")
+
+    # Test 4: aggregate_data with several measures
+    print("\n4. Aggregating a stored dataset...")
+    workdir = tempfile.mkdtemp()
+    try:
+        csv_path = os.path.join(workdir, 'sales.csv')
+        df.to_csv(csv_path, index=False)
+        processor = DataProcessor()
+        processor.datasets_path = os.path.join(workdir, 'datasets')
+        os.makedirs(processor.datasets_path)
+        meta = processor.process_csv(csv_path, 'tester', 'sales.csv')
+
+        single = processor.aggregate_data(meta['id'], 'tester', 'Region', 'Sales', 'sum')
+        assert single['labels'] == ['East', 'North', 'South', 'West']
+        assert single['values'] == grouped['Sales'].sum().tolist()
+
+        multi = processor.aggregate_data(meta['id'], 'tester', 'Region',
+                                         measures=[('Sales', 'sum'), ('*', 'count')],
+                                         sort_by='count(*)', limit=1, other='Other')
+        assert multi['labels'] == ['North', 'Other']
+        assert multi['measures']['count(*)'] == [3, 5]
+        assert np.isclose(multi['measures']['sum(Sales)'][1], 510.0)
+        assert processor.aggregate_data(meta['id'], 'tester', 'Region', 'Sales', 'median') is None
+        print("   ✅ One call returns every measure")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("Aggregation test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_aggregation()
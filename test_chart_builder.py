@@ -0,0 +1,48 @@
+"""
+Test chart data generation
+"""
+import numpy as np
+import pandas as pd
+
+from core.chart_builder import ChartBuilder
+
+
+def test_chart_builder():
+    print("=" * 60)
+    print("Testing Chart Builder")
+    print("=" * 60)
+
+    builder = ChartBuilder()
+    df = pd.DataFrame({
+        'Price': np.arange(1000, dtype='float64'),
+        'Units': np.arange(1000) * 2
+    })
+    df.loc[::4, 'Price'] = np.nan
+    df.loc[1, 'Units'] = None
+
+    # Test 1: Small data is returned whole, nulls dropped
+    print("\n1. Building a scatter chart under the point limit...")
+    chart = builder._create_scatter_chart(df, 'Price', 'Units', max_points=5000, seed=42)
+    assert chart['total_points'] == 749 and not chart['sampled']
+    assert len(chart['data']) == 749
+    assert chart['data'][0] == {'x': 2.0, 'y': 4.0}
+    print("   ✅ Every complete row plotted")
+
+    # Test 2: Seeded sampling
+    print("\n2. Sampling above the point limit...")
+    first = builder._create_scatter_chart(df, 'Price', 'Units', max_points=100, seed=42)
+    again = builder._create_scatter_chart(df, 'Price', 'Units', max_points=100, seed=42)
+    other = builder._create_scatter_chart(df, 'Price', 'Units', max_points=100, seed=7)
+    assert len(first['data']) == 100 and first['sampled'] and first['total_points'] == 749
+    assert first['data'] == again['data'] and first['data'] != other['data']
+    xs = [point['x'] for point in first['data']]
+    assert xs == sorted(xs) and all(point['y'] == point['x'] * 2 for point in first['data'])
+    print("   ✅ Same seed, same points, in row order")
+
+    print("\n" + "=" * 60)
+    print("Chart builder test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_chart_builder()
@@ -0,0 +1,116 @@
+"""
+Test streaming exports of filtered PCHI claims
+"""
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from sample_pchi_data import generate_sample
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_claims_export():
+    print("=" * 60)
+    print("Testing Claims Export")
+    print("=" * 60)
+
+    sys.path.insert(0, REPO)
+    import app as app_module
+    from config import Config
+    from core.auth_manager import AuthManager
+    from core.claims_export import available_formats, export_stream
+    from core.pchi_loader import PCHILoader
+
+    workdir = tempfile.mkdtemp()
+    previous = (app_module.pchi_loader, app_module.auth_manager, Config.PCHI_SNAPSHOT_DIR)
+    try:
+        csv_path = os.path.join(workdir, 'claims.csv')
+        generate_sample(csv_path, rows=3000)
+
+        # Serve the sample through the app, whatever it was first imported with
+        Config.PCHI_SNAPSHOT_DIR = os.path.join(workdir, 'snapshots')
+        app_module.auth_manager = AuthManager(os.path.join(workdir, 'users.json'))
+        app_module.pchi_loader = PCHILoader(csv_path)
+        app_module.pchi_loader.start()
+        app = app_module.app
+
+        analyzer = None
+        deadline = time.monotonic() + 60
+        while analyzer is None and time.monotonic() < deadline:
+            analyzer = app_module.get_pchi_analyzer()
+            time.sleep(0.1)
+        assert analyzer is not None, "PCHI data did not load"
+
+        filters = {'years': [2022, 2023], 'statuses': ['Accept']}
+        columns = analyzer.table.columns
+        rows = analyzer._apply_filters(filters).sort_values('FILE_ROW')
+        expected = rows[columns].to_csv(index=False, date_format='%Y-%m-%d')
+
+        # Test 1: Chunks join into the same CSV as one to_csv call
+        print("\n1. Chunked CSV...")
+        positions = analyzer.table.positions(filters)
+        chunks = list(export_stream(analyzer.df, positions, columns, 'csv', chunk_rows=250))
+        assert len(chunks) > 2 and b''.join(chunks).decode('utf-8') == expected
+        empty = b''.join(export_stream(analyzer.df, positions[:0], columns, 'csv')).decode('utf-8')
+        assert empty.strip() == ','.join(columns)
+        print(f"   ✅ {len(chunks)} chunks, identical to a single to_csv")
+
+        client = app.test_client()
+        assert client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'}).status_code == 200
+
+        # Test 2: Streamed endpoint, plain and gzip
+        print("\n2. Export endpoint...")
+        response = client.post('/api/pchi/export', json={'filters': filters})
+        assert response.status_code == 200 and response.is_streamed
+        assert response.headers['Content-Disposition'].endswith('.csv"')
+        assert response.get_data(as_text=True) == expected
+
+        response = client.post('/api/pchi/export', json={'filters': filters, 'format': 'csv.gz'})
+        assert response.mimetype == 'application/gzip'
+        assert gzip.decompress(response.get_data()).decode('utf-8') == expected
+        print("   ✅ CSV and gzip downloads match")
+
+        # Test 3: Form submit with sort and column choice
+        print("\n3. Sorted form download...")
+        payload = '{"filters": {"years": [2022]}, "sort_by": "APPROVED", "ascending": false, "columns": ["CL_NO", "APPROVED"]}'
+        response = client.post('/api/pchi/export', data={'payload': payload})
+        frame = pd.read_csv(io.StringIO(response.get_data(as_text=True)))
+        assert list(frame.columns) == ['CL_NO', 'APPROVED']
+        approved = frame['APPROVED'].dropna()
+        assert approved.is_monotonic_decreasing and frame['APPROVED'].isna().sum() == len(frame) - len(approved)
+        print(f"   ✅ {len(frame):,} rows, largest approved first")
+
+        # Test 4: Parquet when pyarrow is installed, bad requests rejected
+        print("\n4. Parquet and errors...")
+        response = client.post('/api/pchi/export', json={'filters': filters, 'format': 'parquet'})
+        if 'parquet' in available_formats():
+            frame = pd.read_parquet(io.BytesIO(response.get_data()))
+            assert len(frame) == len(positions)
+            print("   ✅ Parquet download readable")
+        else:
+            assert response.status_code == 400
+            print("   ✅ Parquet refused without pyarrow")
+        assert client.post('/api/pchi/export', json={'format': 'xlsx'}).status_code == 400
+        assert client.post('/api/pchi/export', json={'columns': ['NOPE']}).status_code == 400
+        for internal in ['FILE_ROW', 'YEAR_MONTH']:
+            assert client.post('/api/pchi/export', json={'columns': ['CL_NO', internal]}).status_code == 400
+        print("   ✅ Unknown formats and unknown or internal columns return 400")
+
+    finally:
+        app_module.pchi_loader, app_module.auth_manager, Config.PCHI_SNAPSHOT_DIR = previous
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("Claims export test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_claims_export()
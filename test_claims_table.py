@@ -0,0 +1,97 @@
+"""
+Test paged and sorted PCHI claims table views
+"""
+import os
+import tempfile
+import warnings
+
+import pandas as pd
+
+from config import Config
+from core.pchi_analyzer import PANEL_COLUMNS, PCHIAnalyzer
+from sample_pchi_data import generate_sample
+
+
+def expected_page(analyzer, filters, page, page_size, sort_by=None, ascending=True):
+    """Build a page the straightforward way: filter, copy, sort and format every row, in file order"""
+    df = analyzer._apply_filters(filters, PANEL_COLUMNS['table'] + ['FILE_ROW']).sort_values('FILE_ROW')
+    df = df[[col for col in PANEL_COLUMNS['table'] if col in df.columns]].copy()
+    if sort_by is not None:
+        df = df.sort_values(sort_by, ascending=ascending, kind='stable', na_position='last')
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime('%Y-%m-%d')
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size].astype(object).fillna('').values.tolist(), len(df)
+
+
+def test_claims_table():
+    print("=" * 60)
+    print("Testing PCHI Claims Table")
+    print("=" * 60)
+
+    fd, csv_path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    previous = Config.PCHI_SNAPSHOT_DIR
+    Config.PCHI_SNAPSHOT_DIR = ''  # Parse the sample; snapshots are covered by test_pchi_snapshot
+    try:
+        generate_sample(csv_path, rows=3000)
+        analyzer = PCHIAnalyzer(csv_path, build_cube=False)
+
+        # Test 1: Pages match a full filter-and-format pass
+        print("\n1. Filtered pages...")
+        for filters in [None, {'years': [2022]}, {'statuses': ['Accept'], 'business_units': ['SME']}]:
+            for page in [1, 3]:
+                table = analyzer.get_claims_data_table(filters, page=page, page_size=50)
+                rows, total = expected_page(analyzer, filters, page, 50)
+                assert table['data'] == rows and table['total_records'] == total
+                assert table['total_pages'] == (total + 49) // 50
+            print(f"   ✅ {filters}: {total:,} rows")
+
+        # Test 2: Server-side sort on any display column, both directions
+        print("\n2. Sorted pages...")
+        filters = {'years': [2021, 2023]}
+        for column in ['APPROVED', 'PAYDATE', 'PROVIDER', 'CL_NO']:
+            for ascending in [True, False]:
+                table = analyzer.get_claims_data_table(filters, page=2, page_size=40,
+                                                       sort_by=column, ascending=ascending)
+                rows, _ = expected_page(analyzer, filters, 2, 40, column, ascending)
+                assert table['data'] == rows, (column, ascending)
+                assert table['sort_by'] == column and table['ascending'] == ascending
+        print("   ✅ Same rows as sort_values, missing values last")
+
+        # Test 3: Turning pages reuses the cached row ids
+        print("\n3. Row id cache...")
+        hits = analyzer.table.stats()['hits']
+        for page in range(1, 6):
+            analyzer.get_claims_data_table({'years': [2022]}, page=page, page_size=20, sort_by='INCURRED')
+        stats = analyzer.table.stats()
+        assert stats['hits'] - hits == 4
+        print(f"   ✅ {stats['hits'] - hits} of 5 pages served from cached row ids")
+
+        # Test 4: Unknown sort column and empty pages
+        print("\n4. Edge cases...")
+        try:
+            analyzer.get_claims_data_table(sort_by='PASSWORD')
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            empty = analyzer.get_claims_data_table({'years': [1999]}, page=1, page_size=10)
+            beyond = analyzer.get_claims_data_table(page=1000, page_size=10)
+        assert empty['data'] == [] and empty['total_records'] == 0
+        assert beyond['data'] == [] and beyond['total_records'] == len(analyzer.df)
+        print("   ✅ Bad column rejected, empty pages handled")
+
+    finally:
+        Config.PCHI_SNAPSHOT_DIR = previous
+        os.remove(csv_path)
+
+    print("\n" + "=" * 60)
+    print("Claims table test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_claims_table()
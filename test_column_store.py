@@ -0,0 +1,77 @@
+"""
+Test the columnar dataset copy written at upload time
+"""
+import os
+import shutil
+import tempfile
+import pandas as pd
+
+from core.column_store import ColumnStore
+from core.data_processor import DataProcessor
+
+
+def test_column_store():
+    print("=" * 60)
+    print("Testing Columnar Dataset Store")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        csv_path = os.path.join(workdir, 'sales.csv')
+        pd.DataFrame({
+            'Region': ['North', 'South', None, 'North', 'East'],
+            'Sales': [100, 250, 75, 300, 125],
+            'Margin': [0.1, None, 0.3, 0.2, 0.15],
+            'Active': [True, False, True, True, False]
+        }).to_csv(csv_path, index=False)
+
+        processor = DataProcessor()
+        processor.datasets_path = os.path.join(workdir, 'datasets')
+        os.makedirs(processor.datasets_path)
+
+        # Test 1: Upload writes the columnar copy
+        print("\n1. Processing CSV...")
+        meta = processor.process_csv(csv_path, 'tester', 'sales.csv')
+        assert ColumnStore(meta['columnar_path']).exists()
+        print(f"   ✅ Columnar copy written to {meta['columnar_path']}")
+
+        # Test 2: Full round trip matches the CSV
+        print("\n2. Comparing full load against the CSV...")
+        expected = pd.read_csv(csv_path, low_memory=False)
+        loaded = processor.load_dataframe(meta)
+        pd.testing.assert_frame_equal(loaded, expected)
+        print("   ✅ Columnar load matches pd.read_csv")
+
+        # Test 3: Column pruning and row limit
+        print("\n3. Loading a subset of columns and rows...")
+        subset = processor.load_dataframe(meta, columns=['Sales', 'Region'], nrows=2)
+        assert list(subset.columns) == ['Sales', 'Region']
+        assert subset['Sales'].tolist() == [100, 250]
+        print("   ✅ Only requested columns and rows were returned")
+
+        # Test 4: Memory-mapped and categorical reads
+        print("\n4. Reading memory-mapped categoricals...")
+        store = ColumnStore(meta['columnar_path'])
+        mapped = store.read(columns=['Region', 'Margin'], mmap=True, categorical=True)
+        assert isinstance(mapped['Region'].dtype, pd.CategoricalDtype)
+        assert mapped['Region'].isna().sum() == 1
+        assert mapped['Margin'].sum() == expected['Margin'].sum()
+        print("   ✅ Memory-mapped read returns the same values")
+
+        # Test 5: Legacy datasets are converted on first load
+        print("\n5. Loading a dataset without a columnar copy...")
+        shutil.rmtree(meta['columnar_path'])
+        pd.testing.assert_frame_equal(processor.load_dataframe(meta), expected)
+        assert ColumnStore(meta['columnar_path']).exists()
+        print("   ✅ Columnar copy rebuilt from the CSV")
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("Column store test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_column_store()
@@ -0,0 +1,106 @@
+"""
+Test streaming CSV profiling and chunked columnar writes
+"""
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+from config import Config
+from core.column_store import ColumnStore
+from core.csv_profiler import HeavyHitters, HyperLogLog
+from core.data_processor import DataProcessor
+
+
+def test_csv_profiler():
+    print("=" * 60)
+    print("Testing Streaming CSV Profiler")
+    print("=" * 60)
+
+    # Test 1: Distinct count sketch
+    print("\n1. Estimating distinct counts...")
+    first, second = HyperLogLog(), HyperLogLog()
+    first.add(np.array([f"id-{i}" for i in range(60000)], dtype=object))
+    second.add(np.array([f"id-{i}" for i in range(40000, 100000)], dtype=object))
+    first.merge(second)
+    estimate = first.count()
+    assert abs(estimate - 100000) / 100000 < 0.03, estimate
+    small = HyperLogLog()
+    small.add(np.array(['a', 'b', 'c', 'a'], dtype=object))
+    assert small.count() == 3
+    print(f"   ✅ 100,000 distinct values estimated as {estimate:,}")
+
+    # Test 2: Heavy hitters
+    print("\n2. Tracking top values...")
+    frequent = HeavyHitters(capacity=4)
+    frequent.update(np.array(['a', 'b', 'c'], dtype=object), np.array([5, 3, 1]))
+    frequent.update(np.array(['a', 'c'], dtype=object), np.array([2, 4]))
+    assert frequent.exact and frequent.top(2) == {'a': 7, 'c': 5}
+    frequent.update(np.array(['d', 'e', 'f'], dtype=object), np.array([1, 1, 1]))
+    assert not frequent.exact and list(frequent.top(1)) == ['a']
+    print("   ✅ Exact under capacity, heaviest value kept beyond it")
+
+    workdir = tempfile.mkdtemp()
+    chunk_size = Config.CSV_CHUNK_SIZE
+    try:
+        # Chunks disagree: an integer column that only later gets blanks, a
+        # numeric column that later turns into text and an all-blank start
+        csv_path = os.path.join(workdir, 'orders.csv')
+        pd.DataFrame({
+            'Region': ['North', 'South', 'North', 'East', 'North', 'West', 'South', 'East'],
+            'Units': [1, 2, 3, 4, None, 6, 7, None],
+            'Code': ['10', '20', '30', '40', 'A1', '60', 'B2', '80'],
+            'Late': [None, None, None, None, 1.5, 2.5, None, 3.5],
+            'Price': [9.5, 3.25, 7.0, 1.0, 2.5, 8.75, 4.0, 6.5]
+        }).to_csv(csv_path, index=False)
+        expected = pd.read_csv(csv_path, low_memory=False)
+
+        processor = DataProcessor()
+        processor.datasets_path = os.path.join(workdir, 'datasets')
+        os.makedirs(processor.datasets_path)
+        Config.CSV_CHUNK_SIZE = 3
+
+        # Test 3: Chunked upload matches a full read
+        print("\n3. Processing CSV in chunks of 3 rows...")
+        meta = processor.process_csv(csv_path, 'tester', 'orders.csv')
+        pd.testing.assert_frame_equal(processor.load_dataframe(meta), expected)
+        print("   ✅ Columnar copy matches pd.read_csv despite type changes between chunks")
+
+        # Test 4: Profile matches the full-read statistics
+        print("\n4. Comparing the profile with full-column statistics...")
+        info = {col['name']: col for col in meta['columns_info']}
+        assert meta['rows'] == len(expected) and meta['columns'] == 5
+        for name in expected.columns:
+            series = expected[name]
+            assert info[name]['dtype'] == str(series.dtype), name
+            assert info[name]['null_count'] == int(series.isna().sum()), name
+            if pd.api.types.is_numeric_dtype(series):
+                assert info[name]['stats']['min'] == float(series.min())
+                assert info[name]['stats']['max'] == float(series.max())
+                assert abs(info[name]['stats']['mean'] - float(series.mean())) < 1e-9
+            else:
+                assert info[name]['stats']['unique_count'] == series.nunique()
+                assert info[name]['stats']['top_values'] == series.value_counts().head(10).to_dict()
+        print("   ✅ Counts, extremes, means and top values are exact")
+
+        # Test 5: Failed writes leave no partial copy
+        print("\n5. Aborting a failed write...")
+        store = ColumnStore(os.path.join(workdir, 'broken.cols'))
+        writer = store.writer()
+        writer.append(expected.head(3))
+        writer.abort()
+        assert not store.exists() and not os.path.exists(writer.tmp_path)
+        print("   ✅ Temporary files removed")
+
+    finally:
+        Config.CSV_CHUNK_SIZE = chunk_size
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("CSV profiler test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_csv_profiler()
@@ -0,0 +1,117 @@
+"""
+Test rendering a saved dashboard in one request
+"""
+import os
+import shutil
+import sys
+import tempfile
+import pandas as pd
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_dashboard_render():
+    print("=" * 60)
+    print("Testing Dashboard Render")
+    print("=" * 60)
+
+    sys.path.insert(0, REPO)
+    import app as app_module
+    from core.auth_manager import AuthManager
+    from core.chart_builder import ChartBuilder
+    from core.data_processor import DataProcessor
+
+    workdir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    previous = (app_module.auth_manager, app_module.data_processor, app_module.chart_builder)
+    try:
+        # The app keeps dashboards and datasets under data/ in the working
+        # directory; its managers are rebuilt there whatever it was imported from
+        os.chdir(workdir)
+        os.makedirs('data/dashboards')
+        app_module.auth_manager = AuthManager(os.path.join(workdir, 'data', 'users.json'))
+        app_module.data_processor = data_processor = DataProcessor()
+        app_module.chart_builder = chart_builder = ChartBuilder()
+        app = app_module.app
+
+        client = app.test_client()
+        assert client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'}).status_code == 200
+
+        sales = os.path.join(workdir, 'sales.csv')
+        pd.DataFrame({
+            'Region': ['North', 'South', 'North', 'East'] * 25,
+            'Sales': range(100),
+            'Units': range(100, 200)
+        }).to_csv(sales, index=False)
+        other = os.path.join(workdir, 'other.csv')
+        pd.DataFrame({'Team': ['A', 'B'] * 10, 'Score': range(20)}).to_csv(other, index=False)
+
+        first = data_processor.process_csv(sales, 'admin', 'sales.csv')
+        second = data_processor.process_csv(other, 'admin', 'other.csv')
+
+        charts = {
+            'widget-1': (first['id'], 'bar', {'x_column': 'Region', 'y_column': 'Sales', 'aggregation': 'sum', 'limit': 10}),
+            'widget-2': (first['id'], 'pie', {'x_column': 'Region', 'y_column': 'Units', 'limit': 10}),
+            'widget-3': (first['id'], 'table', {'columns': ['Region', 'Sales'], 'limit': 5}),
+            'widget-4': (second['id'], 'line', {'x_column': 'Team', 'y_column': 'Score', 'aggregation': 'mean', 'limit': 10}),
+            'widget-5': (second['id'], 'bar', {'x_column': 'Team', 'y_column': 'Missing'}),
+        }
+        layout = [{'id': widget_id, 'x': 0, 'y': i * 4, 'w': 6, 'h': 4,
+                   'chart': {'dataset_id': dataset_id, 'chart_type': chart_type, 'config': config}}
+                  for i, (widget_id, (dataset_id, chart_type, config)) in enumerate(charts.items())]
+        layout.append({'id': 'note', 'x': 6, 'y': 0, 'w': 2, 'h': 2})
+
+        # Test 1: Save and render
+        print("\n1. Rendering a saved dashboard...")
+        saved = client.post('/api/dashboard/save', json={'id': 'render', 'name': 'Sales', 'layout': layout}).get_json()
+        response = client.get(f"/api/dashboard/{saved['dashboard_id']}/render")
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['name'] == 'Sales' and len(body['layout']) == 6
+        assert [widget['id'] for widget in body['widgets']] == list(charts)
+        print(f"   ✅ {len(body['widgets'])} widgets in {body['total_ms']} ms")
+
+        # Test 2: Same charts as one request per widget
+        print("\n2. Comparing with individual chart requests...")
+        for widget in body['widgets'][:4]:
+            dataset_id, chart_type, config = charts[widget['id']]
+            assert widget['chart'] == chart_builder.create_chart(dataset_id, 'admin', chart_type, config)
+            assert widget['ms'] >= 0
+        assert body['widgets'][2]['chart']['type'] == 'table' and len(body['widgets'][2]['chart']['data']['rows']) == 5
+        print("   ✅ Charts match /api/chart/create")
+
+        # Test 3: Grouped by dataset, failures isolated
+        print("\n3. Checking dataset grouping and errors...")
+        assert body['datasets'][first['id']]['widgets'] == 3
+        assert body['datasets'][second['id']]['widgets'] == 2
+        assert 'error' in body['widgets'][4] and 'chart' not in body['widgets'][4]
+        print("   ✅ One load per dataset, broken widget reported alone")
+
+        # Test 4: Widgets without ids keep their own charts
+        print("\n4. Rendering widgets without ids...")
+        unnamed = [{'dataset_id': first['id'], 'chart_type': 'bar', 'config': charts['widget-1'][2]},
+                   {'id': None, 'dataset_id': second['id'], 'chart_type': 'line', 'config': charts['widget-4'][2]},
+                   {'dataset_id': first['id'], 'chart_type': 'pie', 'config': charts['widget-2'][2]}]
+        widgets = chart_builder.render_widgets('admin', unnamed)['widgets']
+        assert [widget['chart'] for widget in widgets] == [body['widgets'][0]['chart'], body['widgets'][3]['chart'],
+                                                           body['widgets'][1]['chart']]
+        assert all(widget['id'] is None for widget in widgets)
+        print("   ✅ Each unnamed widget gets its own chart, in order")
+
+        # Test 5: Unknown dashboards
+        print("\n5. Rendering a missing dashboard...")
+        assert client.get('/api/dashboard/nope/render').status_code == 404
+        print("   ✅ 404 returned")
+
+    finally:
+        app_module.auth_manager, app_module.data_processor, app_module.chart_builder = previous
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("Dashboard render test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_dashboard_render()
@@ -0,0 +1,76 @@
+"""
+Test the indexed dataset metadata catalog
+"""
+import json
+import os
+import shutil
+import tempfile
+import pandas as pd
+
+from core.data_processor import DataProcessor
+from core.dataset_catalog import DatasetCatalog
+
+
+def test_dataset_catalog():
+    print("=" * 60)
+    print("Testing Dataset Catalog")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        csv_path = os.path.join(workdir, 'sales.csv')
+        pd.DataFrame({'Region': ['North', 'South'], 'Sales': [100, 250]}).to_csv(csv_path, index=False)
+
+        datasets_path = os.path.join(workdir, 'datasets')
+        os.makedirs(datasets_path)
+
+        # A dataset uploaded before the catalog existed
+        legacy = {'id': 'legacy0000000001', 'user_id': 'alice', 'filename': 'old.csv', 'rows': 2,
+                  'columns': 2, 'created_at': '2020-01-01T00:00:00', 'size_mb': 0.001}
+        with open(os.path.join(datasets_path, f"{legacy['id']}.json"), 'w') as f:
+            json.dump(legacy, f)
+
+        processor = DataProcessor()
+        processor.datasets_path = datasets_path
+
+        # Test 1: Existing metadata is indexed when the catalog is created
+        print("\n1. Creating the catalog over existing datasets...")
+        assert [d['id'] for d in processor.get_user_datasets('alice')] == [legacy['id']]
+        print("   ✅ Legacy dataset indexed")
+
+        # Test 2: Uploads are indexed per user, newest first
+        print("\n2. Uploading datasets...")
+        first = processor.process_csv(csv_path, 'alice', 'first.csv')
+        second = processor.process_csv(csv_path, 'alice', 'second.csv')
+        other = processor.process_csv(csv_path, 'bob', 'bob.csv')
+        listed = processor.get_user_datasets('alice')
+        assert [d['id'] for d in listed] == [second['id'], first['id'], legacy['id']]
+        assert listed[0] == {'id': second['id'], 'filename': 'second.csv', 'rows': 2, 'columns': 2,
+                             'created_at': second['created_at'], 'size_mb': round(second['size_mb'], 2)}
+        assert [d['id'] for d in processor.get_user_datasets('bob')] == [other['id']]
+        print("   ✅ Listings only contain the user's datasets")
+
+        # Test 3: Ownership lookups
+        print("\n3. Looking up dataset details...")
+        assert processor.get_dataset_info(first['id'], 'alice')['columns_info'] == first['columns_info']
+        assert processor.get_dataset_info(first['id'], 'bob') is None
+        assert processor.get_dataset_info('missing', 'alice') is None
+        print("   ✅ Other users' datasets are not returned")
+
+        # Test 4: Rebuild from the JSON files
+        print("\n4. Rebuilding the catalog...")
+        os.remove(os.path.join(datasets_path, f"{first['id']}.json"))
+        assert DatasetCatalog(datasets_path).rebuild() == 3
+        assert [d['id'] for d in processor.get_user_datasets('alice')] == [second['id'], legacy['id']]
+        print("   ✅ Catalog matches the metadata files")
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("Dataset catalog test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_dataset_catalog()
@@ -0,0 +1,59 @@
+"""
+Test line chart downsampling
+"""
+import numpy as np
+import pandas as pd
+
+from core.chart_builder import ChartBuilder
+from core.downsample import lttb, min_max
+
+
+def test_downsample():
+    print("=" * 60)
+    print("Testing Series Downsampling")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    x = np.arange(100000, dtype='float64')
+    y = rng.standard_normal(100000).cumsum()
+    y[54321] = y.max() + 100
+
+    # Test 1: LTTB
+    print("\n1. Largest-Triangle-Three-Buckets...")
+    keep = lttb(x, y, 500)
+    assert len(keep) == 500 and keep[0] == 0 and keep[-1] == len(x) - 1
+    assert (np.diff(keep) > 0).all()
+    assert 54321 in keep
+    assert list(lttb(x[:10], y[:10], 50)) == list(range(10))
+    print("   ✅ 500 points in x order, spike kept")
+
+    # Test 2: Min/max buckets
+    print("\n2. Min/max per bucket...")
+    keep = min_max(y, 500)
+    assert len(keep) <= 500 and (np.diff(keep) > 0).all()
+    assert y[keep].max() == y.max() and y[keep].min() == y.min()
+    for n_out in [1, 2, 3]:
+        assert len(min_max(y, n_out)) <= n_out
+    assert list(min_max(y, 1)) == [np.argmax(y)]
+    print("   ✅ Every bucket's extremes kept, never more than the budget")
+
+    # Test 3: Line chart over a long daily series
+    print("\n3. Building a downsampled line chart...")
+    days = pd.date_range('2020-01-01', periods=2000)
+    df = pd.DataFrame({'Day': np.repeat(days, 3), 'Claims': np.arange(6000, dtype='float64')})
+    chart = ChartBuilder()._create_series_chart(df, 'Day', 'Claims', 'sum', 'lttb', 200)
+    assert len(chart['labels']) == len(chart['values']) == 200
+    assert chart['total_points'] == 2000 and chart['downsampled']
+    assert chart['labels'][0] == str(days[0]) and chart['labels'][-1] == str(days[-1])
+    assert chart['labels'] == sorted(chart['labels'])
+    short = ChartBuilder()._create_series_chart(df.head(30), 'Day', 'Claims', 'sum', 'minmax', 200)
+    assert short['values'] == [3.0 + 9 * i for i in range(10)] and not short['downsampled']
+    print("   ✅ Bounded payload in date order")
+
+    print("\n" + "=" * 60)
+    print("Downsampling test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_downsample()
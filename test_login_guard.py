@@ -0,0 +1,125 @@
+"""
+Test the login pool, rate limiting, credential cache and batched hash upgrades
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from core.auth_manager import AuthManager
+from core.login_guard import CredentialCache, LoginPool, RateLimiter
+
+
+def test_login_guard():
+    print("=" * 60)
+    print("Testing Login Guard")
+    print("=" * 60)
+
+    # Test 1: Bounded pool
+    print("\n1. Saturating the login pool...")
+    pool = LoginPool(workers=1, max_queue=2)
+    release = threading.Event()
+    futures = [pool.submit(release.wait) for _ in range(3)]
+    time.sleep(0.1)
+    assert pool.stats()['running'] == 1 and pool.stats()['queue_depth'] == 2
+    assert pool.submit(release.wait) is None
+    release.set()
+    assert all(future.result(timeout=5) for future in futures)
+    stats = pool.stats()
+    assert stats['completed'] == 3 and stats['rejected'] == 1 and stats['queue_depth'] == 0
+    print(f"   ✅ Fourth login refused while two were queued: {stats}")
+
+    # Test 2: Sliding-window rate limit
+    print("\n2. Rate limiting attempts...")
+    limiter = RateLimiter(max_attempts=3, window_seconds=0.2)
+    for _ in range(3):
+        assert limiter.retry_after('10.0.0.1') == 0
+        limiter.add('10.0.0.1')
+    assert limiter.retry_after('10.0.0.1') > 0
+    assert limiter.retry_after('10.0.0.2') == 0
+    time.sleep(0.25)
+    assert limiter.retry_after('10.0.0.1') == 0
+    limiter.add('alice')
+    limiter.reset('alice')
+    assert limiter.retry_after('alice') == 0
+    print("   ✅ Blocked after 3 attempts, released after the window")
+
+    # Test 3: Credential cache
+    print("\n3. Caching verified credentials...")
+    cache = CredentialCache(max_entries=2, ttl_seconds=60)
+    cache.remember('alice', 'secret', 'hash-1')
+    assert cache.check('alice', 'secret', 'hash-1')
+    assert not cache.check('alice', 'wrong', 'hash-1')
+    assert not cache.check('alice', 'secret', 'hash-2')
+    cache.remember('bob', 'pw', 'h')
+    cache.remember('carol', 'pw', 'h')
+    assert not cache.check('alice', 'secret', 'hash-1')
+    expired = CredentialCache(max_entries=2, ttl_seconds=0)
+    expired.remember('alice', 'secret', 'hash-1')
+    assert not expired.check('alice', 'secret', 'hash-1')
+    print("   ✅ Wrong passwords, changed hashes and expired entries miss")
+
+    workdir = tempfile.mkdtemp()
+    try:
+        auth = AuthManager(os.path.join(workdir, 'users.db'), upgrade_interval=60)
+        auth.register('alice', 'secret1')
+
+        # Test 4: Repeat logins skip pbkdf2
+        print("\n4. Logging in twice...")
+        start = time.perf_counter()
+        assert auth.authenticate('alice', 'secret1')
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        assert auth.authenticate('alice', 'secret1')
+        repeat = time.perf_counter() - start
+        assert repeat < first
+        assert auth.authenticate('alice', 'wrong') is None
+        auth.update_password('alice', 'secret2')
+        assert auth.authenticate('alice', 'secret1') is None
+        print(f"   ✅ First login {first * 1000:.1f} ms, repeat {repeat * 1000:.2f} ms")
+
+        # Test 5: Legacy password upgrades are deferred and batched
+        print("\n5. Upgrading legacy passwords...")
+        assert auth.authenticate('admin', 'admin123')
+        assert auth.store.get('admin')['password'] == 'admin123'
+        assert auth.authenticate('admin', 'admin123')
+        assert auth.flush_upgrades() == 1
+        assert auth.store.get('admin')['password'].startswith('pbkdf2:')
+        assert auth.authenticate('admin', 'admin123')
+        print("   ✅ Written after the login, one batch")
+
+        # Test 6: An upgrade never overwrites a newer password
+        print("\n6. Changing a password with an upgrade queued...")
+        auth.store.update('admin', password='legacy')
+        assert auth.authenticate('admin', 'legacy')
+        auth.update_password('admin', 'newpass')
+        assert auth.flush_upgrades() == 0
+        assert auth.authenticate('admin', 'newpass') and not auth.authenticate('admin', 'legacy')
+        print("   ✅ Stale upgrade skipped")
+
+        # Test 7: Non-ASCII passwords, hashed and legacy
+        print("\n7. Logging in with a Thai password...")
+        auth.register('somchai', 'รหัสผ่าน123')
+        assert auth.authenticate('somchai', 'รหัสผ่าน123')
+        assert auth.authenticate('somchai', 'รหัสผ่าน') is None
+        auth.store.update('somchai', password='รหัสผ่าน123')
+        assert auth.authenticate('somchai', 'รหัสผ่าน123')
+        assert auth.authenticate('somchai', 'ผิด') is None
+        auth.store.update('somchai', password=hashlib.sha256('รหัสผ่าน123'.encode('utf-8')).hexdigest())
+        assert auth.authenticate('somchai', 'รหัสผ่าน123')
+        assert auth.flush_upgrades() == 1
+        assert auth.authenticate('somchai', 'รหัสผ่าน123')
+        print("   ✅ Pbkdf2, plaintext and SHA256 non-ASCII passwords log in")
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("Login guard test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_login_guard()
@@ -0,0 +1,97 @@
+"""
+Test that parallel chunked groupbys match the serial result
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from core.parallel_groupby import GroupAggregator
+from core.pchi_analyzer import FILTER_COLUMNS, load_claims
+from core.pchi_cube import PANEL_KEYS, ClaimsCube, FrameTotals, has_group_key
+from sample_pchi_data import generate_sample
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_parallel_groupby():
+    print("=" * 60)
+    print("Testing Parallel Groupby")
+    print("=" * 60)
+
+    rng = np.random.default_rng(7)
+    codes = rng.integers(-1, 50, 20000)
+    values = rng.normal(100, 30, (20000, 4))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    values[codes == 49, 2:] = np.nan
+    ops = ['sum', 'count', 'min', 'max']
+
+    frame = pd.DataFrame(values, columns=ops)[codes >= 0]
+    grouped = frame.groupby(codes[codes >= 0])
+    expected = np.column_stack([grouped['sum'].sum(), grouped['count'].count(),
+                                grouped['min'].min(), grouped['max'].max()])
+
+    # Test 1: Every backend gives the pandas result
+    print("\n1. Partial aggregates merged across chunks...")
+    for aggregator in [GroupAggregator(1), GroupAggregator(3, 'thread'), GroupAggregator(2, 'process')]:
+        try:
+            result = aggregator.aggregate(codes, 50, values, ops)
+        finally:
+            aggregator.shutdown()
+        assert np.allclose(result, expected, equal_nan=True)
+        print(f"   ✅ {aggregator.workers} worker(s), {aggregator.backend}")
+
+    # Test 2: Mean from merged sum and count
+    print("\n2. Mean from sum + count...")
+    result = GroupAggregator(4, 'thread').aggregate(codes, 50, values[:, [0, 0]], ['sum', 'count'])
+    mean = frame.groupby(codes[codes >= 0])['sum'].mean().to_numpy()
+    assert np.allclose(result[:, 0] / result[:, 1], mean)
+    print("   ✅ Exact per-group means")
+
+    # Test 3: PCHI totals and cube with a worker pool
+    print("\n3. PCHI panels and cube in parallel...")
+    fd, csv_path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    aggregator = GroupAggregator(2, 'process')
+    try:
+        generate_sample(csv_path, rows=5000)
+        df = load_claims(csv_path)
+
+        serial, parallel = FrameTotals(df), FrameTotals(df, aggregator)
+        for key in PANEL_KEYS:
+            if has_group_key(df.columns, key):
+                pd.testing.assert_frame_equal(serial.totals(key), parallel.totals(key))
+        print(f"   ✅ {len(PANEL_KEYS)} panel keys match the pandas groupby")
+
+        cells = ClaimsCube(df, FILTER_COLUMNS).cells
+        for key, table in ClaimsCube(df, FILTER_COLUMNS, aggregator).cells.items():
+            pd.testing.assert_frame_equal(cells[key], table)
+        print(f"   ✅ {len(cells)} cubes match the serial build")
+    finally:
+        aggregator.shutdown()
+        os.remove(csv_path)
+
+    # Test 4: Spawned workers re-running `python app.py` do not load the PCHI data
+    print("\n4. App imported by a spawned worker...")
+    workdir = tempfile.mkdtemp()
+    try:
+        check = ("import runpy, sys; app = runpy.run_path(sys.argv[1], run_name='__mp_main__'); "
+                 "loader = app['pchi_loader']; sys.exit(loader._thread is not None or loader._watcher is not None)")
+        result = subprocess.run([sys.executable, '-c', check, os.path.join(REPO, 'app.py')], cwd=workdir,
+                                env={**os.environ, 'PYTHONPATH': REPO}, capture_output=True, timeout=120)
+        assert result.returncode == 0, result.stderr.decode()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("   ✅ No loader or watcher started in the worker")
+
+    print("\n" + "=" * 60)
+    print("Parallel groupby test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_parallel_groupby()
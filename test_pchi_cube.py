@@ -0,0 +1,71 @@
+"""
+Test that the pre-aggregated PCHI cube answers panels like a raw scan
+"""
+import math
+import os
+import tempfile
+
+from config import Config
+from core.pchi_analyzer import PCHIAnalyzer
+from sample_pchi_data import generate_sample
+
+
+FILTER_CASES = [
+    None,
+    {'years': [2024]},
+    {'years': [2021, 2023], 'statuses': ['Accept']},
+    {'business_units': ['SME', 'Group'], 'products': ['Product 03', 'Product 07']},
+    {'distribution_channels': ['Bank']},
+    {'years': [1999]},
+]
+
+
+def assert_close(expected, actual, path='result'):
+    """Compare nested results, allowing float rounding differences"""
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys(), path
+        for key in expected:
+            assert_close(expected[key], actual[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert len(expected) == len(actual), path
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            assert_close(a, b, f"{path}[{i}]")
+    elif isinstance(expected, float):
+        assert (math.isnan(expected) and math.isnan(actual)) or math.isclose(expected, actual, abs_tol=0.011), \
+            f"{path}: {expected} != {actual}"
+    else:
+        assert expected == actual, f"{path}: {expected} != {actual}"
+
+
+def test_cube_matches_raw_scan():
+    print("=" * 60)
+    print("Testing PCHI Claims Cube")
+    print("=" * 60)
+
+    fd, csv_path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    previous = Config.PCHI_SNAPSHOT_DIR
+    Config.PCHI_SNAPSHOT_DIR = ''  # Parse the sample; snapshots are covered by test_pchi_snapshot
+    try:
+        generate_sample(csv_path, rows=5000)
+        cubed = PCHIAnalyzer(csv_path)
+        raw = PCHIAnalyzer(csv_path, build_cube=False)
+        print(f"\n📦 Cube cells: {cubed.cube.cell_count():,} for {len(cubed.df):,} claims")
+
+        for filters in FILTER_CASES:
+            expected = raw.get_dashboard_bundle(filters)
+            actual = cubed.get_dashboard_bundle(filters)
+            assert_close(expected, actual)
+            print(f"   ✅ {filters}: {actual['kpis']['total_claims']:,} claims")
+
+    finally:
+        Config.PCHI_SNAPSHOT_DIR = previous
+        os.remove(csv_path)
+
+    print("\n" + "=" * 60)
+    print("Cube test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_cube_matches_raw_scan()
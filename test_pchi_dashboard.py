@@ -2,6 +2,7 @@
 Test script for PCHI Dashboard
 Tests the PCHI analyzer without authentication
 """
+from config import Config
 from core.pchi_analyzer import PCHIAnalyzer
 import json
 
@@ -15,6 +16,9 @@ def test_pchi_analyzer():
     csv_path = 'data/uploads/20251024 PCHI Claim summary 2020 - now.csv'
     print(f"\n📂 Loading data from: {csv_path}")
 
+    # Parse the extract rather than leave a snapshot in the working tree
+    previous = Config.PCHI_SNAPSHOT_DIR
+    Config.PCHI_SNAPSHOT_DIR = ''
     try:
         analyzer = PCHIAnalyzer(csv_path)
         print("✅ Data loaded successfully!")
@@ -92,5 +96,8 @@ def test_pchi_analyzer():
         traceback.print_exc()
         return False
 
+    finally:
+        Config.PCHI_SNAPSHOT_DIR = previous
+
 if __name__ == '__main__':
     test_pchi_analyzer()
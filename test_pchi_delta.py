@@ -0,0 +1,164 @@
+"""
+Test merging delta files of new and updated claims into a loaded PCHI analyzer
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from core.pchi_analyzer import PCHIAnalyzer
+from core.pchi_loader import PCHILoader
+from core.pchi_snapshot import ClaimsSnapshot
+from sample_pchi_data import generate_delta, generate_sample
+
+PANELS = ['get_kpi_summary', 'get_claims_trend', 'get_status_distribution', 'get_top_providers',
+          'get_bu_analysis', 'get_age_distribution', 'get_gender_distribution', 'get_benefit_type_analysis',
+          'get_distribution_channel_analysis', 'get_product_analysis', 'get_yearly_comparison']
+
+FILTER_SETS = [None, {'years': [2022]}, {'statuses': ['Accept'], 'business_units': ['SME', 'Corporate']}]
+
+
+def merged_csv(base_path, delta_paths, path):
+    """Write the extract a full reload would see: delta rows replace base rows in place by CL_NO"""
+    merged = pd.read_csv(base_path, dtype=str).set_index('CL_NO', drop=False)
+    for delta_path in delta_paths:
+        delta = pd.read_csv(delta_path, dtype=str).set_index('CL_NO', drop=False)
+        updated = delta.index.isin(merged.index)
+        merged.loc[delta.index[updated]] = delta[updated]
+        merged = pd.concat([merged, delta[~updated]])
+    merged.to_csv(path, index=False)
+    return path
+
+
+def assert_same_panels(analyzer, expected):
+    """Check every panel, the filter options and sorted and unsorted table pages against a full reload"""
+    for filters in FILTER_SETS:
+        for method in PANELS:
+            result = json.dumps(getattr(analyzer, method)(filters), sort_keys=True, default=str)
+            assert result == json.dumps(getattr(expected, method)(filters), sort_keys=True, default=str), method
+        for sort_by in [None, 'PROVIDER']:
+            page = analyzer.get_claims_data_table(filters, page=2, page_size=20, sort_by=sort_by)
+            assert page == expected.get_claims_data_table(filters, page=2, page_size=20, sort_by=sort_by)
+    assert analyzer.get_filter_options() == expected.get_filter_options()
+
+
+def wait_for(loader, timeout=60):
+    deadline = time.monotonic() + timeout
+    while loader.loading:
+        assert time.monotonic() < deadline, "load did not finish"
+        time.sleep(0.05)
+
+
+def test_pchi_delta():
+    print("=" * 60)
+    print("Testing PCHI Delta Merge")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp()
+    previous = Config.PCHI_SNAPSHOT_DIR
+    Config.PCHI_SNAPSHOT_DIR = os.path.join(workdir, 'snapshots')
+    try:
+        base_path = os.path.join(workdir, 'claims.csv')
+        generate_sample(base_path, rows=5000)
+        analyzer = PCHIAnalyzer(base_path)
+
+        # Test 1: Updates replace rows, new claims are appended
+        print("\n1. Merge a delta...")
+        delta_path = generate_delta(os.path.join(workdir, 'delta1.csv'), 5000, updated=300, added=400)
+        merged = analyzer.with_delta(delta_path)
+        assert merged.delta_summary == {'updated': 300, 'added': 400, 'stale': 0}
+        assert len(merged.df) == 5400 and len(analyzer.df) == 5000
+        expected = PCHIAnalyzer(merged_csv(base_path, [delta_path], os.path.join(workdir, 'full1.csv')))
+        assert_same_panels(merged, expected)
+        print("   ✅ Every panel matches a full reload; the old analyzer is unchanged")
+
+        # Test 2: The merged frame is a shared snapshot, merged once per host
+        print("\n2. Merged snapshot...")
+        assert isinstance(merged.df['APPROVED'].to_numpy().base, np.memmap)
+        deltas_dir = os.path.join(Config.PCHI_SNAPSHOT_DIR, ClaimsSnapshot.DELTAS_DIR)
+        assert len(os.listdir(deltas_dir)) == 1
+        other = PCHIAnalyzer(base_path, build_cube=False).with_delta(delta_path)
+        assert len(os.listdir(deltas_dir)) == 1
+        pd.testing.assert_frame_equal(other.df, merged.df)
+        print("   ✅ A second process maps the first one's merge")
+
+        # Test 3: New categories, stale updates and repeated claims in one delta
+        print("\n3. New values and stale rows...")
+        delta = pd.read_csv(generate_delta(os.path.join(workdir, 'delta2.csv'), 5400, updated=50, added=20,
+                                           seed=9, update_date='2026-02-01'), dtype=str)
+        delta.loc[0, 'BU'] = 'Corporate'
+        delta.loc[1, 'PROVIDER'] = 'Hospital 999'
+        delta.loc[2, 'PAYDATE'] = '2026-01-20'
+        delta.loc[3, 'UPDATE_DATE'] = '2019-01-01'
+        stale_claim = delta.loc[3, 'CL_NO']
+        repeat = delta.iloc[[60]].assign(APPROVED='1.0', UPDATE_DATE='2026-03-01')
+        delta = pd.concat([delta, repeat])
+        delta.to_csv(os.path.join(workdir, 'delta2.csv'), index=False)
+        delta_path2 = os.path.join(workdir, 'delta2.csv')
+
+        merged2 = merged.with_delta(delta_path2)
+        assert merged2.delta_summary['stale'] == 1
+        row = merged2.df[merged2.df['CL_NO'] == repeat['CL_NO'].iloc[0]]
+        assert len(row) == 1 and row['APPROVED'].iloc[0] == 1.0
+        assert (merged2.df['CL_NO'] == stale_claim).sum() == 1
+        assert merged2.df.loc[merged2.df['CL_NO'] == stale_claim, 'UPDATE_DATE'].iloc[0] > pd.Timestamp('2019-01-01')
+
+        fixed = delta[delta['CL_NO'] != stale_claim].sort_values('UPDATE_DATE').drop_duplicates('CL_NO', keep='last')
+        fixed.to_csv(os.path.join(workdir, 'fixed2.csv'), index=False)
+        expected = PCHIAnalyzer(merged_csv(base_path, [delta_path, os.path.join(workdir, 'fixed2.csv')],
+                                           os.path.join(workdir, 'full2.csv')))
+        assert_same_panels(merged2, expected)
+        assert 'Corporate' in merged2.get_filter_options()['business_units']
+        assert 2026 in merged2.get_filter_options()['years']
+        print("   ✅ New categories indexed, older versions ignored, latest duplicate wins")
+
+        # Test 4: Without a cube, and a delta missing its key columns
+        print("\n4. Scan mode and bad deltas...")
+        scan = PCHIAnalyzer(base_path, build_cube=False).with_delta(delta_path)
+        for filters in FILTER_SETS:
+            assert scan.get_kpi_summary(filters) == merged.get_kpi_summary(filters)
+        bad_path = os.path.join(workdir, 'bad.csv')
+        pd.read_csv(delta_path).drop(columns=['UPDATE_DATE']).to_csv(bad_path, index=False)
+        try:
+            analyzer.with_delta(bad_path)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+        print("   ✅ Row scans see the merged rows; deltas without UPDATE_DATE rejected")
+
+        # Test 5: The loader merges new delta files and skips those older than the extract
+        print("\n5. Loader...")
+        delta_dir = os.path.join(workdir, 'deltas')
+        os.makedirs(delta_dir)
+        loader = PCHILoader(base_path, delta_dir=delta_dir, delta_pattern='delta-*.csv')
+        loader.start()
+        wait_for(loader)
+        old = os.path.join(delta_dir, 'delta-0.csv')
+        shutil.copy(delta_path2, old)
+        os.utime(old, ns=(0, 0))
+        shutil.copy(delta_path, os.path.join(delta_dir, 'delta-1.csv'))
+        assert loader.pending_deltas() == [os.path.join(delta_dir, 'delta-1.csv')]
+        assert loader.check()
+        wait_for(loader)
+        status = loader.status()
+        assert status['deltas'] == 1 and status['rows'] == 5400 and status['reloads'] == 0
+        assert loader.get().get_kpi_summary() == merged.get_kpi_summary()
+        assert not loader.check()
+        print(f"   ✅ Merged in {status['delta_seconds']}s without a reload")
+
+    finally:
+        Config.PCHI_SNAPSHOT_DIR = previous
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("PCHI delta test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_pchi_delta()
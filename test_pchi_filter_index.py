@@ -0,0 +1,67 @@
+"""
+Test the PCHI filter index against plain pandas filtering
+"""
+import os
+import tempfile
+import numpy as np
+
+from config import Config
+from core.pchi_analyzer import PCHIAnalyzer, FILTER_COLUMNS
+from sample_pchi_data import generate_sample
+
+
+FILTER_CASES = [
+    {'years': [2024]},
+    {'years': [2021, 2023], 'statuses': ['Accept']},
+    {'business_units': ['SME', 'Group'], 'products': ['Product 03', 'Product 07']},
+    {'distribution_channels': ['Bank', 'Agent', 'Broker', 'Direct', 'Online', 'Telesales']},
+    {'products': [f"Product {n:02d}" for n in range(1, 30)]},
+    {'years': [1999]},
+]
+
+
+def expected_mask(df, filters):
+    """Reference implementation: chained isin masks"""
+    mask = np.ones(len(df), dtype=bool)
+    for key, column in FILTER_COLUMNS.items():
+        if filters.get(key):
+            mask &= df[column].isin(filters[key]).to_numpy(dtype=bool)
+    return mask
+
+
+def test_filter_index():
+    print("=" * 60)
+    print("Testing PCHI Filter Index")
+    print("=" * 60)
+
+    fd, csv_path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    previous = Config.PCHI_SNAPSHOT_DIR
+    Config.PCHI_SNAPSHOT_DIR = ''  # Parse the sample; snapshots are covered by test_pchi_snapshot
+    try:
+        generate_sample(csv_path, rows=5000)
+        analyzer = PCHIAnalyzer(csv_path)
+
+        print("\n1. Unfiltered requests share the loaded frame...")
+        assert analyzer._apply_filters({}) is analyzer.df
+        assert analyzer.filter_index.mask({'years': []}) is None
+        print("   ✅ No copy without filters")
+
+        print("\n2. Comparing bitmap filtering with isin masks...")
+        for filters in FILTER_CASES:
+            mask = analyzer.filter_index.mask(filters)
+            assert np.array_equal(mask, expected_mask(analyzer.df, filters)), filters
+            assert len(analyzer._apply_filters(filters)) == mask.sum()
+            print(f"   ✅ {filters} -> {int(mask.sum()):,} rows")
+
+    finally:
+        Config.PCHI_SNAPSHOT_DIR = previous
+        os.remove(csv_path)
+
+    print("\n" + "=" * 60)
+    print("Filter index test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_filter_index()
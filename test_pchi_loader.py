@@ -0,0 +1,105 @@
+"""
+Test background loading of the PCHI analyzer
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from config import Config
+from core.pchi_loader import PCHILoader
+from sample_pchi_data import generate_sample
+
+
+def wait_for(loader, timeout=60):
+    """Wait until the loader has no load running"""
+    deadline = time.monotonic() + timeout
+    while loader.loading:
+        assert time.monotonic() < deadline, "load did not finish"
+        time.sleep(0.05)
+
+
+def test_pchi_loader():
+    print("=" * 60)
+    print("Testing PCHI Background Loader")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp()
+    csv_path = os.path.join(workdir, 'claims.csv')
+    previous = Config.PCHI_SNAPSHOT_DIR
+    Config.PCHI_SNAPSHOT_DIR = os.path.join(workdir, 'snapshots')
+    try:
+        print("\n1. Missing file...")
+        loader = PCHILoader(csv_path)
+        assert loader.get() is None
+        assert loader.status()['status'] == 'missing'
+        print("   ✅ Reported as missing")
+
+        print("\n2. Background load...")
+        generate_sample(csv_path, rows=3000)
+        assert loader.start()
+        assert not loader.start()
+        status = loader.status()
+        assert status['status'] in ('loading', 'ready')
+        print(f"   ✅ Returned immediately while {status.get('stage') or 'ready'}")
+
+        wait_for(loader)
+        status = loader.status()
+        assert status['status'] == 'ready'
+        assert status['rows'] == 3000
+        assert status['load_seconds'] >= 0
+        analyzer = loader.get()
+        assert analyzer.get_kpi_summary()['total_claims'] == 3000
+        print(f"   ✅ Ready: {status['rows']:,} rows in {status['load_seconds']}s")
+
+        print("\n3. Changed file...")
+        generate_sample(csv_path, rows=4000)
+        os.utime(csv_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        assert loader.get() is analyzer
+        wait_for(loader)
+        assert loader.get().get_kpi_summary()['total_claims'] == 4000
+        print("   ✅ Reloaded in the background, old analyzer served meanwhile")
+
+        print("\n4. Watch directory...")
+        watched = PCHILoader(None, watch_dir=workdir, pattern='claims_*.csv', settle_seconds=0.3)
+        assert watched.status()['status'] == 'missing'
+        generate_sample(os.path.join(workdir, 'claims_1.csv'), rows=1000)
+        watched.watch(0.05)
+        assert watched.start()
+        wait_for(watched)
+        first = watched.get()
+        assert len(first.df) == 1000
+
+        generate_sample(os.path.join(workdir, 'claims_2.csv'), rows=2000)
+        os.utime(os.path.join(workdir, 'claims_2.csv'), ns=(time.time_ns(), time.time_ns() + 10**9))
+        time.sleep(0.15)
+        assert watched.get() is first and not watched.loading
+        deadline = time.monotonic() + 60
+        while watched.status().get('reloads') != 1:
+            assert time.monotonic() < deadline, "reload not picked up"
+            time.sleep(0.05)
+        assert len(watched.get().df) == 2000
+        assert len(first.df) == 1000
+        print("   ✅ Newest extract swapped in after settling; old snapshot untouched")
+
+        print("\n5. Unreadable file...")
+        with open(csv_path, 'w') as f:
+            f.write('CL_NO,PAYDATE\n"CL1,2024-01-01\n')
+        broken = PCHILoader(csv_path)
+        broken.start()
+        wait_for(broken)
+        assert broken.status()['status'] == 'failed'
+        assert broken.get() is None and not broken.loading
+        print(f"   ✅ Failed load reported and not retried: {broken.status()['error'][:50]}")
+
+    finally:
+        Config.PCHI_SNAPSHOT_DIR = previous
+        shutil.rmtree(workdir)
+
+    print("\n" + "=" * 60)
+    print("Loader test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_pchi_loader()
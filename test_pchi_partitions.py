@@ -0,0 +1,136 @@
+"""
+Test pay-month partitioning of the PCHI claims frame
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from core.pchi_analyzer import PCHIAnalyzer, load_claims
+from sample_pchi_data import generate_delta, generate_sample
+
+PANELS = ['get_kpi_summary', 'get_claims_trend', 'get_top_providers', 'get_bu_analysis',
+          'get_yearly_comparison', 'get_distribution_channel_analysis']
+
+
+def test_pchi_partitions():
+    print("=" * 60)
+    print("Testing PCHI Partitions")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp()
+    previous = Config.PCHI_SNAPSHOT_DIR
+    Config.PCHI_SNAPSHOT_DIR = os.path.join(workdir, 'snapshots')
+    try:
+        csv_path = generate_sample(os.path.join(workdir, 'claims.csv'), rows=20000)
+        raw = load_claims(csv_path, partitioned=False)
+        analyzer = PCHIAnalyzer(csv_path, build_cube=False)
+        df = analyzer.df
+        partitions = analyzer.partitions
+
+        # Test 1: Rows are grouped by pay month, file order kept within a month
+        print("\n1. Layout...")
+        assert list(df['YEAR_MONTH']) == sorted(raw['YEAR_MONTH'])
+        assert partitions.labels == sorted(raw['YEAR_MONTH'].unique()) and partitions.labels[-1] == 'NaT'
+        month = raw[raw['YEAR_MONTH'] == '2022-03']
+        assert list(df.loc[df['YEAR_MONTH'] == '2022-03', 'CL_NO']) == list(month['CL_NO'])
+        for label, start, stop in zip(partitions.labels, partitions.bounds[:-1], partitions.bounds[1:]):
+            assert (df['YEAR_MONTH'].iloc[start:stop] == label).all()
+        print(f"   ✅ {len(partitions.labels)} pay-month partitions, each one run of rows")
+
+        # Test 2: The table, exports and filter options keep the extract's order
+        print("\n2. File order...")
+        page = analyzer.get_claims_data_table({'statuses': ['Accept']}, page=3, page_size=25)
+        accepted = raw.loc[raw['CLAIM_STATUS'] == 'Accept', 'CL_NO']
+        assert [row[0] for row in page['data']] == list(accepted.iloc[50:75])
+        page = analyzer.get_claims_data_table(None, page=1, page_size=40, sort_by='CLAIM_STATUS')
+        assert [row[0] for row in page['data']] == list(accepted.iloc[:40])
+        exported = pd.read_csv(io.BytesIO(b''.join(analyzer.export_claims({'years': [2021, 2023]}))))
+        assert list(exported['CL_NO']) == list(raw.loc[raw['YEAR'].isin([2021, 2023]), 'CL_NO'])
+        assert analyzer.get_filter_options()['statuses'] == raw['CLAIM_STATUS'].dropna().unique().tolist()
+        partitions.evict()
+        print("   ✅ Unsorted rows and sort ties in file order")
+
+        # Test 3: Partitions are paged in on first use, starting from none
+        print("\n3. Lazy loading...")
+        stats = partitions.stats()
+        assert stats['mapped'] and stats['resident'] == 0 and stats['partitions'] == len(partitions.labels)
+        assert isinstance(df['APPROVED'].to_numpy().base, np.memmap)
+        print(f"   ✅ Nothing resident after load ({stats['loads']} loads)")
+
+        # Test 4: A year filter reads only its partitions, as a slice of the mapped frame
+        print("\n4. Partition pruning...")
+        columns = ['YEAR_MONTH', 'CL_NO', 'APPROVED', 'CLAIM_STATUS']
+        rows = analyzer._apply_filters({'years': [2022, 2023]}, columns)
+        expected = raw.loc[raw['YEAR'].isin([2022, 2023]), columns]
+        pd.testing.assert_frame_equal(rows.sort_values('CL_NO', ignore_index=True),
+                                      expected.sort_values('CL_NO', ignore_index=True))
+        assert np.shares_memory(rows['APPROVED'].to_numpy(), df['APPROVED'].to_numpy())
+        assert sorted(partitions.resident()) == [label for label in partitions.labels if label[:4] in ('2022', '2023')]
+
+        partitions.evict()
+        filters = {'years': [2021], 'statuses': ['Accept'], 'business_units': ['SME']}
+        rows = analyzer._apply_filters(filters, columns)
+        mask = raw['YEAR'].isin([2021]) & raw['CLAIM_STATUS'].isin(['Accept']) & raw['BU'].isin(['SME'])
+        assert sorted(rows['CL_NO']) == sorted(raw.loc[mask, 'CL_NO'])
+        assert all(label.startswith('2021') for label in partitions.resident())
+        print("   ✅ Only the selected years' partitions are read; whole years need no copy")
+
+        # Test 5: Answers match the cube, with and without pruning
+        print("\n5. Results...")
+        cubed = PCHIAnalyzer(csv_path)
+        for filters in [None, {'years': [2022]}, {'years': [2021, 2024], 'statuses': ['Reject']}]:
+            for method in PANELS:
+                assert json.dumps(getattr(analyzer, method)(filters)) == json.dumps(getattr(cubed, method)(filters)), method
+        print("   ✅ Scans over pruned partitions match the cube")
+
+        # Test 6: Cold partitions are paged out beyond the budget
+        print("\n6. Eviction...")
+        partitions.evict()
+        partitions.max_bytes = partitions.row_bytes * 1000
+        evictions = partitions.stats()['evictions']
+        analyzer.get_claims_data_table(None, page=1, page_size=50, sort_by='APPROVED')
+        analyzer.get_kpi_summary({'years': [2020]})
+        stats = partitions.stats()
+        assert stats['evictions'] > evictions
+        assert stats['resident_mb'] * 1024 * 1024 <= partitions.max_bytes + 1
+        assert b''.join(analyzer.export_claims({'years': [2024]}))
+        assert partitions.stats()['resident_mb'] * 1024 * 1024 <= partitions.max_bytes + 1
+        print(f"   ✅ {stats['evictions'] - evictions} evictions kept {stats['resident_mb']} MB resident")
+
+        # Test 7: Merged delta rows form their own partition
+        print("\n7. Delta rows...")
+        delta_path = generate_delta(os.path.join(workdir, 'delta.csv'), 20000, updated=50, added=80)
+        merged = analyzer.with_delta(delta_path)
+        assert merged.partitions.labels[-1] is None and merged.partitions.bounds[-1] == 20080
+        assert merged.partitions.stats()['mapped'] and merged.partitions.stats()['resident'] == 0
+        assert merged.partitions.touch([20050])[-1] is None
+        merged_cube = cubed.with_delta(delta_path)
+        for filters in [{'years': [2022]}, {'years': [2026]}]:
+            assert merged.get_claims_trend(filters) == merged_cube.get_claims_trend(filters)
+        print("   ✅ Appended rows are one extra partition of the mapped merge")
+
+        # Test 8: Without snapshots the frame is private and partitions are only counted
+        print("\n8. Private frame...")
+        Config.PCHI_SNAPSHOT_DIR = ''
+        parsed = PCHIAnalyzer(csv_path, build_cube=False)
+        assert not parsed.partitions.stats()['mapped']
+        assert parsed.get_kpi_summary({'years': [2022]}) == analyzer.get_kpi_summary({'years': [2022]})
+        print("   ✅ Parsed frames are partitioned the same way")
+
+    finally:
+        Config.PCHI_SNAPSHOT_DIR = previous
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("PCHI partitions test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_pchi_partitions()
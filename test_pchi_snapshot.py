@@ -0,0 +1,196 @@
+"""
+Test preprocessed PCHI claims snapshots
+"""
+import errno
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from core.pchi_analyzer import CLAIM_SCHEMA, PCHIAnalyzer, load_claims, load_claims_snapshot
+from core.pchi_snapshot import ClaimsSnapshot
+from sample_pchi_data import generate_sample
+
+
+def as_loaded(df):
+    """Turn text kept categorical for sharing back into the object columns load_claims returns"""
+    return df.astype({col: object for col, dtype in CLAIM_SCHEMA.items() if dtype == 'object'})
+
+
+def mapped(values):
+    """Check whether an array is a view of a memory-mapped snapshot file"""
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+def test_pchi_snapshot():
+    print("=" * 60)
+    print("Testing PCHI Snapshots")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp()
+    snapshot_dir = os.path.join(workdir, 'snapshots')
+    try:
+        csv_path = os.path.join(workdir, 'claims.csv')
+        generate_sample(csv_path, rows=3000)
+        expected = load_claims(csv_path)
+
+        # Test 1: First load writes the snapshot, the next one maps it
+        print("\n1. Cold and warm loads...")
+        cold = load_claims_snapshot(csv_path, snapshot_dir)
+        pd.testing.assert_frame_equal(as_loaded(cold), expected)
+        snapshots = [name for name in os.listdir(snapshot_dir) if not name.startswith('.') and not name.endswith('.json')]
+        assert len(snapshots) == 1
+
+        warm = load_claims_snapshot(csv_path, snapshot_dir)
+        pd.testing.assert_frame_equal(as_loaded(warm), expected)
+        print(f"   ✅ {len(warm):,} rows, same values and dtypes as parsing the CSV")
+
+        # Test 2: Every column but unique text is mapped, not copied
+        print("\n2. Zero-copy columns...")
+        for col in ['APPROVED', 'AGE', 'PAYDATE']:
+            values = warm[col].to_numpy()
+            assert mapped(values) and not values.flags.writeable, col
+        for col in ['YEAR', 'MONTH', 'QUARTER']:
+            assert mapped(warm[col].array._data) and mapped(warm[col].array._mask), col
+        for col in ['PROVIDER', 'YEAR_MONTH', 'Member Name', 'DIAGNOSIS_DETAILS']:
+            assert mapped(warm[col].array.codes), col
+        assert warm['CL_NO'].dtype == object
+        categories = warm['DIAGNOSIS_DETAILS'].cat.categories
+        assert categories.is_monotonic_increasing
+        print("   ✅ Numbers, dates, nullable integers and repeated text share the snapshot pages")
+
+        # Test 3: An unchanged file is not hashed again; a changed one gets a new snapshot
+        print("\n3. Source changes...")
+        snapshot = ClaimsSnapshot(snapshot_dir)
+        first = snapshot.path_for(csv_path)
+        hashes_path = os.path.join(snapshot_dir, ClaimsSnapshot.HASHES_FILE)
+        with open(hashes_path, 'r') as f:
+            hashes = json.load(f)
+        entry = hashes[os.path.abspath(csv_path)]
+        hashes[os.path.abspath(csv_path)] = dict(entry, sha256='cached')
+        with open(hashes_path, 'w') as f:
+            json.dump(hashes, f)
+        assert snapshot.path_for(csv_path) != first
+        with open(hashes_path, 'w') as f:
+            json.dump(dict(hashes, **{os.path.abspath(csv_path): entry}), f)
+
+        generate_sample(csv_path, rows=2000, seed=7)
+        changed = load_claims_snapshot(csv_path, snapshot_dir)
+        pd.testing.assert_frame_equal(as_loaded(changed), load_claims(csv_path))
+        assert snapshot.path_for(csv_path) != first
+
+        moved_path = os.path.join(workdir, 'moved.csv')
+        shutil.copy(csv_path, moved_path)
+        load_claims_snapshot(moved_path, snapshot_dir)
+        os.remove(moved_path)
+        generate_sample(csv_path, rows=2500, seed=9)
+        load_claims_snapshot(csv_path, snapshot_dir)
+        with open(hashes_path, 'r') as f:
+            assert list(json.load(f)) == [os.path.abspath(csv_path)]
+        print("   ✅ Cached hash reused, edited file rebuilt, removed sources forgotten")
+
+        # Test 4: Older snapshots are pruned, damaged ones rebuilt
+        print("\n4. Pruning and damage...")
+        generate_sample(csv_path, rows=1000, seed=11)
+        expected = load_claims(csv_path)
+        load_claims_snapshot(csv_path, snapshot_dir)
+        snapshots = [name for name in os.listdir(snapshot_dir) if not name.startswith('.') and not name.endswith('.json')]
+        assert len(snapshots) == Config.PCHI_SNAPSHOT_KEEP
+
+        snapshot.load(csv_path, load_claims)
+        damaged = snapshot.path_for(csv_path)
+        for name in os.listdir(damaged):
+            if name.endswith('.bin'):
+                os.truncate(os.path.join(damaged, name), 10)
+        pd.testing.assert_frame_equal(snapshot.load(csv_path, load_claims), expected)
+        pd.testing.assert_frame_equal(snapshot.load(csv_path, load_claims), expected)
+        with open(os.path.join(damaged, ClaimsSnapshot.META_FILE), 'w') as f:
+            f.write('{')
+        pd.testing.assert_frame_equal(snapshot.load(csv_path, load_claims), expected)
+
+        def unreadable(*args, **kwargs):
+            raise OSError(errno.EIO, 'I/O error')
+        snapshot.read = unreadable
+        try:
+            snapshot.load(csv_path, load_claims)
+            assert False, "I/O errors should propagate"
+        except OSError as e:
+            assert e.errno == errno.EIO
+        del snapshot.read
+        assert os.path.exists(os.path.join(damaged, ClaimsSnapshot.META_FILE))
+        print("   ✅ Newest snapshots kept, damaged snapshot rebuilt, other read errors raised")
+
+        # Test 5: Workers starting together build the snapshot once
+        print("\n5. Concurrent starts...")
+        generate_sample(csv_path, rows=1500, seed=13)
+        builds = []
+
+        def loader(path):
+            builds.append(path)
+            return load_claims(path)
+
+        frames = [None] * 4
+
+        def start(n):
+            frames[n] = ClaimsSnapshot(snapshot_dir).load(csv_path, loader)
+        threads = [threading.Thread(target=start, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(builds) == 1
+        for frame in frames:
+            pd.testing.assert_frame_equal(frame, load_claims(csv_path))
+            assert mapped(frame['APPROVED'].to_numpy())
+        print("   ✅ One build, every loader maps the same snapshot")
+
+        # Test 6: The analyzer loads through the snapshot; '' disables it
+        print("\n6. Analyzer...")
+        previous = Config.PCHI_SNAPSHOT_DIR
+        Config.PCHI_SNAPSHOT_DIR = snapshot_dir
+        try:
+            analyzer = PCHIAnalyzer(csv_path, build_cube=False)
+            assert isinstance(analyzer.df['APPROVED'].to_numpy().base, np.memmap)
+            kpis = analyzer.get_kpi_summary({'years': [2022]})
+            Config.PCHI_SNAPSHOT_DIR = ''
+            parsed = PCHIAnalyzer(csv_path, build_cube=False)
+            assert not isinstance(parsed.df['APPROVED'].to_numpy().base, np.memmap)
+            assert parsed.get_kpi_summary({'years': [2022]}) == kpis
+        finally:
+            Config.PCHI_SNAPSHOT_DIR = previous
+        print("   ✅ Same KPIs from the snapshot and from the CSV")
+
+        # Test 7: The raw data view gets every extract column, sharing the claims columns
+        print("\n7. Extra columns...")
+        full = load_claims_snapshot(csv_path, snapshot_dir, extra_columns=True)
+        header = list(pd.read_csv(csv_path, nrows=0).columns)
+        assert list(full.columns) == header + ['YEAR', 'MONTH', 'QUARTER', 'YEAR_MONTH', 'FILE_ROW']
+        claims = load_claims_snapshot(csv_path, snapshot_dir)
+        pd.testing.assert_frame_equal(full[list(claims.columns)], claims)
+        assert mapped(full['DED_AMT'].to_numpy()) and mapped(full['SICK/FROM'].to_numpy())
+        raw = pd.read_csv(csv_path).set_index('CL_NO').loc[full['CL_NO']]
+        assert (pd.to_datetime(raw['SICK/FROM']).to_numpy() == full['SICK/FROM'].to_numpy()).all()
+        pd.testing.assert_series_equal(full['COPAY_AMT'], raw['COPAY_AMT'].reset_index(drop=True))
+        parsed = load_claims_snapshot(csv_path, '', extra_columns=True)
+        pd.testing.assert_frame_equal(as_loaded(full), parsed)
+        print(f"   ✅ {len(full.columns)} columns, the extras mapped from their own snapshot")
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("PCHI snapshot test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_pchi_snapshot()
@@ -0,0 +1,77 @@
+"""
+Test the memoized PCHI query result cache
+"""
+import time
+
+from core.query_cache import QueryCache, canonical_filters
+
+
+def test_query_cache():
+    print("=" * 60)
+    print("Testing Query Cache")
+    print("=" * 60)
+
+    calls = []
+
+    def compute(value):
+        def run():
+            calls.append(value)
+            return {'value': value}
+        return run
+
+    print("\n1. Canonical filter keys...")
+    assert canonical_filters(None) == canonical_filters({}) == canonical_filters({'years': []})
+    assert canonical_filters({'years': [2024, 2021], 'statuses': ['Accept']}) == \
+        canonical_filters({'statuses': ['Accept'], 'years': [2021, 2024, 2024], 'products': []})
+    assert canonical_filters({'years': [2021]}) != canonical_filters({'years': [2024]})
+    print("   ✅ Order, duplicates and empty selections are ignored")
+
+    print("\n2. Hits and misses...")
+    cache = QueryCache(max_entries=2, ttl_seconds=60)
+    result, hit = cache.get('get_kpi_summary', {'years': [2024, 2023]}, 'v1', compute(1))
+    assert result == {'value': 1} and not hit
+    result, hit = cache.get('get_kpi_summary', {'years': [2023, 2024]}, 'v1', compute(2))
+    assert result == {'value': 1} and hit
+    result, hit = cache.get('get_top_providers', {'years': [2023, 2024]}, 'v1', compute(3), limit=10)
+    assert result == {'value': 3} and not hit
+    result, hit = cache.get('get_top_providers', {'years': [2023, 2024]}, 'v1', compute(4), limit=5)
+    assert result == {'value': 4} and not hit
+    assert calls == [1, 3, 4]
+    print("   ✅ Keyed by method, filters and parameters")
+
+    print("\n3. Bounded size...")
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['evictions'] == 1
+    result, hit = cache.get('get_kpi_summary', {'years': [2023, 2024]}, 'v1', compute(5))
+    assert not hit
+    print("   ✅ Least recently used result evicted")
+
+    print("\n4. Data version change...")
+    result, hit = cache.get('get_kpi_summary', {'years': [2023, 2024]}, 'v2', compute(6))
+    assert result == {'value': 6} and not hit
+    assert cache.stats()['entries'] == 1
+    print("   ✅ New CSV version drops cached results")
+
+    print("\n5. Requests on a replaced version...")
+    result, hit = cache.get('get_kpi_summary', {'years': [2023, 2024]}, 'v1', compute(10))
+    assert result == {'value': 10} and not hit
+    assert cache.get('get_kpi_summary', {'years': [2023, 2024]}, 'v2', compute(11))[1]
+    assert cache.stats()['entries'] == 1
+    print("   ✅ Old snapshot results are computed but not cached")
+
+    print("\n6. Time to live...")
+    cache = QueryCache(max_entries=10, ttl_seconds=0.05)
+    cache.get('get_claims_trend', None, 'v1', compute(7))
+    assert cache.get('get_claims_trend', None, 'v1', compute(8))[1]
+    time.sleep(0.1)
+    result, hit = cache.get('get_claims_trend', None, 'v1', compute(9))
+    assert result == {'value': 9} and not hit
+    print("   ✅ Expired results are recomputed")
+
+    print("\n" + "=" * 60)
+    print("Query cache test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_query_cache()
@@ -0,0 +1,86 @@
+"""
+Test ratio metrics per dimension against a per-group scan
+"""
+import math
+import os
+import tempfile
+
+from config import Config
+from core.pchi_analyzer import PCHIAnalyzer
+from sample_pchi_data import generate_sample
+
+
+def expected_ratios(analyzer, filters, dimension):
+    """Compute the ratios the slow way: one boolean scan per group value"""
+    df = analyzer._apply_filters(filters)
+    result = {}
+    for value in df[dimension].dropna().unique():
+        group = df[df[dimension] == value]
+        approved = group['APPROVED']
+        result[value] = {
+            'accept_rate': (group['CLAIM_STATUS'] == 'Accept').mean() * 100,
+            'reject_rate': (group['CLAIM_STATUS'] == 'Reject').mean() * 100,
+            'approved_claimed_ratio': approved.sum() / group['CLAIMED'].sum() * 100,
+            'avg_approved': approved.mean(),
+        }
+    return result
+
+
+def test_ratio_metrics():
+    print("=" * 60)
+    print("Testing Ratio Metrics")
+    print("=" * 60)
+
+    fd, csv_path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    previous = Config.PCHI_SNAPSHOT_DIR
+    Config.PCHI_SNAPSHOT_DIR = ''  # Parse the sample; snapshots are covered by test_pchi_snapshot
+    try:
+        generate_sample(csv_path, rows=4000)
+        cubed = PCHIAnalyzer(csv_path)
+        raw = PCHIAnalyzer(csv_path, build_cube=False)
+
+        # Test 1: Every metric for several dimensions, from the cube and from rows
+        print("\n1. Grouped ratios...")
+        for dimension, filters in [('DISTRIBUTION', None), ('BU', {'years': [2022]}),
+                                   ('PRODUCT', {'statuses': ['Accept', 'Reject']}), ('Gender', None)]:
+            expected = expected_ratios(raw, filters, dimension)
+            for analyzer in (cubed, raw):
+                result = analyzer.get_ratio_metrics(filters, dimension)
+                assert sorted(result['labels']) == sorted(expected)
+                for i, label in enumerate(result['labels']):
+                    for metric, value in expected[label].items():
+                        assert math.isclose(result[metric][i], value, abs_tol=0.006), (dimension, label, metric)
+            print(f"   ✅ {dimension}: {len(expected)} groups")
+
+        # Test 2: The channel panel uses the same accept rate
+        print("\n2. Distribution channel panel...")
+        panel = cubed.get_distribution_channel_analysis()
+        ratios = cubed.get_ratio_metrics(dimension='DISTRIBUTION', metrics=['accept_rate'])
+        assert panel['labels'] == ratios['labels'] and panel['approval_rates'] == ratios['accept_rate']
+        assert list(ratios) == ['dimension', 'labels', 'claim_counts', 'accept_rate']
+        print("   ✅ Approval rates match")
+
+        # Test 3: Derived keys and bad requests
+        print("\n3. Derived dimensions and errors...")
+        ages = raw.get_ratio_metrics(dimension='AGE_GROUP')
+        assert sum(ages['claim_counts']) == raw.df['AGE'].between(0, 100, inclusive='right').sum()
+        for bad in [dict(dimension='PASSWORD'), dict(metrics=['profit'])]:
+            try:
+                cubed.get_ratio_metrics(**bad)
+                assert False, f"expected ValueError for {bad}"
+            except ValueError:
+                pass
+        print("   ✅ AGE_GROUP supported, unknown dimension/metric rejected")
+
+    finally:
+        Config.PCHI_SNAPSHOT_DIR = previous
+        os.remove(csv_path)
+
+    print("\n" + "=" * 60)
+    print("Ratio metrics test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_ratio_metrics()
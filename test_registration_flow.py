@@ -1,22 +1,28 @@
 """
 Test the actual registration and login flow
 """
+import os
+import shutil
+import tempfile
+
 from core.auth_manager import AuthManager
-import json
 
 def test_registration_flow():
     print("=" * 60)
     print("Testing ACTUAL Registration and Login Flow")
     print("=" * 60)
 
-    auth = AuthManager()
+    # Fresh users file, so 'newuser' never exists yet
+    workdir = tempfile.mkdtemp()
+    try:
+        _registration_flow(AuthManager(os.path.join(workdir, 'users.json')))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
 
-    # Clear test user if exists
-    users = auth._load_users()
-    if 'newuser' in users:
-        del users['newuser']
-        auth._save_users(users)
-        print("\n🧹 Cleared existing 'newuser'")
+
+def _registration_flow(auth):
 
     # Test 1: Register a new user
     print("\n1️⃣ Registering new user 'newuser' with password 'mypass123'...")
@@ -24,7 +30,7 @@ def test_registration_flow():
     print(f"   Registration: {success} - {msg}")
 
     # Check what was stored
-    users = auth._load_users()
+    users = auth.store.all()
     if 'newuser' in users:
         stored_hash = users['newuser']['password']
         print(f"   Stored password hash: {stored_hash[:50]}...")
@@ -78,7 +84,5 @@ def test_registration_flow():
     else:
         print(f"   ❌ Admin login FAILED!")
 
-    print("\n" + "=" * 60)
-
 if __name__ == '__main__':
     test_registration_flow()
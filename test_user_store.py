@@ -0,0 +1,91 @@
+"""
+Test the JSON and SQLite user store backends
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from core.auth_manager import AuthManager
+from core.user_store import JSONUserStore, SQLiteUserStore
+from import_users_sqlite import import_users_sqlite
+
+
+def test_user_store():
+    print("=" * 60)
+    print("Testing User Store Backends")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        for users_file in ['users.json', 'users.db']:
+            path = os.path.join(workdir, users_file)
+            auth = AuthManager(path)
+            backend = type(auth.store).__name__
+
+            # Test 1: Default admin account and hash upgrade
+            print(f"\n1. [{backend}] Logging in as the default admin...")
+            assert auth.authenticate('admin', 'admin123')['role'] == 'admin'
+            assert auth.flush_upgrades() == 1
+            assert auth.store.get('admin')['password'].startswith('pbkdf2:')
+            assert auth.authenticate('admin', 'admin123') is not None
+            print("   ✅ Plaintext password upgraded to a hash")
+
+            # Test 2: Registration and lookups
+            print(f"\n2. [{backend}] Registering users...")
+            assert auth.register('alice', 'secret1', 'alice@example.com')[0]
+            assert auth.register('alice', 'other', '') == (False, 'Username already exists')
+            assert auth.get_user('alice')['email'] == 'alice@example.com'
+            assert 'password' not in auth.get_user('alice')
+            assert auth.get_user('nobody') is None
+            print("   ✅ Duplicate usernames rejected")
+
+            # Test 3: Password updates
+            print(f"\n3. [{backend}] Updating a password...")
+            assert auth.update_password('alice', 'secret2')[0]
+            assert auth.authenticate('alice', 'secret1') is None
+            assert auth.authenticate('alice', 'secret2')['username'] == 'alice'
+            assert auth.update_password('nobody', 'x') == (False, 'User not found')
+            print("   ✅ Only the new password is accepted")
+
+            # Test 4: Concurrent registrations are not lost
+            print(f"\n4. [{backend}] Registering from several threads...")
+            threads = [threading.Thread(target=auth.register, args=(f"user{i}", 'pw')) for i in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            reopened = AuthManager(path)
+            assert all(reopened.get_user(f"user{i}") for i in range(20))
+            assert len(reopened.store.all()) == 22
+            print("   ✅ All 20 users persisted")
+
+        # Test 5: Atomic JSON writes leave no temporary files
+        print("\n5. Checking the JSON file after writes...")
+        with open(os.path.join(workdir, 'users.json')) as f:
+            assert len(json.load(f)) == 22
+        assert not [name for name in os.listdir(workdir) if name.endswith('.tmp')]
+        print("   ✅ users.json is complete and no temp files remain")
+
+        # Test 6: Import the JSON users into SQLite
+        print("\n6. Importing users.json into SQLite...")
+        db_file = os.path.join(workdir, 'imported.db')
+        import_users_sqlite(os.path.join(workdir, 'users.json'), db_file)
+        imported = SQLiteUserStore(db_file).all()
+        original = JSONUserStore(os.path.join(workdir, 'users.json')).all()
+        assert set(imported) == set(original)
+        assert all(imported[name]['password'] == user['password'] for name, user in original.items())
+        assert AuthManager(db_file).authenticate('alice', 'secret2') is not None
+        print("   ✅ Imported users can log in")
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("User store test complete!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_user_store()